@@ -0,0 +1,439 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import date, datetime
+from http import HTTPStatus
+from typing import Awaitable, Callable, List, Optional
+from urllib.parse import parse_qs
+
+import numpy as np
+
+import audit_log
+import batch
+import master
+import metrics
+from master_registry import MasterRegistry, MasterSnapshot
+from rate_store import NO_CODE
+from tiers import RULES_PATH, Rules, default_rules
+
+# =========================
+# 수수료 계산 HTTP API (ASGI)
+#   python -m api [--port 8000] [--workers 4]   (uvicorn 이 있으면 사용, 없으면 내장 asyncio 서버)
+#   GET  /health
+#   GET  /metrics                          Prometheus 텍스트 (DBLIFE_METRICS=1 일 때 값이 쌓인다)
+#   GET  /products                         상품 목록 (+ 전략건강 여부)
+#   GET  /products/search?q=&limit=       상품 검색 (상품명·유형·초성)
+#   GET  /products/types?product=          유형 목록
+#   GET  /products/pay-years?product=&type=  납입년도 목록
+#   POST /commission                       {"profile": {...}, "contracts": [...], "as_of": "YYYY-MM-DD", "detail": false,
+#                                           "agent": "설계사 코드(선택)"}
+#   POST /commission/batch                 [요청, ...]
+#   상품 마스터는 워커 프로세스당 MasterRegistry 1개 (읽기 전용 스냅샷, 파일이 바뀌면 교체)
+#   동시 요청은 MicroBatcher 로 모아 batch.settle_arrays 한 번에 평가 (계산은 작업 스레드 — 이벤트 루프는 막지 않는다)
+#   계산 결과는 audit_log 에 비동기로 기록 (DBLIFE_AUDIT=0 이면 끔)
+# =========================
+MAX_BATCH = 256
+MAX_WAIT = 0.0005   # 초 — 첫 요청 이후 같은 배치로 모으는 시간
+MAX_BODY = 1 << 20
+# 요청 수 지표의 path 레이블 — 그 밖의 경로(404 등)는 "other" 하나로 모은다 (임의 URL 마다 레이블이 늘지 않도록)
+ROUTES = frozenset({"/health", "/metrics", "/products", "/products/search", "/products/types",
+                    "/products/pay-years", "/commission", "/commission/batch"})
+
+log = logging.getLogger("dblife.api")
+
+
+class BadRequest(ValueError):
+    pass
+
+
+# =========================
+# 계산 서비스 (동기, 벡터화)
+# =========================
+class CommissionService:
+    def __init__(self, master_path: str = master.MASTER_CSV_PATH, rules_path: str = RULES_PATH, watch: bool = True,
+                 audit: Optional[audit_log.AuditLog] = None):
+        self.registry = MasterRegistry(master_path)
+        self.audit = audit
+        if self.registry.current() is None:
+            raise FileNotFoundError(f"상품 마스터 파일이 없습니다: {master_path}")
+        if watch:
+            self.registry.start()
+        self.rules_path = rules_path
+        self._products = (None, [])
+
+    @property
+    def rules(self) -> Rules:
+        return default_rules(self.rules_path)
+
+    @property
+    def snapshot(self) -> MasterSnapshot:
+        return self.registry.current()
+
+    # ── 마스터 조회
+    def products(self) -> List[dict]:
+        snap = self.snapshot
+        if self._products[0] != snap.version:
+            self._products = (snap.version, [{"product": p, "strategic": p in snap.strategic} for p in sorted(snap.tree)])
+        return self._products[1]
+
+    def types(self, product: str) -> List[str]:
+        tree = self.snapshot.tree
+        if product not in tree:
+            raise KeyError(product)
+        return list(tree[product].keys())
+
+    def pay_years(self, product: str, tpe: str) -> List[str]:
+        tree = self.snapshot.tree
+        if product not in tree or tpe not in tree[product]:
+            raise KeyError(tpe)
+        return list(tree[product][tpe]["payyears"])
+
+    # ── 요청 파싱
+    def _parse(self, req: dict):
+        if not isinstance(req, dict):
+            raise BadRequest("요청은 JSON 객체여야 합니다.")
+        prof = req.get("profile") or {}
+        if not isinstance(prof, dict):
+            raise BadRequest("profile 은 JSON 객체여야 합니다.")
+        agent = {}
+        for k, v in [("year", prof.get("year")), ("month", prof.get("month"))] + \
+                [(k, prof.get(k, v)) for k, v in batch.AGENT_DEFAULTS.items()]:
+            if k == "std_activity":
+                agent[k] = v.strip().lower() in ("1", "true", "y", "yes") if isinstance(v, str) else bool(v)
+                continue
+            try:
+                agent[k] = int(v)   # 정수가 아닌 값 · NaN · None 은 여기서 거절 (배치 전체 실패 방지)
+            except (TypeError, ValueError, OverflowError):
+                raise BadRequest(f"profile.{k} 은 정수여야 합니다: {v!r}")
+        try:
+            as_of = datetime.strptime(req["as_of"], "%Y-%m-%d").date() if req.get("as_of") else date.today()
+            rows = [(str(c["product"]), str(c["type"]), str(c["pay_year"]), float(c["premium"]))
+                    for c in req.get("contracts") or []]
+        except (KeyError, TypeError, ValueError) as e:
+            raise BadRequest(f"요청 형식 오류: {e}")
+        bad = [j for j, r in enumerate(rows) if not np.isfinite(r[3]) or r[3] < 0]
+        if bad:
+            raise BadRequest(f"보험료는 0 이상의 숫자여야 합니다: contracts[{bad[0]}]")
+        return agent, as_of, rows, bool(req.get("detail")), str(req.get("agent") or "")
+
+    def compute_many(self, reqs: list) -> list:
+        # 요청별 결과 dict 또는 BadRequest — 기준일이 같은 요청끼리 한 번에 settle_arrays
+        parsed, out = {}, [None] * len(reqs)
+        for i, req in enumerate(reqs):
+            try:
+                p = self._parse(req)
+            except BadRequest as e:
+                out[i] = e
+                continue
+            parsed.setdefault(p[1], []).append((i, p))
+
+        rules, snap = self.rules, self.snapshot  # 배치 전체가 같은 스냅샷을 사용
+        for as_of, group in parsed.items():
+            try:
+                self._settle(group, as_of, rules, snap, out)
+            except Exception:
+                # 예상 못 한 실패 — 요청별로 다시 계산해 실패한 요청에만 오류를 돌려준다
+                for item in group:
+                    try:
+                        self._settle([item], as_of, rules, snap, out)
+                    except Exception as e:
+                        out[item[0]] = e
+        return out
+
+    def _settle(self, group: list, as_of: date, rules: Rules, snap: MasterSnapshot, out: list):
+        # group: [(요청 번호, 파싱 결과)] — 결과는 out[요청 번호] 에
+        agents = {k: np.array([p[0][k] for _, p in group]) for k in batch.AGENT_COLUMNS[1:]}
+        aidx = np.array([a for a, (_, p) in enumerate(group) for _ in p[2]], dtype=np.int64)
+        rows = [r for _, p in group for r in p[2]]
+        codes = np.array([snap.rate_store.code(p, t, y) for p, t, y, _ in rows], dtype=np.int64)
+        premium = np.array([r[3] for r in rows], dtype=float)
+        sh_flag = np.array([r[0] in snap.strategic for r in rows], dtype=bool)
+        per_contract, per_agent = batch.settle_arrays(
+            aidx, snap.rate_store.rates_for(codes).reshape(-1, 3), premium, sh_flag, agents, as_of, rules)
+
+        per_agent = {k: np.asarray(v).tolist() for k, v in per_agent.items()}
+        per_contract = {k: np.asarray(v).tolist() for k, v in per_contract.items()}
+        codes = codes.tolist()
+        starts = np.concatenate([[0], np.cumsum([len(p[2]) for _, p in group])]).tolist()
+        done = []
+        for a, (i, (agent, _, rows_i, detail, code)) in enumerate(group):
+            lo, hi = starts[a], starts[a + 1]
+            res = {"rules_version": rules.version, "master_version": snap.version,
+                   **{k: v[a] for k, v in per_agent.items()},
+                   "unmatched": [j - lo for j in range(lo, hi) if codes[j] == NO_CODE]}
+            if detail:
+                res["contracts"] = [
+                    {"product": r[0], "type": r[1], "pay_year": r[2], "premium": r[3], "rate_code": codes[j],
+                     **{k: v[j] for k, v in per_contract.items()}}
+                    for j, r in zip(range(lo, hi), rows_i)]
+            done.append((i, agent, rows_i, res, code))
+        # 그룹 전체가 성공한 뒤에만 결과 반영 · 이력 기록 (요청별 재계산 시 중복 기록 방지)
+        for i, agent, rows_i, res, code in done:
+            out[i] = res
+            if self.audit is not None:
+                self.audit.record(agent, rows_i, res, agent=code, calc_date=as_of, source="api")
+
+
+# =========================
+# 마이크로 배처: 같은 이벤트 루프 틱(+MAX_WAIT)에 들어온 요청을 모아 한 번에 계산
+# =========================
+class MicroBatcher:
+    def __init__(self, fn: Callable[[list], list], max_batch: int = MAX_BATCH, max_wait: float = MAX_WAIT,
+                 executor: Optional[Executor] = None):
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        # 배치 계산은 작업 스레드 1개에서 차례로 — 계산하는 동안 이벤트 루프는 다른 요청을 받고 다음 배치를 모은다
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-batch")
+        self._pending = []
+        self._timer = None
+        self._running = set()
+        self.batches = self.items = 0
+
+    def submit(self, item) -> Awaitable:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((item, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.batches += 1
+        self.items += len(pending)
+        metrics.incr("api_batch_items_total", len(pending))
+        task = asyncio.get_running_loop().create_task(self._run(pending))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run(self, pending: list):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor, self._compute, [item for item, _ in pending])
+        except Exception as e:  # 작업 스레드에 넘기지도 못한 경우 — 기다리는 요청이 멈추지 않도록
+            results = [e] * len(pending)
+        for (_, fut), r in zip(pending, results):
+            if fut.done():
+                continue
+            if isinstance(r, Exception):
+                fut.set_exception(r)
+            else:
+                fut.set_result(r)
+
+    def _compute(self, items: list) -> list:
+        # 작업 스레드에서 실행
+        try:
+            with metrics.timer("api_batch"):
+                return self.fn(items)
+        except Exception:  # 배치 실패 — 요청별로 다시 실행해 실패한 요청에만 오류 전달
+            results = []
+            for item in items:
+                try:
+                    results.append(self.fn([item])[0])
+                except Exception as e:
+                    results.append(e)
+            return results
+
+
+# =========================
+# ASGI 앱
+# =========================
+async def _read_body(receive) -> bytes:
+    body, more = b"", True
+    while more:
+        msg = await receive()
+        body += msg.get("body", b"")
+        more = msg.get("more_body", False)
+        if len(body) > MAX_BODY:
+            raise BadRequest("요청 본문이 너무 큽니다.")
+    return body
+
+
+async def _send_json(send, status: int, payload):
+    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json; charset=utf-8"),
+                            (b"content-length", str(len(data)).encode())]})
+    await send({"type": "http.response.body", "body": data})
+
+
+class CommissionAPI:
+    def __init__(self, master_path: str = master.MASTER_CSV_PATH, rules_path: str = RULES_PATH):
+        self.master_path = master_path
+        self.rules_path = rules_path
+        self.service: Optional[CommissionService] = None
+        self.batcher: Optional[MicroBatcher] = None
+
+    def startup(self):
+        if self.service is None:
+            self.service = CommissionService(self.master_path, self.rules_path, audit=audit_log.from_env())
+            self.batcher = MicroBatcher(self.service.compute_many)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                msg = await receive()
+                if msg["type"] == "lifespan.startup":
+                    self.startup()
+                    await send({"type": "lifespan.startup.complete"})
+                elif msg["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        self.startup()
+        if scope["path"] == "/metrics":
+            data = metrics.prometheus_text().encode("utf-8")
+            await send({"type": "http.response.start", "status": 200,
+                        "headers": [(b"content-type", b"text/plain; version=0.0.4; charset=utf-8"),
+                                    (b"content-length", str(len(data)).encode())]})
+            await send({"type": "http.response.body", "body": data})
+            return
+        s = metrics.start("api_request")
+        try:
+            status, payload = await self._route(scope, receive)
+        except BadRequest as e:
+            status, payload = 400, {"error": str(e)}
+        except Exception as e:  # 예상 못 한 오류도 응답은 보낸다 (연결을 그냥 닫지 않음)
+            log.exception("요청 처리 실패: %s %s", scope.get("method"), scope.get("path"))
+            status, payload = 500, {"error": f"내부 오류: {type(e).__name__}: {e}"}
+        await _send_json(send, status, payload)
+        s.stop()
+        path = scope["path"].rstrip("/") or "/"
+        metrics.incr("api_requests_total", path=path if path in ROUTES else "other", status=status)
+
+    async def _route(self, scope, receive):
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        q = {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode("utf-8")).items()}
+        svc = self.service
+
+        if method == "GET":
+            try:
+                if path == "/health":
+                    snap = svc.snapshot
+                    return 200, {"status": "ok", "rules_version": svc.rules.version, "master_version": snap.version,
+                                 "master_swaps": svc.registry.swaps, "master_error": svc.registry.last_error,
+                                 "products": len(snap.tree)}
+                if path == "/products":
+                    return 200, svc.products()
+                if path == "/products/search":
+                    try:
+                        limit = min(max(int(q.get("limit", 20)), 1), 200)
+                    except ValueError:
+                        raise BadRequest("limit 은 정수여야 합니다.")
+                    return 200, [{"product": h.product, "type": h.type}
+                                 for h in svc.snapshot.search.search(q.get("q", ""), limit)]
+                if path == "/products/types":
+                    return 200, svc.types(q.get("product", ""))
+                if path == "/products/pay-years":
+                    return 200, svc.pay_years(q.get("product", ""), q.get("type", ""))
+            except KeyError as e:
+                return 404, {"error": f"등록되지 않은 값입니다: {e.args[0]}"}
+        elif method == "POST" and path in ("/commission", "/commission/batch"):
+            try:
+                body = json.loads(await _read_body(receive) or b"null")
+            except ValueError:
+                raise BadRequest("JSON 본문을 읽을 수 없습니다.")
+            if path == "/commission":
+                return 200, await self.batcher.submit(body)
+            if not isinstance(body, list):
+                raise BadRequest("배치 요청은 JSON 배열이어야 합니다.")
+            results = await asyncio.get_running_loop().run_in_executor(self.batcher.executor, svc.compute_many, body)
+            return 200, [{"error": str(r)} if isinstance(r, Exception) else r for r in results]
+        return 404, {"error": "not found"}
+
+
+app = CommissionAPI()
+
+
+# =========================
+# 내장 HTTP/1.1 서버 (keep-alive) — uvicorn 이 없을 때
+# =========================
+async def _handle_conn(asgi, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, version = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    k, v = line.split(":", 1)
+                    headers[k.strip().lower()] = v.strip()
+            length = int(headers.get("content-length", 0))
+            if length > MAX_BODY:
+                break
+            body = await reader.readexactly(length) if length else b""
+            path, _, query = target.partition("?")
+            scope = {"type": "http", "method": method.upper(), "path": path, "query_string": query.encode(),
+                     "headers": [(k.encode(), v.encode()) for k, v in headers.items()]}
+
+            async def receive():
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            resp = {}
+
+            async def send(msg):
+                if msg["type"] == "http.response.start":
+                    resp["start"] = msg
+                else:
+                    resp["body"] = resp.get("body", b"") + msg.get("body", b"")
+
+            await asgi(scope, receive, send)
+            keep = version.upper() == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            status = resp["start"]["status"]
+            out = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}".encode()]
+            out += [k + b": " + v for k, v in resp["start"]["headers"]]
+            out.append(b"connection: " + (b"keep-alive" if keep else b"close"))
+            writer.write(b"\r\n".join(out) + b"\r\n\r\n" + resp.get("body", b""))
+            await writer.drain()
+            if not keep:
+                break
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str = "127.0.0.1", port: int = 8000, asgi: CommissionAPI = app):
+    asgi.startup()
+    server = await asyncio.start_server(lambda r, w: _handle_conn(asgi, r, w), host, port)
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m api", description="수수료 계산 HTTP API")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8000)
+    ap.add_argument("--workers", type=int, default=1, help="프로세스 수 (uvicorn 필요)")
+    args = ap.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        uvicorn = None
+    if uvicorn is not None:
+        uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
+        return 0
+    if args.workers > 1:
+        print("uvicorn 이 없어 단일 프로세스 내장 서버로 실행합니다.", file=sys.stderr)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+import dataclasses
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import date
+from typing import List, Optional, Sequence
+
+import metrics
+from engine import AgentProfile, CommissionResult, Contract
+
+# =========================
+# 계산 이력 (감사 로그, 추가 전용)
+#   SQLite(WAL) 한 파일 — 기본 data/audit.sqlite3 (DBLIFE_AUDIT_DB 로 변경, DBLIFE_AUDIT=0 이면 끔)
+#   record() 는 큐에 넣고 바로 반환 — 백그라운드 스레드가 모아서(최대 BATCH_SIZE 건) 트랜잭션 하나로 기록
+#     JSON 직렬화도 기록 스레드에서 한다 (화면 스레드는 대기하지 않음)
+#   행 = 계산 1회: 설계사 코드, 위임년월, 계산일, 마스터/규칙 버전, 주요 합계 + 입력(JSON) · 출력(JSON)
+#   UPDATE/DELETE 는 트리거로 막는다
+#   기록 실패는 그 배치만 버리고 스레드는 계속 — 스레드가 끝나면(연결 실패 등) record() 는 큐에 넣지 않고 False
+#   인덱스: (agent, calc_date) · (appt_year, appt_month) · calc_date — "설계사 X 최근 12개월"은 인덱스 범위 조회
+# =========================
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "audit.sqlite3")
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 0.2     # 초 — 첫 건 이후 같은 배치로 모으는 최대 시간
+MAX_QUEUE = 100_000
+
+log = logging.getLogger("dblife.audit")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calc_log (
+    id                  INTEGER PRIMARY KEY,
+    created_at          REAL    NOT NULL,
+    calc_date           TEXT    NOT NULL,
+    agent               TEXT    NOT NULL DEFAULT '',
+    appt_year           INTEGER NOT NULL,
+    appt_month          INTEGER NOT NULL,
+    contract_months     INTEGER,
+    source              TEXT,
+    master_version      TEXT,
+    rules_version       TEXT,
+    n_contracts         INTEGER,
+    effective_converted INTEGER,
+    settle_bonus        INTEGER,
+    next_month_total    INTEGER,
+    inputs              TEXT,
+    outputs             TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_calc_log_agent_date ON calc_log (agent, calc_date);
+CREATE INDEX IF NOT EXISTS idx_calc_log_appt ON calc_log (appt_year, appt_month);
+CREATE INDEX IF NOT EXISTS idx_calc_log_date ON calc_log (calc_date);
+CREATE TRIGGER IF NOT EXISTS calc_log_no_update BEFORE UPDATE ON calc_log
+    BEGIN SELECT RAISE(ABORT, 'calc_log is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS calc_log_no_delete BEFORE DELETE ON calc_log
+    BEGIN SELECT RAISE(ABORT, 'calc_log is append-only'); END;
+"""
+
+INSERT = """
+INSERT INTO calc_log (created_at, calc_date, agent, appt_year, appt_month, contract_months, source, master_version,
+                      rules_version, n_contracts, effective_converted, settle_bonus, next_month_total, inputs, outputs)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SUMMARY_COLUMNS = ("id", "created_at", "calc_date", "agent", "appt_year", "appt_month", "contract_months", "source",
+                   "master_version", "rules_version", "n_contracts", "effective_converted", "settle_bonus",
+                   "next_month_total")
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    return con
+
+
+def _plain(v):
+    # numpy 스칼라/배열, 판정 기록(Decision) → JSON 기본형
+    if hasattr(v, "tolist"):
+        return v.tolist()
+    if dataclasses.is_dataclass(v):
+        return dataclasses.asdict(v)
+    return v
+
+
+PROFILE_FIELDS = tuple(f.name for f in dataclasses.fields(AgentProfile))
+RESULT_FIELDS = tuple(f.name for f in dataclasses.fields(CommissionResult) if f.name != "results")
+
+
+def _row(item) -> tuple:
+    # 큐 항목 → INSERT 값 (기록 스레드에서 실행) — numpy 값은 json default(_plain)에서 변환
+    created_at, calc_date, agent, profile, contracts, result, source = item
+    if isinstance(profile, AgentProfile):
+        profile = {k: getattr(profile, k) for k in PROFILE_FIELDS}
+    if isinstance(result, CommissionResult):
+        summary = {k: getattr(result, k) for k in RESULT_FIELDS}
+        detail = result.results.columns() if len(result.results) else None
+    else:
+        summary = {k: v for k, v in result.items() if k != "contracts"}
+        detail = result.get("contracts")
+    contracts = [[c.product, c.type, c.pay_year, c.premium] if isinstance(c, Contract) else list(c) for c in contracts]
+    inputs = {"profile": profile, "contracts": contracts}
+    outputs = {"summary": summary, "contracts": detail}
+    return (created_at, calc_date, agent, int(profile["year"]), int(profile["month"]), summary.get("contract_months"),
+            source, summary.get("master_version"), summary.get("rules_version"), len(contracts),
+            summary.get("effective_converted"), summary.get("settle_bonus"), summary.get("next_month_total"),
+            json.dumps(inputs, ensure_ascii=False, separators=(",", ":"), default=_plain),
+            json.dumps(outputs, ensure_ascii=False, separators=(",", ":"), default=_plain))
+
+
+def months_back(today: date, months: int) -> date:
+    # today 가 속한 달을 포함해 months 개월 전 달의 1일
+    k = today.year * 12 + today.month - 1 - (months - 1)
+    return date(k // 12, k % 12 + 1, 1)
+
+
+class AuditLog:
+    def __init__(self, path: str = DB_PATH, batch_size: int = BATCH_SIZE, flush_interval: float = FLUSH_INTERVAL,
+                 max_queue: int = MAX_QUEUE):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = self.dropped = self.batches = 0
+        self.last_error: Optional[str] = None
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        with _connect(path) as con:
+            con.executescript(SCHEMA)
+        con.close()
+        self._queue: "queue.Queue" = queue.Queue(max_queue)
+        self._pending = 0
+        self._alive = True       # 기록 스레드가 항목을 받을 수 있는지 (_done 잠금 안에서만 바꾼다)
+        self._done = threading.Condition()
+        self._local = threading.local()
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+    # ── 기록 (논블로킹)
+    def record(self, profile, contracts: Sequence, result, agent: str = "", calc_date: Optional[date] = None,
+               source: str = "demo") -> bool:
+        # profile: AgentProfile 또는 dict, contracts: Contract 또는 (상품명, 유형, 납기, 보험료)
+        # result: CommissionResult 또는 API 응답 dict — 큐가 가득 차면 버리고 False
+        item = (time.time(), (calc_date or date.today()).isoformat(), agent or "", profile, list(contracts),
+                result, source)
+        with self._done:
+            if not self._alive:
+                self.dropped += 1
+                metrics.incr("audit_dropped_total")
+                return False
+            self._pending += 1
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._done:
+                self._pending -= 1
+                self._done.notify_all()
+            self.dropped += 1
+            metrics.incr("audit_dropped_total")
+            return False
+        return True
+
+    def _run(self):
+        con = None
+        try:
+            con = _connect(self.path)
+            while True:
+                items = [self._queue.get()]
+                if items[0] is None:
+                    break
+                deadline = time.monotonic() + self.flush_interval
+                while len(items) < self.batch_size:
+                    try:
+                        items.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                    except queue.Empty:
+                        break
+                stop = items[-1] is None
+                items = [x for x in items if x is not None]
+                self._write(con, items)
+                if stop:
+                    break
+        except Exception as e:
+            self.last_error = f"기록 스레드 종료 — {type(e).__name__}: {e}"
+            log.exception("audit log writer stopped")
+        finally:
+            self._stop()
+            if con is not None:
+                con.close()
+
+    def _stop(self):
+        # 기록 스레드 종료 — 이후 record() 는 버리고, 큐에 남은 항목도 버린 것으로 센다 (flush 대기 해제)
+        with self._done:
+            self._alive = False
+            n = self._pending
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if n:
+                self.dropped += n
+                metrics.incr("audit_dropped_total", n)
+            self._pending = 0
+            self._done.notify_all()
+
+    def _write(self, con: sqlite3.Connection, items: list):
+        try:
+            with metrics.timer("audit_write"):
+                rows = [_row(x) for x in items]
+                with con:
+                    con.executemany(INSERT, rows)
+            self.written += len(rows)
+            self.batches += 1
+            metrics.incr("audit_writes_total", len(rows))
+        except Exception as e:
+            # 이 배치만 버리고 계속 기록한다
+            self.last_error = f"{type(e).__name__}: {e}"
+            log.exception("audit log write failed (%d records dropped)", len(items))
+            self.dropped += len(items)
+            metrics.incr("audit_dropped_total", len(items))
+        finally:
+            metrics.gauge("audit_queue_depth", self._queue.qsize())
+            with self._done:
+                self._pending -= len(items)
+                self._done.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        # 지금까지 record() 한 항목이 모두 기록될 때까지 대기
+        with self._done:
+            return self._done.wait_for(lambda: self._pending <= 0, timeout)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {"path": self.path, "written": self.written, "dropped": self.dropped, "batches": self.batches,
+                "queued": self._queue.qsize(), "writer_alive": self._alive and self._thread.is_alive(),
+                "last_error": self.last_error}
+
+    # ── 조회 (스레드별 읽기 연결 — WAL 이라 기록과 동시에 읽기 가능)
+    def _reader(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = _connect(self.path)
+            con.row_factory = sqlite3.Row
+        return con
+
+    def history(self, agent: str, months: int = 12, today: Optional[date] = None, limit: int = 1000) -> List[dict]:
+        # 설계사 X 의 최근 months 개월(이번 달 포함) 계산 이력 — 최신순, 입력/출력 JSON 제외
+        today = today or date.today()
+        cur = self._reader().execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM calc_log WHERE agent = ? AND calc_date BETWEEN ? AND ? "
+            "ORDER BY calc_date DESC, id DESC LIMIT ?",
+            (agent, months_back(today, months).isoformat(), today.isoformat(), limit))
+        return [dict(r) for r in cur]
+
+    def monthly(self, agent: str, months: int = 12, today: Optional[date] = None) -> List[dict]:
+        # 월별 추이: 계산 횟수, 익월 합계 평균/최대, 그 달 마지막(가장 나중에 기록된) 계산의 익월 합계
+        today = today or date.today()
+        cur = self._reader().execute(
+            """SELECT g.month, g.calcs, g.avg_next_month_total, g.max_next_month_total,
+                      c.next_month_total AS last_next_month_total
+               FROM (SELECT substr(calc_date, 1, 7) AS month, COUNT(*) AS calcs,
+                            AVG(next_month_total) AS avg_next_month_total,
+                            MAX(next_month_total) AS max_next_month_total, MAX(id) AS last_id
+                     FROM calc_log WHERE agent = ? AND calc_date BETWEEN ? AND ? GROUP BY month) g
+               JOIN calc_log c ON c.id = g.last_id
+               ORDER BY g.month""", (agent, months_back(today, months).isoformat(), today.isoformat()))
+        return [dict(r) for r in cur]
+
+    def by_appointment(self, year: int, month: int, limit: int = 1000) -> List[dict]:
+        # 같은 위임년월 설계사들의 계산 이력 — 최신순
+        cur = self._reader().execute(
+            f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM calc_log WHERE appt_year = ? AND appt_month = ? "
+            "ORDER BY calc_date DESC, id DESC LIMIT ?", (year, month, limit))
+        return [dict(r) for r in cur]
+
+    def get(self, record_id: int) -> Optional[dict]:
+        # 한 건 전체 (입력/출력 JSON 포함)
+        r = self._reader().execute("SELECT * FROM calc_log WHERE id = ?", (record_id,)).fetchone()
+        if r is None:
+            return None
+        out = dict(r)
+        out["inputs"], out["outputs"] = json.loads(out["inputs"]), json.loads(out["outputs"])
+        return out
+
+
+def from_env() -> Optional[AuditLog]:
+    # DBLIFE_AUDIT=0 이면 None
+    if os.environ.get("DBLIFE_AUDIT", "1") in ("0", "false", "no", ""):
+        return None
+    return AuditLog(os.environ.get("DBLIFE_AUDIT_DB") or DB_PATH)
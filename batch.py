@@ -0,0 +1,208 @@
+from dataclasses import fields
+from datetime import date
+from typing import Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import engine
+import master
+import money
+from rate_store import RateStore
+from tiers import Rules, default_rules
+
+# =========================
+# 월말 일괄 정산 (설계사 × 계약 벡터 연산)
+# =========================
+CONTRACT_COLUMNS = ["agent", "product", "type", "pay_year", "premium"]
+AGENT_COLUMNS = ["agent"] + [f.name for f in fields(engine.AgentProfile)]
+AGENT_DEFAULTS = {f.name: f.default for f in fields(engine.AgentProfile) if f.name not in ("year", "month")}
+
+
+# =========================
+# 유지율 규칙 (배열 버전) — 구간값 규칙은 tiers.Rules 의 lookup_array 사용
+# =========================
+def std_retention_vec(months: np.ndarray) -> np.ndarray:
+    # None(기준 없음)은 NaN
+    return np.select([months <= 2, months <= 6, months <= 12], [np.nan, 93, 90], 85).astype(float)
+
+
+def retention_factor_vec(user_rate: np.ndarray, standard_rate: np.ndarray) -> np.ndarray:
+    delta = user_rate - standard_rate
+    f = np.select([delta >= 0, delta > -5], [1.00, 0.85], 0.70)
+    return np.where(np.isnan(standard_rate), 1.0, f)
+
+
+# =========================
+# 미산출 이유 (배열 버전) — 조건 코드/문구는 engine.REASONS
+# =========================
+def reasons_vec(rule: str, checks: Mapping[str, np.ndarray]) -> np.ndarray:
+    # 미충족 조건 마스크(engine.REASONS 코드별) → 설계사별 이유 문구 — 조합 수(2^k)만큼만 문자열을 만든다
+    codes = list(engine.REASONS[rule])
+    bits = sum(np.asarray(checks[c], dtype=np.int64) << k for k, c in enumerate(codes))
+    table = np.array([engine.reason_text(rule, [c for k, c in enumerate(codes) if b >> k & 1])
+                      for b in range(1 << len(codes))], dtype=object)
+    return table[bits]
+
+
+# =========================
+# 일괄 정산
+# =========================
+def agent_frame(agents: pd.DataFrame) -> pd.DataFrame:
+    # 빠진 AgentProfile 필드(컬럼 없음 · 빈 칸)는 기본값으로 채워 AGENT_COLUMNS 순서로
+    #   빈 칸(NaN)을 그대로 두면 money.won 에서 INT64_MIN 이 되어 합계가 조용히 틀어진다
+    #   위임년월(year, month)은 기본값이 없으므로 빈 칸이면 해당 agent 를 밝혀 거절
+    agents = agents.assign(**{k: agents[k].fillna(v).infer_objects() if k in agents else v
+                              for k, v in AGENT_DEFAULTS.items()})
+    missing = agents[["year", "month"]].isna().any(axis=1)
+    if missing.any():
+        raise ValueError(f"위임년월(year, month)이 비어 있는 agent 가 있습니다: {agents.loc[missing, 'agent'][:5].tolist()}")
+    return agents[AGENT_COLUMNS].reset_index(drop=True)
+
+
+def settle_batch(contracts: pd.DataFrame, agents: pd.DataFrame, master_df: pd.DataFrame,
+                 as_of: Optional[date] = None, rules: Optional[Rules] = None,
+                 rate_store: Optional[RateStore] = None, master_version: str = "") -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # 반환: (계약별 수수료, 설계사별 합계)
+    as_of = as_of or date.today()
+    rules = rules or default_rules()
+
+    agents = agent_frame(agents)
+    agent_index = pd.Index(agents["agent"])
+    if not agent_index.is_unique:
+        raise ValueError("설계사 입력에 중복된 agent 가 있습니다.")
+
+    c = contracts[CONTRACT_COLUMNS].reset_index(drop=True)
+    aidx = agent_index.get_indexer(c["agent"])
+    if (aidx < 0).any():
+        unknown = c.loc[aidx < 0, "agent"].unique()
+        raise ValueError(f"설계사 입력에 없는 agent 의 계약이 있습니다: {list(unknown[:5])}")
+
+    # 요율 조인: 문자열 → rate_code → 행렬 인덱싱 (미등록 조합은 0%)
+    store = rate_store or RateStore.from_master_df(master_df)
+    codes = store.codes(c["product"], c["type"], c["pay_year"])
+    sh_flag = c["product"].isin(master.strategic_products(master_df)).to_numpy()
+    per_contract, per_agent = settle_arrays(aidx, store.rates_for(codes), c["premium"].to_numpy(float), sh_flag,
+                                            {k: agents[k].to_numpy() for k in AGENT_COLUMNS[1:]}, as_of, rules)
+
+    out = c[CONTRACT_COLUMNS].copy()
+    out["rate_code"] = codes
+    out = pd.concat([out, pd.DataFrame(per_contract)], axis=1)
+    summary = pd.DataFrame({"agent": agents["agent"], "rules_version": rules.version,
+                            "master_version": master_version, **per_agent})
+    return out, summary
+
+
+def settle_arrays(aidx: np.ndarray, rates: np.ndarray, premium: np.ndarray, sh_flag: np.ndarray,
+                  agents: Mapping[str, np.ndarray], as_of: date, rules: Rules) -> Tuple[dict, dict]:
+    # 배열 단위 정산 핵심 — aidx: 계약 → 설계사 행, rates: (C, 3) 성적률, agents: AgentProfile 필드별 배열
+    # 반환: (계약별 컬럼 dict, 설계사별 컬럼 dict) — 금액은 int64 정수 원 (절사 규칙은 money.py)
+    premium = money.won(premium)
+    y1, y2, y3 = (money.converted(premium, r) for r in money.pct_bp(rates).T)
+
+    sh_cnt = np.where(sh_flag, rules.strategic_count.lookup_array(premium), 0.0)
+
+    # ── 설계사 단위 집계
+    n = len(agents["year"])
+    months = (as_of.year - np.asarray(agents["year"])) * 12 + (as_of.month - np.asarray(agents["month"])) + 1
+    std_activity = np.asarray(agents["std_activity"]).astype(bool)
+    ret1 = np.asarray(agents["retention_1st"], dtype=float)
+    dr = np.asarray(agents["direct_recruits"])
+
+    total_converted_raw = money.sum_by(aidx, y1, n)
+    effective_converted = np.maximum(0, total_converted_raw - money.won(agents["refund_p"]))
+    base_rate = rules.performance_rate.lookup_array(months, effective_converted)
+
+    init2_checks = {
+        "std_activity": ~std_activity,
+        "tenure": months > 12,
+        "min_converted": effective_converted < engine.INIT2_MIN_CONVERTED,
+    }
+    eligible_init2 = ~np.logical_or.reduce(list(init2_checks.values()))
+    # engine.agent_terms 와 같은 규칙 — 최대 지급률 설명은 미대상일 때만
+    init2_checks["max_rate"] = (~eligible_init2 & (months <= 12) & (effective_converted >= engine.INIT2_MIN_CONVERTED)
+                                & (base_rate >= rules.init2_max_rate))
+    delta_R = np.where(eligible_init2, np.maximum(0.0, rules.init2_max_rate - base_rate), 0.0)
+
+    std_now = std_retention_vec(months)
+    f1 = retention_factor_vec(ret1, std_now)
+    f13 = retention_factor_vec(np.asarray(agents["retention_13th"], dtype=float), np.full(n, float(engine.std_retention(13))))
+    f25 = retention_factor_vec(np.asarray(agents["retention_25th"], dtype=float), np.full(n, float(engine.std_retention(25))))
+
+    total_sh_count = np.bincount(aidx, weights=sh_cnt, minlength=n)
+    sh_unit = rules.per_unit_bonus.lookup_array(total_sh_count)
+    dr_bonus = rules.direct_recruit_bonus.lookup_array(dr)
+    # 지급률 (bp × bp) — engine.fee_rates_bp2 와 같은 반올림
+    base_bp, delta_bp = money.bp(base_rate), money.bp(delta_R)
+    f1_bp, f13_bp, f25_bp = money.bp(f1), money.bp(f13), money.bp(f25)
+    perf1_bp2 = base_bp * f1_bp + np.where(base_bp > 0, money.bp(dr_bonus) * money.BP, 0)
+
+    # ── 계약 단위 (설계사 값을 계약 행으로 브로드캐스트)
+    out = {
+        "recruit_fee": y1,
+        "perf1": money.apply_bp2(y1, perf1_bp2[aidx]),
+        "perf2": money.apply_bp2(y2, (base_bp * f13_bp)[aidx]),
+        "perf3": money.apply_bp2(y3, (base_bp * f25_bp)[aidx]),
+        "init2_1": money.apply_bp2(y1, (delta_bp * f1_bp)[aidx]),
+        "init2_2": money.apply_bp2(y2, (delta_bp * f13_bp)[aidx]),
+        "init2_3": money.apply_bp2(y3, (delta_bp * f25_bp)[aidx]),
+        "retention1_amt": y2 // 12,
+        "retention2_amt": y3 // 12,
+        "converted2": y2,
+        "converted3": y3,
+        "sh_count": sh_cnt,
+        "sh_bonus": money.apply_bp(money.won(sh_unit)[aidx], money.bp(sh_cnt)),
+        "strategic": sh_flag,
+    }
+
+    sum_recruit = total_converted_raw
+    sum_perf1 = money.sum_by(aidx, out["perf1"], n)
+    sum_init2_1 = money.sum_by(aidx, out["init2_1"], n)
+    sum_sh_bonus = money.sum_by(aidx, out["sh_bonus"], n)
+
+    base_guarantee = rules.guarantee_base.lookup_array(effective_converted)
+    add_guarantee = rules.direct_recruit_guarantee.lookup_array(dr)
+    final_guarantee = money.won(base_guarantee + add_guarantee)
+
+    cond_ret = np.isnan(std_now) | (ret1 >= std_now)
+    settle_checks = {
+        "tenure": months > 12,
+        "min_converted": final_guarantee <= 0,
+        "std_activity": ~std_activity,
+        "retention": ~cond_ret,
+    }
+    eligible_settle = ~np.logical_or.reduce(list(settle_checks.values()))
+
+    base_comp = sum_recruit + sum_perf1 + sum_init2_1
+    base_comp_after_refund = np.maximum(0, base_comp - money.won(agents["refund_amt"]))
+    settle_bonus = np.where(eligible_settle, np.maximum(0, final_guarantee - base_comp_after_refund), 0)
+
+    summary = {
+        "contract_months": months,
+        "total_converted_raw": total_converted_raw,
+        "effective_converted": effective_converted,
+        "base_rate": base_rate,
+        "performance_tier": rules.performance_rate.tier_array(effective_converted),
+        "f1": f1, "f13": f13, "f25": f25,
+        "dr_bonus": dr_bonus,
+        "eligible_init2": eligible_init2,
+        "delta_R": delta_R,
+        "total_sh_count": total_sh_count,
+        "sh_unit": sh_unit,
+        "base_guarantee": base_guarantee,
+        "add_guarantee": add_guarantee,
+        "guarantee_tier": rules.guarantee_base.tier_array(effective_converted),
+        "final_guarantee": final_guarantee,
+        "eligible_settle": eligible_settle,
+        "settle_reasons": reasons_vec("settle", settle_checks),
+        "init2_reasons": reasons_vec("init2", init2_checks),
+        "sum_recruit": sum_recruit,
+        "sum_perf1": sum_perf1,
+        "sum_init2_1": sum_init2_1,
+        "sum_sh_bonus": sum_sh_bonus,
+        "base_comp": base_comp,
+        "settle_bonus": settle_bonus,
+        "next_month_total": sum_recruit + sum_perf1 + sum_init2_1 + sum_sh_bonus
+                            + np.where(months <= 12, settle_bonus, 0),
+    }
+    return out, summary
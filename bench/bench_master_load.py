@@ -0,0 +1,42 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import master  # noqa: E402
+from bench.synth import write_master_csv  # noqa: E402
+
+# =========================
+# 마스터 로드 벤치마크: python -m bench.bench_master_load [--rows 100000]
+# =========================
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="load_products_tree_from_csv 소요 시간 측정")
+    ap.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--budget", type=float, default=1.0, help="최대 행수 기준 허용 시간(초)")
+    args = ap.parse_args(argv)
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = write_master_csv(os.path.join(tmp, f"master_{rows}.csv"), rows)
+            best = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                tree, df, strategic = master.load_products_tree_from_csv(path)
+                best = min(best, time.perf_counter() - t0)
+            leaves = sum(len(v) for v in tree.values())
+            print(f"rows={rows:>7,}  products={len(tree):>6,}  leaves={leaves:>7,}  best={best * 1000:8.1f} ms")
+            if rows == max(args.rows) and best > args.budget:
+                print(f"  !! {rows:,}행 로드가 {args.budget:.1f}초를 초과했습니다")
+                ok = False
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
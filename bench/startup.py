@@ -0,0 +1,75 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import List
+
+# =========================
+# 콜드 스타트 측정 (Streamlit 서버 없이)
+#   python -m bench.startup [--runs 5] [--out result.json]
+#   매번 새 파이썬 프로세스에서 AppTest 로 demo.py 를 처음 실행하고 startup.timings() 를 받는다
+#     header       머리글(로고) 출력까지
+#     first_paint  기본 정보 입력란까지 (pandas/마스터 없이 그리는 구간)
+#     imports_ready · master_ready  prewarm 스레드의 무거운 import · 마스터 로드 완료
+#     interactive  첫 실행 완료 (콜드 스타트 TTI)
+#   prewarm 켬 / 끔(DBLIFE_PREWARM=0, 같은 스레드에서 순서대로) 각각 runs 회 → 중앙값
+#   시각은 모두 첫 실행 시작(startup 모듈 import) 기준 초 — streamlit 자체 import 시간은 streamlit_import 로 따로 표시
+# =========================
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ("header", "first_paint", "imports_ready", "master_ready", "interactive")
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+import startup
+print(json.dumps({"streamlit_import": t1 - t0, "exceptions": [e.value for e in at.exception], **startup.timings()}))
+"""
+
+
+def cold_run(prewarm: bool) -> dict:
+    env = dict(os.environ, DBLIFE_PREWARM="1" if prewarm else "0", DBLIFE_AUDIT="0")
+    env.pop("DBLIFE_METRICS", None)
+    out = subprocess.run([sys.executable, "-c", CHILD, os.path.join(ROOT, "demo.py")], cwd=ROOT, env=env,
+                         capture_output=True, text=True, timeout=600)
+    if out.returncode != 0:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "실행 실패")
+    r = json.loads(out.stdout.strip().splitlines()[-1])
+    if r["exceptions"]:
+        raise RuntimeError(f"demo.py 예외: {r['exceptions'][0]}")
+    return r
+
+
+def summarize(runs: List[dict]) -> dict:
+    keys = ("streamlit_import",) + STAGES
+    return {k: statistics.median(r[k] for r in runs) for k in keys if all(k in r for r in runs)}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench.startup", description="demo.py 콜드 스타트 측정")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--out", default=None, help="결과 JSON 경로")
+    args = ap.parse_args(argv)
+
+    result = {}
+    for prewarm in (True, False):
+        label = "prewarm" if prewarm else "sequential"
+        runs = [cold_run(prewarm) for _ in range(args.runs)]
+        result[label] = {"median_s": summarize(runs), "runs": runs}
+        med = result[label]["median_s"]
+        print(f"{label:<11} " + "  ".join(f"{k}={med[k] * 1000:,.0f}ms" for k in med), flush=True)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
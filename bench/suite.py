@@ -0,0 +1,350 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timezone
+from typing import Callable, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import audit_log  # noqa: E402
+import batch  # noqa: E402
+import engine  # noqa: E402
+import master  # noqa: E402
+import rollup  # noqa: E402
+from bench.synth import synthetic_portfolio, write_master_csv  # noqa: E402
+from engine import AgentProfile, Contract  # noqa: E402
+from rate_store import RateStore  # noqa: E402
+from tiers import default_rules  # noqa: E402
+
+# =========================
+# 벤치마크 모음 (Streamlit 없이 실행)
+#   python -m bench.suite [--quick] [--out result.json] [--compare 이전결과.json]
+#   그룹: master_load · get_rates · tiers · commission(engine 1인 / batch 전체) · audit_log(이력 기록/조회)
+#         rollup(조직 집계 큐브 생성 / 설계사 1명 증분 반영 / 필터 조회)
+#   케이스마다 best/median 시간, 처리량(ops/s), tracemalloc 최대 메모리를 JSON 으로 저장
+#   --compare 를 주면 같은 케이스끼리 best 시간 비율을 출력 (--threshold 초과 → 느려짐, 종료코드 1)
+# =========================
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+MASTER_ROWS = (1_000, 10_000, 100_000)
+PORTFOLIOS = (10, 100, 1_000, 10_000, 100_000)
+LOOKUPS = 100_000
+TIER_CALLS = 100_000
+AUDIT_WRITES = 20_000
+AUDIT_AGENTS = 500
+ROLLUP_BRANCHES = 40
+SLOWER = 1.10
+AS_OF = date(2025, 6, 30)
+
+
+def measure(fn: Callable[[], object], repeat: int, min_time: float = 0.05) -> dict:
+    # 1회가 min_time 보다 짧으면 여러 번 묶어서 재고 1회 시간으로 환산
+    fn()
+    t0 = time.perf_counter()
+    fn()
+    once = time.perf_counter() - t0
+    number = max(1, int(min_time / once)) if once > 0 else 1000
+
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - t0) / number)
+
+    # 메모리는 별도 1회 (tracemalloc 이 시간 측정을 왜곡하지 않도록)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"best_s": min(times), "median_s": statistics.median(times), "repeat": repeat, "number": number,
+            "peak_bytes": peak}
+
+
+class Suite:
+    def __init__(self, repeat: int, only: Optional[List[str]] = None):
+        self.repeat = repeat
+        self.only = only
+        self.cases: List[dict] = []
+
+    def wants(self, group: str) -> bool:
+        return not self.only or group in self.only
+
+    def case(self, group: str, name: str, size: int, ops: int, fn: Callable[[], object], **extra):
+        r = measure(fn, self.repeat)
+        r = {"group": group, "name": name, "size": size, "ops": ops, **r,
+             "ops_per_s": ops / r["best_s"] if r["best_s"] > 0 else None, **extra}
+        self.cases.append(r)
+        print(f"{group:<12} {name:<30} size={size:>7,}  best={_ms(r['best_s'])}  "
+              f"{r['ops_per_s']:>14,.0f} ops/s  peak={r['peak_bytes'] / 2**20:8.2f} MiB", flush=True)
+        return r
+
+
+def _ms(s: float) -> str:
+    return f"{s * 1000:10.3f} ms"
+
+
+# =========================
+# 벤치마크 그룹
+# =========================
+def bench_master_load(suite: Suite, tmp: str, rows_list) -> dict:
+    # 반환: 행수 → (tree, df, strategic) — 이후 그룹에서 재사용
+    loaded = {}
+    for rows in rows_list:
+        path = write_master_csv(os.path.join(tmp, f"master_{rows}.csv"), rows)
+        suite.case("master_load", "load_products_tree_from_csv", rows, rows,
+                   lambda: master.load_products_tree_from_csv(path))
+        tree, df, strategic = master.load_products_tree_from_csv(path)
+        suite.case("master_load", "RateStore.from_master_df", rows, rows, lambda: RateStore.from_master_df(df))
+        loaded[rows] = tree, df, strategic
+    return loaded
+
+
+def bench_get_rates(suite: Suite, tree: dict, store: RateStore, rows: int, n: int):
+    contracts, _ = synthetic_portfolio(store, n, as_of=AS_OF, seed=1)
+    keys = list(zip(contracts["product"], contracts["type"], contracts["pay_year"]))
+    codes = store.codes(contracts["product"], contracts["type"], contracts["pay_year"])
+    code_list = codes.tolist()
+
+    def tree_lookup():
+        for p, t, y in keys:
+            engine.get_rates(tree, p, t, y)
+
+    def store_lookup():
+        code = store.code
+        for p, t, y in keys:
+            store.get_rates(code(p, t, y))
+
+    def store_by_code():
+        get = store.get_rates
+        for c in code_list:
+            get(c)
+
+    kw = {"master_rows": rows, "miss_rate": float((codes < 0).mean())}
+    suite.case("get_rates", "engine.get_rates(tree)", n, n, tree_lookup, **kw)
+    suite.case("get_rates", "RateStore.code+get_rates", n, n, store_lookup, **kw)
+    suite.case("get_rates", "RateStore.get_rates(code)", n, n, store_by_code, **kw)
+    suite.case("get_rates", "RateStore.codes+rates_for", n, n,
+               lambda: store.rates_for(store.codes(contracts["product"], contracts["type"], contracts["pay_year"])),
+               **kw)
+
+
+def bench_tiers(suite: Suite, n: int):
+    rules = default_rules()
+    rng = np.random.default_rng(2)
+    months = rng.integers(1, 49, n)
+    eff = rng.integers(0, 5_000_000, n).astype(float)
+    prem = rng.integers(0, 300_000, n)
+    recruits = rng.integers(0, 6, n)
+    m_l, e_l, p_l, r_l = months.tolist(), eff.tolist(), prem.tolist(), recruits.tolist()
+
+    scalar = {
+        "performance_rate_by_months": lambda: [engine.performance_rate_by_months(m, e, rules) for m, e in zip(m_l, e_l)],
+        "strategic_count": lambda: [engine.strategic_count(p, rules) for p in p_l],
+        "per_unit_bonus": lambda: [engine.per_unit_bonus(p / 10_000, rules) for p in p_l],
+        "direct_recruit_bonus": lambda: [engine.direct_recruit_bonus(r, rules) for r in r_l],
+        "guarantee_amount_base": lambda: [engine.guarantee_amount_base(e, rules) for e in e_l],
+        "direct_recruit_guarantee": lambda: [engine.direct_recruit_guarantee(r, rules) for r in r_l],
+    }
+    for name, fn in scalar.items():
+        suite.case("tiers", name, n, n, fn)
+
+    vector = {
+        "performance_rate.lookup_array": lambda: rules.performance_rate.lookup_array(months, eff),
+        "strategic_count.lookup_array": lambda: rules.strategic_count.lookup_array(prem),
+        "guarantee_base.lookup_array": lambda: rules.guarantee_base.lookup_array(eff),
+    }
+    for name, fn in vector.items():
+        suite.case("tiers", name, n, n, fn)
+
+
+def bench_commission(suite: Suite, tree: dict, df: pd.DataFrame, strategic: set, store: RateStore, rows: int,
+                     sizes, engine_max: int):
+    rules = default_rules()
+    for n in sizes:
+        contracts, agents = synthetic_portfolio(store, n, as_of=AS_OF, seed=3)
+        kw = {"master_rows": rows, "agents": len(agents)}
+
+        # 설계사 1명이 n건 — demo 의 "계산하기" 경로
+        if n <= engine_max:
+            a = agents.iloc[0]
+            profile = AgentProfile(int(a["year"]), int(a["month"]), bool(a["std_activity"]), int(a["retention_1st"]),
+                                   int(a["retention_13th"]), int(a["retention_25th"]), int(a["refund_p"]),
+                                   int(a["refund_amt"]), int(a["direct_recruits"]))
+            cs = [Contract(p, t, y, int(m)) for p, t, y, m in
+                  zip(contracts["product"], contracts["type"], contracts["pay_year"], contracts["premium"])]
+            coded = [Contract(c.product, c.type, c.pay_year, c.premium, store.code(c.product, c.type, c.pay_year))
+                     for c in cs]
+            suite.case("commission", "compute_commission(tree)", n, n,
+                       lambda: engine.compute_commission(profile, cs, tree, strategic, AS_OF, rules), master_rows=rows)
+            suite.case("commission", "compute_commission(store)", n, n,
+                       lambda: engine.compute_commission(profile, coded, tree, strategic, AS_OF, rules, store),
+                       master_rows=rows)
+
+        # 설계사 n/20명 일괄 정산 — month_end 경로
+        suite.case("commission", "settle_batch", n, n,
+                   lambda: batch.settle_batch(contracts, agents, df, AS_OF, rules, store), **kw)
+
+
+def bench_audit_log(suite: Suite, tmp: str, tree: dict, strategic: set, store: RateStore, n: int):
+    # 기록: record() n건 + flush (백그라운드 배치 기록 포함) / 조회: 설계사 1명 최근 12개월
+    contracts, agents = synthetic_portfolio(store, 10, as_of=AS_OF, seed=4)
+    a = agents.iloc[0]
+    profile = AgentProfile(int(a["year"]), int(a["month"]), bool(a["std_activity"]), int(a["retention_1st"]))
+    cs = [Contract(p, t, y, int(m)) for p, t, y, m in
+          zip(contracts["product"], contracts["type"], contracts["pay_year"], contracts["premium"])]
+    res = engine.compute_commission(profile, cs, tree, strategic, AS_OF)
+    log = audit_log.AuditLog(os.path.join(tmp, "audit.sqlite3"))
+    days = [date(AS_OF.year - 1 + (i % 24 + AS_OF.month - 1) // 12, (i % 24 + AS_OF.month - 1) % 12 + 1, 1 + i % 28)
+            for i in range(n)]
+
+    def write():
+        for i in range(n):
+            log.record(profile, cs, res, agent=f"A{i % AUDIT_AGENTS:05d}", calc_date=days[i])
+        log.flush()
+
+    kw = {"contracts_per_record": len(cs)}
+    suite.case("audit_log", "record+flush", n, n, write, **kw)
+    suite.case("audit_log", "history(12 months)", log.written, 1,
+               lambda: log.history("A00007", 12, AS_OF), agents=AUDIT_AGENTS)
+    suite.case("audit_log", "monthly(12 months)", log.written, 1,
+               lambda: log.monthly("A00007", 12, AS_OF), agents=AUDIT_AGENTS)
+    log.close()
+
+
+def bench_rollup(suite: Suite, strategic: set, store: RateStore, rows: int, sizes):
+    # 계약 n건 · 설계사 n/20명을 ROLLUP_BRANCHES 개 지점에 배정
+    for n in sizes:
+        contracts, agents = synthetic_portfolio(store, n, as_of=AS_OF, seed=5)
+        agents["branch"] = [f"B{i % ROLLUP_BRANCHES:02d}" for i in range(len(agents))]
+        kw = {"master_rows": rows, "agents": len(agents)}
+        suite.case("rollup", "Rollup.build", n, n,
+                   lambda: rollup.Rollup.build(contracts, agents, store, strategic, AS_OF), **kw)
+
+        r = rollup.Rollup.build(contracts, agents, store, strategic, AS_OF)
+        agent = int(agents["agent"].iloc[len(agents) // 2])
+        mine = contracts[contracts["agent"] == agent].drop(columns="agent")
+        flip = iter(range(10**9))
+        suite.case("rollup", "update_agent", n, 1,
+                   lambda: r.update_agent(agent, {"retention_1st": 80 + next(flip) % 21}, mine), **kw)
+        some = [f"B{i:02d}" for i in range(0, ROLLUP_BRANCHES, 4)]
+        suite.case("rollup", "by_group(branch×tenure)", n, 1,
+                   lambda: r.by_group(("branch", "tenure_band"), bands=rollup.TENURE_LABELS[:3]), **kw)
+        suite.case("rollup", "by_product(filtered)", n, 1, lambda: r.by_product(("product",), branches=some), **kw)
+        suite.case("rollup", "agents(drill-down)", n, 1, lambda: r.agents(branches=some[:1]), **kw)
+
+
+# =========================
+# 실행 · 저장 · 비교
+# =========================
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(RESULTS_DIR), timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run(quick: bool = False, repeat: int = 5, only: Optional[List[str]] = None) -> dict:
+    rows_list = MASTER_ROWS[:2] if quick else MASTER_ROWS
+    sizes = PORTFOLIOS[:4] if quick else PORTFOLIOS
+    lookups = LOOKUPS // 10 if quick else LOOKUPS
+    suite = Suite(repeat, only)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        loaded = {}
+        if suite.wants("master_load"):
+            loaded = bench_master_load(suite, tmp, rows_list)
+        # 조회/계산 그룹은 10k행 마스터 기준
+        rows = 10_000
+        if rows not in loaded:
+            loaded[rows] = master.load_products_tree_from_csv(write_master_csv(os.path.join(tmp, "master.csv"), rows))
+        tree, df, strategic = loaded[rows]
+        store = RateStore.from_master_df(df)
+
+        if suite.wants("get_rates"):
+            bench_get_rates(suite, tree, store, rows, lookups)
+        if suite.wants("tiers"):
+            bench_tiers(suite, TIER_CALLS // 10 if quick else TIER_CALLS)
+        if suite.wants("commission"):
+            bench_commission(suite, tree, df, strategic, store, rows, sizes, engine_max=sizes[-1])
+        if suite.wants("rollup"):
+            bench_rollup(suite, strategic, store, rows, [n for n in sizes if n >= 1_000])
+        if suite.wants("audit_log"):
+            bench_audit_log(suite, tmp, tree, strategic, store, AUDIT_WRITES // 10 if quick else AUDIT_WRITES)
+
+    return {"env": environment(), "params": {"quick": quick, "repeat": repeat, "as_of": AS_OF.isoformat()},
+            "cases": suite.cases}
+
+
+def _case_key(c: dict) -> tuple:
+    return c["group"], c["name"], c["size"]
+
+
+def compare(current: dict, baseline: dict, threshold: float = SLOWER) -> int:
+    # 반환: 느려진 케이스 수
+    base = {_case_key(c): c for c in baseline.get("cases", [])}
+    slower = 0
+    print(f"\n기준: {baseline['env'].get('git_commit') or '-'} ({baseline['env'].get('timestamp', '')})")
+    for c in current["cases"]:
+        b = base.get(_case_key(c))
+        if b is None or not b["best_s"]:
+            continue
+        ratio = c["best_s"] / b["best_s"]
+        mark = "  !! 느려짐" if ratio > threshold else ""
+        slower += ratio > threshold
+        print(f"{c['group']:<12} {c['name']:<30} size={c['size']:>7,}  {_ms(b['best_s'])} → {_ms(c['best_s'])}  "
+              f"x{ratio:5.2f}{mark}")
+    return slower
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench.suite", description="마스터 로드 · 요율 조회 · 수수료 계산 벤치마크")
+    ap.add_argument("--quick", action="store_true", help="작은 크기만 (마스터 10k행, 포트폴리오 1k건까지)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--only", nargs="+", choices=["master_load", "get_rates", "tiers", "commission", "audit_log",
+                                                      "rollup"])
+    ap.add_argument("--out", default=None, help=f"결과 JSON 경로 (기본: {RESULTS_DIR}/<시각>-<커밋>.json)")
+    ap.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    ap.add_argument("--threshold", type=float, default=SLOWER, help="느려짐으로 볼 best 시간 비율 (기본 1.10)")
+    args = ap.parse_args(argv)
+
+    result = run(args.quick, args.repeat, args.only)
+    out = args.out
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        out = os.path.join(RESULTS_DIR, f"{stamp}-{result['env']['git_commit'] or 'nogit'}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            return 1 if compare(result, json.load(f), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
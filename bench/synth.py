@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+
+# =========================
+# 합성 데이터 (product_master.csv 스키마)
+# =========================
+MASTER_HEADER = ["상품명", "유형", "납기", "1차년 성적률", "2차년 성적률", "3차년 성적률", "전략건강여부"]
+PAY_YEARS = ["5년납", "7년납", "10년납", "12년납", "15년납", "20년납", "20년납↑", "전건"]
+TYPES = ["주보험", "100%형(해지환급금보증형)", "50%형(해지환급금보증형)", "표준형", "해약환급금 미지급형", "단계체증형"]
+
+
+def synthetic_master(rows: int, seed: int = 0) -> pd.DataFrame:
+    # 상품당 (유형 × 납기) 평균 ~8행, 일부 행은 "10년납/20년납" 처럼 복수 납기
+    rng = np.random.default_rng(seed)
+    n_products = max(1, rows // 8)
+    prod = rng.integers(0, n_products, rows)
+    names = np.array([f"(무) 합성 종신보험 {i:06d} (2501)" for i in range(n_products)], dtype=object)
+    pays = np.array(PAY_YEARS, dtype=object)[rng.integers(0, len(PAY_YEARS), rows)]
+    multi = rng.random(rows) < 0.05
+    pays[multi] = pays[multi] + "/" + np.array(PAY_YEARS, dtype=object)[rng.integers(0, len(PAY_YEARS), multi.sum())]
+    return pd.DataFrame({
+        "상품명": names[prod],
+        "유형": np.array(TYPES, dtype=object)[rng.integers(0, len(TYPES), rows)],
+        "납기": pays,
+        "1차년 성적률": rng.integers(0, 71, rows) * 5,
+        "2차년 성적률": rng.integers(0, 31, rows) * 5,
+        "3차년 성적률": rng.integers(0, 21, rows) * 5,
+        "전략건강여부": np.where(rng.random(rows) < 0.1, "Y", "N"),
+    }, columns=MASTER_HEADER)
+
+
+def write_master_csv(path: str, rows: int, seed: int = 0) -> str:
+    synthetic_master(rows, seed).to_csv(path, index=False, encoding="utf-8-sig")
+    return path
+
+
+def synthetic_portfolio(store, n_contracts: int, n_agents: int = 0, as_of=None, seed: int = 0, miss_rate: float = 0.02):
+    # 반환: (계약 DataFrame[batch.CONTRACT_COLUMNS], 설계사 DataFrame[batch.AGENT_COLUMNS])
+    #   store: RateStore — 실제 (상품명, 유형, 납기) 조합에서 뽑고 miss_rate 만큼은 미등록 납기로 바꾼다
+    rng = np.random.default_rng(seed)
+    n_agents = n_agents or max(1, n_contracts // 20)
+    codes = rng.integers(0, len(store), n_contracts)
+    products = np.asarray(store.products, dtype=object)[np.asarray(store.leaf_product)[codes]]
+    types = np.asarray(store.types, dtype=object)[np.asarray(store.leaf_type)[codes]]
+    pays = np.asarray(store.pay_years, dtype=object)[np.asarray(store.leaf_pay_year)[codes]]
+    pays[rng.random(n_contracts) < miss_rate] = "99년납"
+    contracts = pd.DataFrame({
+        "agent": rng.integers(0, n_agents, n_contracts),
+        "product": products,
+        "type": types,
+        "pay_year": pays,
+        "premium": rng.integers(3, 301, n_contracts) * 1000,
+    })
+
+    # 위임월: 기준일로부터 0~48개월 전
+    as_of = as_of or pd.Timestamp.today().date()
+    back = rng.integers(0, 49, n_agents)
+    ym = as_of.year * 12 + (as_of.month - 1) - back
+    agents = pd.DataFrame({
+        "agent": np.arange(n_agents),
+        "year": ym // 12,
+        "month": ym % 12 + 1,
+        "std_activity": rng.random(n_agents) < 0.6,
+        "retention_1st": rng.integers(80, 101, n_agents),
+        "retention_13th": rng.integers(70, 101, n_agents),
+        "retention_25th": rng.integers(60, 101, n_agents),
+        "refund_p": np.where(rng.random(n_agents) < 0.1, rng.integers(1, 50, n_agents) * 1000, 0),
+        "refund_amt": np.where(rng.random(n_agents) < 0.1, rng.integers(1, 50, n_agents) * 10000, 0),
+        "direct_recruits": rng.choice([0, 0, 0, 1, 2, 3], n_agents),
+    })
+    return contracts, agents
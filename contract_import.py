@@ -0,0 +1,119 @@
+import os
+from dataclasses import dataclass, field
+from io import BytesIO, StringIO
+from typing import Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from rate_store import RateStore
+
+# =========================
+# 계약 일괄 등록 (CSV/Excel/붙여넣기)
+#   청크 단위로 읽어 RateStore 인덱스로 검증, 정상 행과 오류 행(행 번호·사유)을 나눠 돌려준다
+# =========================
+CHUNK_ROWS = 5_000
+MAX_PREMIUM = 10_000_000_000  # 계약당 100억원 — 환산(× 성적률)이 money.py int64 한도 안에 들도록 (EntryStore 도 int64)
+IMPORT_COLUMNS = ["product", "type", "pay_year", "premium"]
+_ALIASES = {
+    "product": ["상품명", "product", "상품"],
+    "type": ["유형", "type", "상품유형"],
+    "pay_year": ["납입년도", "납기", "납입", "pay_year", "payyear", "납입년수"],
+    "premium": ["월초보험료", "월초보험료(원)", "보험료", "premium"],
+}
+
+
+@dataclass
+class ImportResult:
+    rows: List[dict] = field(default_factory=list)                 # product, type, pay_year, premium, rate_code
+    errors: List[Tuple[int, str]] = field(default_factory=list)    # (원본 행 번호, 사유)
+    total: int = 0
+
+
+def _norm(c: str) -> str:
+    k = str(c).strip().lower().replace(" ", "")
+    for std, alts in _ALIASES.items():
+        if k in [a.lower().replace(" ", "") for a in alts]:
+            return std
+    return c
+
+
+def _decode(data: bytes) -> str:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp949")
+
+
+def iter_chunks(data: Union[bytes, str], filename: str = "", chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    # 붙여넣기(탭 구분)·CSV 는 청크 스트리밍, Excel 은 한 번에 읽어 청크로 자른다
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in (".xlsx", ".xls"):
+        df = pd.read_excel(BytesIO(data), dtype=str)
+        for i in range(0, len(df), chunksize):
+            yield df.iloc[i:i + chunksize]
+        return
+    text = data if isinstance(data, str) else _decode(data)
+    sep = "\t" if "\t" in text.split("\n", 1)[0] else ","
+    yield from pd.read_csv(StringIO(text), sep=sep, dtype=str, chunksize=chunksize, skipinitialspace=True)
+
+
+def validate_chunk(chunk: pd.DataFrame, store: RateStore, first_row: int,
+                   known: Optional[Tuple[set, set]] = None) -> ImportResult:
+    # known: _known_pairs(store) — 여러 청크를 검증할 때는 한 번만 만들어 넘긴다
+    df = chunk.rename(columns={c: _norm(c) for c in chunk.columns})
+    missing = [c for c in IMPORT_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"필수 컬럼이 없습니다: {', '.join(missing)}")
+
+    prod = df["product"].fillna("").str.strip().to_numpy(dtype=object)
+    tpe = df["type"].fillna("").str.strip().to_numpy(dtype=object)
+    pay = df["pay_year"].fillna("").str.strip().to_numpy(dtype=object)
+    premium = pd.to_numeric(df["premium"].fillna("").str.replace(r"[^0-9.\-]", "", regex=True), errors="coerce").to_numpy()
+
+    codes = store.codes(prod, tpe, pay)
+    bad_premium = np.isnan(premium) | (premium < 0)
+    over_premium = premium > MAX_PREMIUM
+    ok = (codes >= 0) & ~bad_premium & ~over_premium
+
+    res = ImportResult(total=len(df))
+    row_no = np.arange(first_row, first_row + len(df))
+    for i in np.flatnonzero(ok):
+        res.rows.append({"product": prod[i], "type": tpe[i], "pay_year": pay[i],
+                         "premium": int(premium[i]), "rate_code": int(codes[i])})
+
+    if not ok.all():
+        known_prod, known_type = known or _known_pairs(store)
+        for i in np.flatnonzero(~ok):
+            if bad_premium[i]:
+                reason = f"보험료 오류 ({df['premium'].iloc[i]!r})"
+            elif over_premium[i]:
+                reason = f"보험료 한도 초과 ({df['premium'].iloc[i]!r}, 최대 {MAX_PREMIUM:,}원)"
+            elif prod[i] not in known_prod:
+                reason = f"미등록 상품명 ({prod[i]})"
+            elif (prod[i], tpe[i]) not in known_type:
+                reason = f"해당 상품에 없는 유형 ({tpe[i]})"
+            else:
+                reason = f"해당 유형에 없는 납입년도 ({pay[i]})"
+            res.errors.append((int(row_no[i]), reason))
+    return res
+
+
+def _known_pairs(store: RateStore):
+    products = set(store.products)
+    pairs = {(store.products[p], store.types[t]) for p, t in zip(store.leaf_product, store.leaf_type)}
+    return products, pairs
+
+
+def import_contracts(data: Union[bytes, str], store: RateStore, filename: str = "",
+                     chunksize: int = CHUNK_ROWS) -> ImportResult:
+    out = ImportResult()
+    first_row = 2  # 헤더 다음 행 = 2행
+    known = _known_pairs(store)
+    for chunk in iter_chunks(data, filename, chunksize):
+        part = validate_chunk(chunk, store, first_row, known)
+        out.rows.extend(part.rows)
+        out.errors.extend(part.errors)
+        out.total += part.total
+        first_row += len(chunk)
+    return out
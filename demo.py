@@ -3,13 +3,24 @@ from datetime import datetime
 import re
 import base64
 import os
-import pandas as pd
-from io import StringIO
+
+from typing import Optional
+
+import audit_log
+import engine
+import metrics
+import startup
+from engine import AgentProfile
+from entry_store import EntryStore, widget_key
+from incremental import IncrementalCalc
+from result_cache import ResultCache
+from tiers import default_rules
 
 # =========================
 # 기본 설정
 # =========================
 st.set_page_config(page_title="DB생명 당월 수수료 계산기", layout="centered")
+metrics.begin_run("rerun")  # DBLIFE_METRICS=1 일 때만 기록
 st.markdown(
     """
     <style>
@@ -20,17 +31,24 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+@st.cache_resource(show_spinner=False)
+def logo_data_uri(logo_path: str) -> Optional[str]:
+    # 프로세스당 한 번만 읽어 인코딩 (파일이 없으면 None)
+    if not os.path.exists(logo_path):
+        return None
+    with open(logo_path, "rb") as f:
+        return "data:image/png;base64," + base64.b64encode(f.read()).decode("utf-8")
+
 def render_title_with_logo_right(logo_path: str, title_text: str, logo_width: int = 100):
     try:
-        if not os.path.exists(logo_path):
+        uri = logo_data_uri(logo_path)
+        if uri is None:
             raise FileNotFoundError(logo_path)
-        with open(logo_path, "rb") as f:
-            b64 = base64.b64encode(f.read()).decode("utf-8")
         st.markdown(
             f"""
             <div style="display:flex; align-items:center; justify-content:space-between; margin-bottom:6px; border-bottom:1px solid #ddd; padding-bottom:4px;">
                 <h1 style="margin:0; font-size:2.5rem;">📊 {title_text}</h1>
-                <img src="data:image/png;base64,{b64}" width="{logo_width}" alt="DB생명 로고" />
+                <img src="{uri}" width="{logo_width}" alt="DB생명 로고" />
             </div>
             """,
             unsafe_allow_html=True
@@ -39,6 +57,7 @@ def render_title_with_logo_right(logo_path: str, title_text: str, logo_width: in
         st.title(f"📊 {title_text}")
 
 render_title_with_logo_right("DB_logo.png", "당월 수수료 계산기", 120)
+startup.mark("header")
 
 def SP(px: int = 16):
     st.markdown(f"<div style='height:{px}px'></div>", unsafe_allow_html=True)
@@ -48,10 +67,6 @@ SP(25)
 # =========================
 # 세션 상태
 # =========================
-if "entries" not in st.session_state:
-    st.session_state.entries = []
-if "entry_seq" not in st.session_state:
-    st.session_state.entry_seq = 0
 if "product_selector" not in st.session_state:
     st.session_state.product_selector = "— 상품을 선택하세요 —"
 
@@ -78,6 +93,12 @@ def currency_input(label: str, key: str, default: int = 0, label_visibility: str
 st.subheader("📝 기본 정보 입력")
 SP(25)
 
+st.markdown("<div style='font-size:1.08rem; font-weight:700;'>✔️설계사 코드 입력 (선택)</div>", unsafe_allow_html=True)
+SP(8)
+agent_code = st.text_input("설계사 코드", key="agent_code", max_chars=20, label_visibility="collapsed",
+                           placeholder="입력하면 계산 이력이 설계사별로 저장·조회됩니다").strip()
+
+SP(20)
 st.markdown("<div style='font-size:1.08rem; font-weight:700;'>✔️위임년월 입력</div>", unsafe_allow_html=True)
 SP(12)
 
@@ -111,13 +132,9 @@ st.markdown("<div style='font-size:1.08rem; font-weight:700;'>✔️유지율 
 SP(8)
 
 today = datetime.today()
-contract_months_now = (today.year - year) * 12 + (today.month - month) + 1  # 1=1차월 ...
+contract_months_now = engine.contract_months_between(year, month, today)
 
-def _std_retention(month_idx: int):
-    if month_idx <= 2:  return None
-    elif month_idx <= 6:  return 93
-    elif month_idx <= 12: return 90
-    else:                 return 85
+_std_retention = engine.std_retention
 
 _std_now_dynamic = _std_retention(contract_months_now)
 _std_13 = _std_retention(13)
@@ -163,87 +180,48 @@ with cC:
 
 st.markdown("---")
 
+startup.mark("first_paint")  # 여기까지(머리글 · 기본 정보 입력)는 pandas/마스터 없이 그린다
+# 무거운 준비(pandas import · 상품 마스터 로드)는 첫 화면 뒤에 시작 — 더 일찍 띄우면 첫 화면과 GIL 을 나눠 쓴다
+#   스레드에서 하므로 준비 중 rerun 으로 스크립트가 중단돼도 진행 중인 준비는 이어진다
+startup.prewarm()
+
 # =========================
 # [변경] 백엔드에서 마스터 로드 (업로드/미리보기 제거)
 # =========================
-MASTER_CSV_PATH = "./data/product_master.csv"
-
-@st.cache_data(show_spinner=False)
-def load_products_tree_from_csv(path: str):
-    if not os.path.exists(path):
-        return None, None, None  # TREE, DF, STRATEGIC
-    # 인코딩 가변 처리
-    with open(path, "rb") as f:
-        data_bytes = f.read()
-    try:
-        raw = data_bytes.decode("utf-8-sig")
-    except UnicodeDecodeError:
-        raw = data_bytes.decode("cp949")
-
-    df = pd.read_csv(StringIO(raw))
-    # 컬럼 정규화
-    def _norm(c: str) -> str:
-        k = c.strip().lower().replace(" ", "")
-        mapping = {
-            "상품명": ["상품명", "product", "상품"],
-            "유형": ["유형", "type", "상품유형"],
-            "납기": ["납기", "납입", "납입년도", "payyears", "납입년수"],
-            "1차년성적률": ["1차년성적률", "성적률1", "rate1", "yr1", "y1"],
-            "2차년성적률": ["2차년성적률", "성적률2", "rate2", "yr2", "y2"],
-            "3차년성적률": ["3차년성적률", "성적률3", "rate3", "yr3", "y3"],
-            "전략건강여부": ["전략건강여부", "전략건강", "strategic", "strategic_health", "sh"],
-        }
-        for std, alts in mapping.items():
-            if k in [a.lower().replace(" ", "") for a in alts]:
-                return std
-        return c
-    df = df.rename(columns={c: _norm(c) for c in df.columns})
-
-    req = {"상품명", "유형", "납기", "1차년성적률", "2차년성적률", "3차년성적률", "전략건강여부"}
-    if not req.issubset(set(df.columns)):
-        return None, None, None
-
-    # 정제
-    df["상품명"] = df["상품명"].astype(str).str.strip()
-    df["유형"] = df["유형"].astype(str).str.strip()
-    df["납기"] = df["납기"].astype(str).str.strip()
-    for col in ["1차년성적률", "2차년성적률", "3차년성적률"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(float)
-    df["전략건강여부"] = df["전략건강여부"].astype(str).str.upper().str.strip()
-
-    PRODUCTS_TREE = {}
-    STRATEGIC_HEALTH = set()
-
-    for _, row in df.iterrows():
-        name = row["상품명"]
-        tpe  = row["유형"]
-        r1, r2, r3 = float(row["1차년성적률"]), float(row["2차년성적률"]), float(row["3차년성적률"])
-        pay_list = [x for x in re.split(r"[,\s/]+", row["납기"]) if x] or ["기타"]
-
-        if name not in PRODUCTS_TREE:
-            PRODUCTS_TREE[name] = {}
-        if tpe not in PRODUCTS_TREE[name]:
-            PRODUCTS_TREE[name][tpe] = {"payyears": [], "rates": {}, "strategic": False}
-
-        for py in pay_list:
-            if py not in PRODUCTS_TREE[name][tpe]["payyears"]:
-                PRODUCTS_TREE[name][tpe]["payyears"].append(py)
-            PRODUCTS_TREE[name][tpe]["rates"][py] = (r1, r2, r3)
-
-        if row["전략건강여부"] in ["Y", "YES", "1", "TRUE"]:
-            PRODUCTS_TREE[name][tpe]["strategic"] = True
-            STRATEGIC_HEALTH.add(name)
-
-    for nm in PRODUCTS_TREE:
-        for tp in PRODUCTS_TREE[nm]:
-            PRODUCTS_TREE[nm][tp]["payyears"].sort(key=lambda s: (len(s), s))
-
-    return PRODUCTS_TREE, df, STRATEGIC_HEALTH
-
-PRODUCTS_TREE, master_df, STRATEGIC_HEALTH = load_products_tree_from_csv(MASTER_CSV_PATH)
-if not PRODUCTS_TREE:
+@st.cache_resource(show_spinner=False)
+def master_registry():
+    # 프로세스당 1개 — prewarm 스레드가 준비한 것을 받는다 (감시 스레드가 파일 변경 시 스냅샷을 교체)
+    return startup.registry()
+
+# 이번 실행(rerun) 동안은 이 스냅샷만 사용 — 중간에 교체돼도 계산이 섞이지 않는다
+with metrics.timer("master_load"):
+    SNAPSHOT = master_registry().current()
+if SNAPSHOT is None:
     st.error("상품 마스터를 찾을 수 없습니다. 백엔드에 product_master.csv를 배포해 주세요.")
     st.stop()
+PRODUCTS_TREE, master_df, STRATEGIC_HEALTH = SNAPSHOT.tree, SNAPSHOT.df, SNAPSHOT.strategic
+RATE_STORE = SNAPSHOT.rate_store
+
+# pandas 를 쓰는 모듈 — prewarm 스레드가 이미 불러 두었으므로 여기서는 바로 반환
+import contract_import  # noqa: E402
+import optimizer  # noqa: E402
+import projection  # noqa: E402
+import simulation  # noqa: E402
+
+@st.cache_resource(show_spinner=False)
+def result_cache() -> ResultCache:
+    # 프로세스 공용 — 같은 입력(차월·설계사 입력·계약 구성)의 "계산하기" 결과를 세션 간에 재사용
+    return ResultCache()
+
+RESULT_CACHE = result_cache()
+RESULT_CACHE.bind(SNAPSHOT.version)  # 마스터가 교체되면 이전 결과 폐기
+
+@st.cache_resource(show_spinner=False)
+def audit_store():
+    # 프로세스 공용 계산 이력 (DBLIFE_AUDIT=0 이면 None) — 기록은 백그라운드 스레드
+    return audit_log.from_env()
+
+AUDIT = audit_store()
 
 # =========================
 # [변경] 칼럼 비율 동적 산정 (상품명/유형 폭 확대)
@@ -261,49 +239,130 @@ def compute_col_weights(tree: dict):
 
     return [name_w, type_w, py_w, prem_w, del_w]
 
+@st.cache_resource(show_spinner=False, max_entries=4)
+def product_options(master_version: str, _tree: dict):
+    # 정렬은 마스터 버전당 한 번: 상품명 목록, 상품명→위치, 상품별 유형 목록, 칼럼 폭
+    tree = _tree
+    names = sorted(tree.keys())
+    return names, {nm: i for i, nm in enumerate(names)}, {nm: sorted(tree[nm].keys()) for nm in names}, compute_col_weights(tree)
+
+with metrics.timer("product_options"):
+    PROD_OPTS, PROD_INDEX, SORTED_TYPES, COL_WEIGHTS = product_options(SNAPSHOT.version, PRODUCTS_TREE)
+
+# 계약 목록: (entry id, rate_code, 보험료) 정수 배열 — 상품명 등 문자열은 스냅샷의 RateStore 에서 조회
+if "entries" not in st.session_state:
+    st.session_state.entries = EntryStore(RATE_STORE)
+entries = st.session_state.entries
+
+# 마스터가 교체되면 기존 계약 행을 새 스냅샷 기준으로 다시 매핑 (없어진 상품 행은 제외하고 알림)
+if entries.store is not RATE_STORE:
+    _had_entries = bool(entries)
+    _dropped = entries.rebind(RATE_STORE, PRODUCTS_TREE, SORTED_TYPES)
+    if _had_entries and st.session_state.get("master_version") not in (None, SNAPSHOT.version):
+        st.session_state.master_notice = (SNAPSHOT.version, sorted(set(_dropped)))
+st.session_state.master_version = SNAPSHOT.version
+if "master_notice" in st.session_state:
+    _ver, _dropped = st.session_state.pop("master_notice")
+    st.info(f"상품 마스터가 갱신되었습니다 (버전 {_ver})." + (f" 판매 종료된 상품은 목록에서 제외했습니다: {', '.join(_dropped)}" if _dropped else ""))
+
 # =========================
 # 상품 선택 → 자동 추가 (상품명 → 유형 → 납입년도)
 # =========================
-all_products = ["— 상품을 선택하세요 —"] + sorted(PRODUCTS_TREE.keys())
+all_products = ["— 상품을 선택하세요 —"] + PROD_OPTS
+SIM_SCENARIOS = 100_000
+PAGE_SIZES = [10, 20, 50, 100]
+if "entry_page_size" not in st.session_state:
+    st.session_state.entry_page_size = 20
+if "entry_page" not in st.session_state:
+    st.session_state.entry_page = 1
+
+def _jump_to_last_page():
+    # 새 계약이 보이도록 마지막 페이지로 이동
+    st.session_state.entry_page = -(-len(entries) // st.session_state.entry_page_size)
 
 def on_select_change():
     choice = st.session_state.product_selector
     if choice and choice != all_products[0]:
-        st.session_state.entry_seq += 1
-        new_id = st.session_state.entry_seq
-
-        types = sorted(PRODUCTS_TREE[choice].keys())
-        default_type = types[0] if types else "기타"
-        payyears = PRODUCTS_TREE[choice][default_type]["payyears"] if types else ["기타"]
-        default_pay = payyears[0] if payyears else "기타"
-
-        st.session_state.entries.append({
-            "id": new_id,
-            "product": choice,
-            "type": default_type,
-            "pay_year": default_pay,
-            "type_key": f"type_{new_id}",
-            "pay_year_key": f"payyear_{new_id}",
-            "premium_key": f"premium_{new_id}",
-            "premium": 0,
-        })
+        default_type = SORTED_TYPES[choice][0]
+        default_pay = PRODUCTS_TREE[choice][default_type]["payyears"][0]
+
+        store = st.session_state.entries.store
+        st.session_state.entries.append(store.code(choice, default_type, default_pay))
         st.session_state.product_selector = all_products[0]
+        _jump_to_last_page()
+
+def on_bulk_import():
+    # 파일/붙여넣기 전체를 검증한 뒤 정상 행을 한 번에 entries 에 추가 (rerun 1회)
+    up = st.session_state.get("bulk_file")
+    text = st.session_state.get("bulk_text", "")
+    store = st.session_state.entries.store
+    try:
+        if up is not None:
+            res = contract_import.import_contracts(up.getvalue(), store, filename=up.name)
+        elif text.strip():
+            res = contract_import.import_contracts(text, store)
+        else:
+            st.session_state.bulk_report = ("warning", "가져올 파일이나 붙여넣은 내용이 없습니다.", [])
+            return
+    except (ValueError, ImportError) as ex:
+        st.session_state.bulk_report = ("error", f"가져오기 실패: {ex}", [])
+        return
+
+    st.session_state.entries.extend((r["rate_code"], r["premium"]) for r in res.rows)
+    _jump_to_last_page()
+    msg = f"{res.total:,}행 중 {len(res.rows):,}건 추가, 오류 {len(res.errors):,}건"
+    st.session_state.bulk_report = ("success" if not res.errors else "warning", msg, res.errors[:200])
 
 st.markdown("<div style='font-size:1.08rem; font-weight:700; color:#000000;'>✔️상품 선택</div>", unsafe_allow_html=True)
 st.caption("※ 선택 즉시 아래에 계약이 추가됩니다")
-st.selectbox("", options=all_products, key="product_selector", on_change=on_select_change)
+product_query = st.text_input("상품 검색", key="product_query", label_visibility="collapsed",
+                              placeholder="🔎 상품명·유형·초성으로 검색 (예: 암종신, ㅂㄴㅊㄱ)")
+if product_query.strip():
+    _hits = SNAPSHOT.search.products(product_query, limit=50)
+    st.caption(f"검색 결과 {len(_hits)}건" if _hits else "검색 결과가 없습니다")
+    select_options = all_products[:1] + _hits
+else:
+    select_options = all_products
+st.selectbox("", options=select_options, key="product_selector", on_change=on_select_change)
+
+with st.expander("📥 계약 일괄 등록 (CSV/Excel/붙여넣기)"):
+    st.caption("※ 컬럼: 상품명, 유형, 납입년도, 월초보험료 — 마스터에 없는 조합/보험료 오류 행은 제외하고 사유를 표시합니다")
+    st.file_uploader("계약 파일", type=["csv", "xlsx", "xls"], key="bulk_file")
+    st.text_area("또는 표를 붙여넣기 (헤더 포함, 탭/콤마 구분)", key="bulk_text", height=120)
+    st.button("가져오기", key="bulk_import_btn", on_click=on_bulk_import)
+    if "bulk_report" in st.session_state:
+        level, msg, errors = st.session_state.bulk_report
+        getattr(st, level)(msg)
+        if errors:
+            st.dataframe([{"행": r, "사유": why} for r, why in errors], use_container_width=True, hide_index=True)
 
 # =========================
 # 등록된 계약 렌더링 (상품명 → 유형 → 납입년도) — 가변 칼럼 폭 적용
+#   계약이 많으면 현재 페이지의 행만 위젯으로 그린다 (나머지는 entries 에 값만 유지)
 # =========================
 SP(10)
 st.subheader("🧾 상품 목록")
 
-col_weights = compute_col_weights(PRODUCTS_TREE)
+col_weights = COL_WEIGHTS
 
-if not st.session_state.entries:
+if not entries:
     st.info("상품을 선택하면 아래에 계약이 추가됩니다. 동일 상품을 여러 건 추가할 수 있습니다.")
 else:
+    visible = range(len(entries))
+    if len(entries) > PAGE_SIZES[0]:
+        n_pages = -(-len(entries) // st.session_state.entry_page_size)
+        st.session_state.entry_page = min(max(1, st.session_state.entry_page), n_pages)
+        pg1, pg2, pg3 = st.columns([1.2, 1.0, 4.8])
+        with pg1:
+            st.selectbox("페이지당 계약 수", PAGE_SIZES, key="entry_page_size")
+        with pg2:
+            st.number_input("페이지", min_value=1, max_value=n_pages, step=1, key="entry_page")
+        with pg3:
+            SP(30)
+            st.caption(f"총 {len(entries):,}건 · {n_pages}페이지")
+        start = (st.session_state.entry_page - 1) * st.session_state.entry_page_size
+        visible = visible[start:start + st.session_state.entry_page_size]
+
     h1, h2, h3, h4, h5 = st.columns(col_weights)
     with h1: st.markdown("**상품명**")
     with h2: st.markdown("**유형**")
@@ -311,224 +370,113 @@ else:
     with h4: st.markdown("**월초 보험료(원)**")
     with h5: st.markdown("**삭제**")
 
+    _render = metrics.start("entry_render")
     remove_id = None
-    for e in st.session_state.entries:
+    for i in visible:
+        eid = entries.ids[i]
+        product, tpe, pay_year = entries.names(i)
         c1, c2, c3, c4, c5 = st.columns(col_weights)
 
         # 상품명
         with c1:
-            prod_opts = sorted(PRODUCTS_TREE.keys())
-            cur_prod_idx = prod_opts.index(e["product"]) if e["product"] in prod_opts else 0
-            new_prod = st.selectbox("상품명", prod_opts, index=cur_prod_idx, key=f"prod_{e['id']}", label_visibility="collapsed")
-            if new_prod != e["product"]:
-                e["product"] = new_prod
-                types = sorted(PRODUCTS_TREE[new_prod].keys())
-                e["type"] = types[0]
-                e["pay_year"] = PRODUCTS_TREE[new_prod][e["type"]]["payyears"][0]
+            cur_prod_idx = PROD_INDEX.get(product, 0)
+            new_prod = st.selectbox("상품명", PROD_OPTS, index=cur_prod_idx, key=widget_key("prod", eid), label_visibility="collapsed")
+            if new_prod != product:
+                product = new_prod
+                tpe = SORTED_TYPES[new_prod][0]
+                pay_year = PRODUCTS_TREE[new_prod][tpe]["payyears"][0]
 
         # 유형
         with c2:
-            types = sorted(PRODUCTS_TREE[e["product"]].keys())
-            if e["type"] not in types:
-                e["type"] = types[0]
-            new_type = st.selectbox("유형", types, index=types.index(e["type"]), key=e["type_key"], label_visibility="collapsed")
-            if new_type != e["type"]:
-                e["type"] = new_type
-                e["pay_year"] = PRODUCTS_TREE[e["product"]][e["type"]]["payyears"][0]
+            types = SORTED_TYPES[product]
+            if tpe not in types:
+                tpe = types[0]
+            new_type = st.selectbox("유형", types, index=types.index(tpe), key=widget_key("type", eid), label_visibility="collapsed")
+            if new_type != tpe:
+                tpe = new_type
+                pay_year = PRODUCTS_TREE[product][tpe]["payyears"][0]
 
         # 납입년도
         with c3:
-            py_opts = PRODUCTS_TREE[e["product"]][e["type"]]["payyears"]
-            if e["pay_year"] not in py_opts:
-                e["pay_year"] = py_opts[0]
-            e["pay_year"] = st.selectbox("납입년도", py_opts, index=py_opts.index(e["pay_year"]), key=e["pay_year_key"], label_visibility="collapsed")
+            py_opts = PRODUCTS_TREE[product][tpe]["payyears"]
+            if pay_year not in py_opts:
+                pay_year = py_opts[0]
+            pay_year = st.selectbox("납입년도", py_opts, index=py_opts.index(pay_year), key=widget_key("payyear", eid), label_visibility="collapsed")
 
         # 월초 보험료
         with c4:
-            e["premium"] = currency_input("월초 보험료(원)", key=e["premium_key"], default=e.get("premium", 0), label_visibility="collapsed")
+            premium = currency_input("월초 보험료(원)", key=widget_key("premium", eid), default=entries.premiums[i], label_visibility="collapsed")
+        entries.set(i, product, tpe, pay_year, premium)
 
         with c5:
-            if st.button("🗑 삭제", key=f"del_{e['id']}", use_container_width=True):
-                remove_id = e["id"]
+            if st.button("🗑 삭제", key=widget_key("del", eid), use_container_width=True):
+                remove_id = eid
         st.markdown("")
 
+    _render.stop()
+    metrics.incr("rate_lookups_total", len(visible), source="entry_rows")
+
     if remove_id is not None:
-        st.session_state.entries = [x for x in st.session_state.entries if x["id"] != remove_id]
+        entries.remove(remove_id)
 
 # =========================
-# 계산 로직
+# 증분 계산 상태 (바뀐 계약만 다시 계산, 합계는 누적값 패치)
 # =========================
-def get_rates(product: str, tpe: str, payyear: str):
-    try:
-        r1, r2, r3 = PRODUCTS_TREE[product][tpe]["rates"][payyear]
-        return float(r1), float(r2), float(r3)
-    except Exception:
-        return 0.0, 0.0, 0.0
+rules = default_rules()
+_inc_sig = (SNAPSHOT.version, rules.version)
+if st.session_state.get("inc_sig") != _inc_sig:
+    st.session_state.inc_calc = IncrementalCalc(PRODUCTS_TREE, STRATEGIC_HEALTH, RATE_STORE, rules,
+                                                master_version=SNAPSHOT.version)
+    st.session_state.inc_sig = _inc_sig
+inc_calc = st.session_state.inc_calc
+with metrics.timer("incremental_sync"):
+    _contracts = entries.contracts()
+    _patched = inc_calc.sync(_contracts)
+metrics.gauge("entries", len(entries))
+metrics.incr("contracts_patched_total", _patched)
+metrics.gauge("derive_cache_hits", inc_calc.hits)
+metrics.gauge("derive_cache_misses", inc_calc.misses)
+
+profile = AgentProfile(
+    year=year, month=month, std_activity=bool(std_activity),
+    retention_1st=retention_1st, retention_13th=retention_13th, retention_25th=retention_25th,
+    refund_p=refund_p, refund_amt=refund_amt, direct_recruits=direct_recruits,
+)
+if entries:
+    with metrics.timer("live_evaluate"):
+        live = inc_calc.evaluate(profile, as_of=datetime.today().date())
+    st.caption(f"※ 익월 예상 수수료(실시간): {live.next_month_total:,.0f}원 · 유효환산 {int(live.effective_converted):,}P")
 
+# =========================
+# 계산 로직 (engine 규칙, 증분 상태에서 평가)
+# =========================
+# 시뮬레이션(SIM_SCENARIOS 개 시나리오)은 무거워서 켠 경우에만 — 결과는 계산 키로 캐시
+sim_enabled = st.toggle("🎲 유지율 시나리오 시뮬레이션도 계산", key="sim_enabled", value=False)
 if st.button("📌 계산하기"):
     st.divider()
     summary_placeholder = st.container()
 
-    # 유지율 보정 계수
-    def retention_factor(user_rate: int, standard_rate):
-        if standard_rate is None:
-            return 1.0
-        delta = user_rate - standard_rate
-        if delta >= 0:   return 1.00
-        elif delta > -5: return 0.85
-        else:            return 0.70
-
-    # 성과수수료 기준율 테이블
-    def performance_rate_by_months(months: int, eff: float) -> float:
-        if eff < 700_000:
-            return 0.0
-        if months <= 12:
-            if eff >= 10_000_000: return 0.75
-            if eff >= 5_000_000:  return 0.72
-            if eff >= 2_000_000:  return 0.70
-            if eff >= 1_000_000:  return 0.60
-            return 0.35
-        elif months <= 24:
-            if eff >= 10_000_000: return 0.80
-            if eff >= 5_000_000:  return 0.77
-            if eff >= 2_000_000:  return 0.75
-            if eff >= 1_000_000:  return 0.65
-            return 0.40
-        elif months <= 36:
-            if eff >= 10_000_000: return 0.85
-            if eff >= 5_000_000:  return 0.82
-            if eff >= 2_000_000:  return 0.80
-            if eff >= 1_000_000:  return 0.70
-            return 0.45
-        else:
-            if eff >= 10_000_000: return 0.90
-            if eff >= 5_000_000:  return 0.87
-            if eff >= 2_000_000:  return 0.85
-            if eff >= 1_000_000:  return 0.75
-            return 0.50
-
-    # 유효환산P 산정(1차년 환산 합)
-    total_converted_raw = 0
-    for e in st.session_state.entries:
-        r1, r2, r3 = get_rates(e["product"], e["type"], e["pay_year"])
-        total_converted_raw += e["premium"] * (r1 / 100.0)
-
-    effective_converted = max(0, total_converted_raw - refund_p)
-
-    today = datetime.today()
-    contract_months = (today.year - year) * 12 + (today.month - month) + 1
-
-    base_rate_raw = performance_rate_by_months(contract_months, effective_converted)
-    base_rate = base_rate_raw
-
-    # 초기정착2 전제조건
-    cond_std = bool(std_activity)
-    cond_month = contract_months <= 12
-    cond_amt_init2 = effective_converted >= 1_000_000
-    eligible_init2 = cond_std and cond_month and cond_amt_init2
-
-    Rmax = 0.75
-    delta_R_raw = max(0.0, Rmax - base_rate) if eligible_init2 else 0.0
-
-    _std_now_dynamic_calc = _std_retention(contract_months)
-    f1  = retention_factor(retention_1st, _std_now_dynamic_calc)
-    f13 = retention_factor(retention_13th, _std_13)
-    f25 = retention_factor(retention_25th, _std_25)
-
-    # 전략건강 건수/단가
-    def strategic_count(p: int) -> float:
-        if p >= 50_000: return 1.0
-        if p >= 30_000: return 0.5
-        return 0.0
-
-    total_sh_count = 0.0
-    for e in st.session_state.entries:
-        if e["product"] in STRATEGIC_HEALTH:
-            total_sh_count += strategic_count(e["premium"])
-
-    def per_unit_bonus(cnt: float) -> int:
-        if cnt >= 5: return 70_000
-        if cnt >= 3: return 60_000
-        if cnt >= 2: return 55_000
-        if cnt >= 1: return 50_000
-        return 0
-
-    sh_unit = per_unit_bonus(total_sh_count)
-
-    # 상품별 계산
-    results = []
-    sum_recruit = sum_perf1 = sum_init2_1 = sum_sh_bonus = 0
-
-    for e in st.session_state.entries:
-        prod, tpe, pay_year, premium = e["product"], e["type"], e["pay_year"], e["premium"]
-        r1, r2, r3 = get_rates(prod, tpe, pay_year)
-
-        y1 = premium * (r1 / 100.0)
-        y2 = premium * (r2 / 100.0)
-        y3 = premium * (r3 / 100.0)
-
-        if direct_recruits >= 3:   dr_bonus = 0.15
-        elif direct_recruits == 2: dr_bonus = 0.10
-        elif direct_recruits == 1: dr_bonus = 0.05
-        else:                      dr_bonus = 0.0
-
-        perf1_rate_effective = (base_rate * f1) + (dr_bonus if base_rate > 0 else 0.0)
-        perf1 = y1 * perf1_rate_effective
-        perf2 = y2 * base_rate * f13
-        perf3 = y3 * base_rate * f25
-
-        init2_1 = y1 * (delta_R_raw * f1)
-        init2_2 = y2 * (delta_R_raw * f13)
-        init2_3 = y3 * (delta_R_raw * f25)
-
-        retention1_amt = y2 / 12
-        retention2_amt = y3 / 12
-
-        sh_flag = (prod in STRATEGIC_HEALTH)
-        this_count = strategic_count(premium) if sh_flag else 0.0
-        sh_bonus = int(this_count * sh_unit) if sh_flag else 0
-        sh_tag = " <span style='color:#dc2626'>[전략건강]</span>" if sh_flag else ""
-
-        recruit_fee = y1
-
-        sum_recruit += recruit_fee
-        sum_perf1   += perf1
-        sum_init2_1 += init2_1
-        sum_sh_bonus += sh_bonus
-
-        results.append({
-            "prod": prod, "type": tpe, "pay_year": pay_year, "premium": premium,
-            "recruit_fee": recruit_fee, "perf1": perf1, "perf2": perf2, "perf3": perf3,
-            "init2_1": init2_1, "init2_2": init2_2, "init2_3": init2_3,
-            "retention1_amt": retention1_amt, "retention2_amt": retention2_amt,
-            "sh_bonus": sh_bonus, "sh_tag": sh_tag,
-        })
-
-    # 정착보장 수수료
-    def guarantee_amount_base(effP: int) -> int:
-        if effP >= 5_000_000: return 5_000_000
-        if effP >= 4_000_000: return 4_500_000
-        if effP >= 3_000_000: return 4_000_000
-        if effP >= 2_500_000: return 3_500_000
-        if effP >= 2_000_000: return 3_000_000
-        if effP >= 1_500_000: return 2_500_000
-        if effP >= 1_000_000: return 1_500_000
-        return 0
-
-    base_guarantee = guarantee_amount_base(effective_converted)
-    add_guarantee = 1_000_000 if direct_recruits == 1 else (2_000_000 if direct_recruits >= 2 else 0)
-    final_guarantee = base_guarantee + add_guarantee
-
-    cond_ret = (_std_now_dynamic is None) or (retention_1st >= _std_now_dynamic)
-    eligible_settle = (contract_months <= 12) and std_activity and cond_ret and (final_guarantee > 0)
-
-    base_comp = sum_recruit + sum_perf1 + sum_init2_1
-    base_comp_after_refund = max(0, base_comp - refund_amt)
-
-    settle_bonus = (final_guarantee - base_comp_after_refund) if eligible_settle else 0
-    if settle_bonus < 0: settle_bonus = 0
+    _today = datetime.today().date()
+    with metrics.timer("calc_evaluate"):
+        calc = RESULT_CACHE.commission(
+            profile, engine.contract_months_between(year, month, _today), list(_contracts.values()),
+            SNAPSHOT.version, rules.version, lambda: inc_calc.evaluate(profile, as_of=_today, detail=True))
+    if AUDIT is not None:
+        AUDIT.record(profile, list(_contracts.values()), calc, agent=agent_code, calc_date=_today)
+
+    contract_months = calc.contract_months
+    total_converted_raw = calc.total_converted_raw
+    effective_converted = calc.effective_converted
+    base_rate_raw = calc.base_rate
+    f1 = calc.f1
+    std_now_calc = calc.std_retention_now
+    add_guarantee, final_guarantee = calc.add_guarantee, calc.final_guarantee
+    settle_bonus = calc.settle_bonus
+    sum_recruit, sum_perf1, sum_init2_1, sum_sh_bonus = calc.sum_recruit, calc.sum_perf1, calc.sum_init2_1, calc.sum_sh_bonus
+    results = calc.results
 
     # ── 상단 요약
+    _summary = metrics.start("summary_render")
     with summary_placeholder:
         st.markdown("<div style='font-size:1.8rem; font-weight:700;'>📢당월 수수료 요약</div>", unsafe_allow_html=True)
 
@@ -536,7 +484,7 @@ if st.button("📌 계산하기"):
             f"- **당월환산보험료**: {int(total_converted_raw):,}P",
             f"- **당월 예상 환수성적**: {int(refund_p):,}P",
             f"- **유효환산보험료**: {int(effective_converted):,}P",
-            f"- **기준 유지율**: {('해당사항없음' if _std_now_dynamic is None else str(_std_now_dynamic)+'%')}",
+            f"- **기준 유지율**: {('해당사항없음' if std_now_calc is None else str(std_now_calc)+'%')}",
             f"- **현재 유지율**: {retention_1st}%",
         ]
 
@@ -549,7 +497,7 @@ if st.button("📌 계산하기"):
             if f1 != 1.0:
                 perf_caption_parts.append(f"지급률 {int(base_rate_raw*100)}% × 유지율 가감 {int(f1*100)}%")
             if direct_recruits >= 1 and base_rate_raw > 0:
-                dr_txt = "5%p" if direct_recruits == 1 else ("10%p" if direct_recruits == 2 else "15%p")
+                dr_txt = f"{round(calc.dr_bonus * 100)}%p"
                 if f1 != 1.0:
                     perf_caption_parts.append(f"+ 직도입우대 {dr_txt}")
                 else:
@@ -568,21 +516,13 @@ if st.button("📌 계산하기"):
 
         st.info("  \n".join(info_lines))
 
+        # 미산출 이유는 엔진 판정 기록(calc.trace)에서 — 화면에서 조건을 다시 따지지 않는다
         if contract_months <= 12 and settle_bonus == 0:
-            reasons_settle = []
-            if final_guarantee == 0: reasons_settle.append("유효환산 구간 미달")
-            if not std_activity: reasons_settle.append("표준활동 미달성")
-            if (_std_now_dynamic is not None) and (retention_1st < _std_now_dynamic): reasons_settle.append("당월 유지율 기준 미달")
+            reasons_settle = calc.reasons("settle")
             if reasons_settle: st.markdown("**＊ 정착보장수수료 미산출 이유:** " + ", ".join(reasons_settle))
 
-        if not eligible_init2:
-            reasons_i2 = []
-            if not std_activity: reasons_i2.append("표준활동 미달성")
-            if not cond_month: reasons_i2.append("위임 13차월 이상")
-            if not cond_amt_init2: reasons_i2.append("유효환산 100만원 미만")
-            if cond_month and cond_amt_init2 and base_rate_raw >= 0.75 and contract_months <= 12:
-                reasons_i2.append("성과수수료 최대 지급률 달성 상태")
-            if reasons_i2: st.markdown("**＊ 초기정착수수료2 미산출 이유:** " + ", ".join(reasons_i2))
+        reasons_i2 = calc.reasons("init2")
+        if reasons_i2: st.markdown("**＊ 초기정착수수료2 미산출 이유:** " + ", ".join(reasons_i2))
 
         # 익월 요약
         st.markdown("<div style='font-size:1.8rem; font-weight:700; margin-top:8px;'>📢익월 예상 수수료</div>", unsafe_allow_html=True)
@@ -594,38 +534,143 @@ if st.button("📌 계산하기"):
         ]
         if contract_months <= 12:
             lines.append(f"- **정착보장 수수료** : {settle_bonus:,.0f}원")
-        next_month_total = sum_recruit + sum_perf1 + sum_init2_1 + sum_sh_bonus + (settle_bonus if contract_months <= 12 else 0)
-        lines.append(f"\n**총합 : {next_month_total:,.0f}원**")
+        lines.append(f"\n**총합 : {calc.next_month_total:,.0f}원**")
         st.warning("\n".join(lines))
 
         SP(50)
 
+    _summary.stop()
+
     # ── [변경] 상품별 상세 (차년 성적률 표시는 제거)
+    _detail = metrics.start("detail_render")
     st.subheader("📆 상품별 예상 수수료 계산")
     for r in results:
+        sh_tag = " <span style='color:#dc2626'>[전략건강]</span>" if r.strategic else ""
         st.markdown("---")
-        st.markdown(f"### ✅ {r['prod']} ({r['type']}){r['sh_tag']}", unsafe_allow_html=True)
-        st.markdown(f"<div style='font-size:1.05rem'><b>월초 보험료</b>: {r['premium']:,.0f}원</div>", unsafe_allow_html=True)
-        st.markdown(f"<div style='font-size:1.05rem'><b>납입년도</b>: {r['pay_year']}</div>", unsafe_allow_html=True)
+        st.markdown(f"### ✅ {r.prod} ({r.type}){sh_tag}", unsafe_allow_html=True)
+        st.markdown(f"<div style='font-size:1.05rem'><b>월초 보험료</b>: {r.premium:,.0f}원</div>", unsafe_allow_html=True)
+        st.markdown(f"<div style='font-size:1.05rem'><b>납입년도</b>: {r.pay_year}</div>", unsafe_allow_html=True)
         SP(10)
 
         st.markdown("#### 1차년(익월) 수수료")
-        st.write(f"- 모집수수료 : {r['recruit_fee']:,.0f}원")
-        st.write(f"- 성과수수료1 : {r['perf1']:,.0f}원")
-        st.write(f"- 초기정착수수료2-1 : {r['init2_1']:,.0f}원")
-        if r['sh_bonus'] > 0:
-            st.write(f"- 전략건강 보너스 : {r['sh_bonus']:,.0f}원")
+        st.write(f"- 모집수수료 : {r.recruit_fee:,.0f}원")
+        st.write(f"- 성과수수료1 : {r.perf1:,.0f}원")
+        st.write(f"- 초기정착수수료2-1 : {r.init2_1:,.0f}원")
+        if r.sh_bonus > 0:
+            st.write(f"- 전략건강 보너스 : {r.sh_bonus:,.0f}원")
 
         st.markdown("#### 2차년 수수료")
-        st.write(f"- 유지수수료1 (13~24회차 보험료 납입시): {r['retention1_amt']:,.0f}원")
-        st.write(f"- 성과수수료2 : {r['perf2']:,.0f}원")
-        st.write(f"- 초기정착수수료2-2 : {r['init2_2']:,.0f}원")
+        st.write(f"- 유지수수료1 (13~24회차 보험료 납입시): {r.retention1_amt:,.0f}원")
+        st.write(f"- 성과수수료2 : {r.perf2:,.0f}원")
+        st.write(f"- 초기정착수수료2-2 : {r.init2_2:,.0f}원")
 
         st.markdown("#### 3차년 수수료")
-        st.write(f"- 유지수수료2 (25~36회차 보험료 납입시): {r['retention2_amt']:,.0f}원")
-        st.write(f"- 성과수수료3 : {r['perf3']:,.0f}원")
-        st.write(f"- 초기정착수수료2-3 : {r['init2_3']:,.0f}원")
+        st.write(f"- 유지수수료2 (25~36회차 보험료 납입시): {r.retention2_amt:,.0f}원")
+        st.write(f"- 성과수수료3 : {r.perf3:,.0f}원")
+        st.write(f"- 초기정착수수료2-3 : {r.init2_3:,.0f}원")
 
         SP(40)
 
         st.success("**✔️지급조건**\n\n**＊ 성과수수료 : 지급월 기준 환산가동인 자**\n\n**＊ 초기정착수수료2 : 지급월 기준 표준활동 달성 및 유효환산 100만P 이상인 자**")
+
+    _detail.stop()
+
+    # ── 36개월 예상 수수료 흐름 (차월 구간 진행 + 유지율 곡선 반영)
+    if results:
+        with metrics.timer("projection"):
+            proj = projection.project_result(calc, profile, rules)
+        flow = proj.total[0]
+        st.subheader("📈 36개월 예상 수수료 흐름")
+        st.line_chart({"예상 수수료(원)": flow.tolist()})
+        proj_years = [f"- **{y}차년** : {flow[12 * (y - 1):12 * y].sum():,.0f}원" for y in (1, 2, 3)]
+        st.info("\n".join(proj_years + [f"\n**36개월 합계 : {flow.sum():,.0f}원**"]))
+        st.caption(f"※ 13회차 유지율 {retention_13th}% · 25회차 유지율 {retention_25th}% 기준 월별 유지 곡선 적용, "
+                   "2·3차년 성과수수료는 해당 시점 차월 구간 지급률로 계산")
+
+        # ── 유지율 시나리오 분포 (계약별 해지 추출, 시나리오 일괄 평가)
+        if not sim_enabled:
+            st.caption("※ 유지율 시나리오 분포는 '유지율 시나리오 시뮬레이션도 계산'을 켜면 함께 보여줍니다")
+        else:
+            with st.expander("🎲 유지율 시나리오 시뮬레이션", expanded=True):
+                with metrics.timer("simulation"):
+                    pct = RESULT_CACHE.derived(
+                        "simulation", profile, contract_months, list(_contracts.values()), SNAPSHOT.version, rules.version,
+                        lambda: simulation.simulate(calc, profile, n=SIM_SCENARIOS, rules=rules, seed=0).percentiles())
+                pct = pct.copy()
+                for c in ("익월 총합", "3년 총합"):
+                    pct[c] = pct[c].map(lambda v: f"{v:,.0f}원")
+                for c in ("당월 유지율", "13회차 유지율", "25회차 유지율"):
+                    pct[c] = pct[c].map(lambda v: f"{v:.1f}%")
+                st.table(pct)
+                st.caption(f"※ {SIM_SCENARIOS:,}개 시나리오 · 계약별 해지 시점을 13/25회차 예상 유지율 곡선에서 추출, "
+                           "당월 유지율은 입력값 중심으로 변동")
+
+# =========================
+# 예산 배분 최적화 (what-if) — 구간 경계만 열거해 익월 합계가 큰 배분을 찾는다
+# =========================
+with st.expander("🎯 예산 배분 최적화 (what-if)"):
+    st.caption("※ 후보 상품과 추가 보험료 예산을 정하면 등록된 계약에 더했을 때 익월 예상 수수료가 가장 큰 배분과 "
+               "다음 구간까지 필요한 추가 보험료를 보여줍니다")
+    opt_products = st.multiselect("후보 상품", PROD_OPTS, key="opt_products")
+    oc1, oc2 = st.columns([2, 1])
+    with oc1:
+        opt_budget = currency_input("추가 월초 보험료 예산(원)", key="opt_budget", default=500_000)
+    with oc2:
+        opt_max = st.number_input("최대 추가 계약 수", min_value=1, max_value=50, value=optimizer.MAX_CONTRACTS, key="opt_max")
+    if st.button("최적화 실행", key="opt_run") and opt_products and opt_budget > 0:
+        _leaves = [(p, t, y) for p in opt_products for t in SORTED_TYPES[p] for y in PRODUCTS_TREE[p][t]["payyears"]]
+        _today = datetime.today().date()
+        with metrics.timer("optimizer"):
+            opt = optimizer.optimize(profile, list(_contracts.values()),
+                                     optimizer.candidates_from(_leaves, RATE_STORE, STRATEGIC_HEALTH), opt_budget,
+                                     RATE_STORE, STRATEGIC_HEALTH, _today, rules, max_contracts=int(opt_max),
+                                     master_version=SNAPSHOT.version)
+        _now = inc_calc.evaluate(profile, as_of=_today).next_month_total
+        for rank, a in enumerate(opt.allocations, 1):
+            st.markdown(f"**#{rank} 익월 예상 {a.next_month_total:,.0f}원** (현재 대비 +{a.next_month_total - _now:,.0f}원) "
+                        f"· 추가 보험료 {a.premium:,}원 · {len(a.lines)}건")
+            st.dataframe([{"상품명": c.product, "유형": c.type, "납입년도": c.pay_year, "월초 보험료": f"{m:,}",
+                           "전략건강": "Y" if c.strategic else ""} for c, m in a.lines],
+                         use_container_width=True, hide_index=True)
+            if a.next_tiers:
+                st.dataframe([{"다음 구간": n.label, "추가 보험료": f"{n.extra_premium:,}", "상품명": n.product,
+                               "익월 증가": f"{n.gain:,.0f}"} for n in a.next_tiers],
+                             use_container_width=True, hide_index=True)
+        st.caption(f"배분 {opt.evaluated:,}개 평가 · {opt.seconds * 1000:,.0f}ms")
+
+# =========================
+# 계산 이력 (설계사 코드를 입력한 경우, 최근 12개월)
+# =========================
+if AUDIT is not None and agent_code:
+    with st.expander("📜 계산 이력 (최근 12개월)"):
+        _hist = AUDIT.history(agent_code, 12)
+        if not _hist:
+            st.caption("※ 저장된 계산 이력이 없습니다 (계산하기를 누르면 기록됩니다)")
+        else:
+            st.dataframe([{"월": m["month"], "계산 횟수": m["calcs"], "마지막 익월 합계": f"{m['last_next_month_total']:,}",
+                           "최대 익월 합계": f"{m['max_next_month_total']:,}"} for m in AUDIT.monthly(agent_code, 12)],
+                         use_container_width=True, hide_index=True)
+            st.dataframe([{"계산일": h["calc_date"], "위임년월": f"{h['appt_year']}.{h['appt_month']:02d}",
+                           "차월": h["contract_months"], "계약 수": h["n_contracts"],
+                           "유효환산": f"{h['effective_converted']:,}", "정착보장": f"{h['settle_bonus']:,}",
+                           "익월 합계": f"{h['next_month_total']:,}", "마스터": h["master_version"]} for h in _hist],
+                         use_container_width=True, hide_index=True)
+
+# =========================
+# 성능 계측 패널 (DBLIFE_METRICS=1)
+# =========================
+startup.mark("interactive")  # 프로세스 첫 실행이 끝난 시점 (콜드 스타트 TTI)
+_run = metrics.end_run(entries=len(entries), master_version=SNAPSHOT.version)
+if _run is not None:
+    with st.expander("🛠 성능 계측"):
+        st.caption(f"이번 실행 {_run['total'] * 1000:,.1f}ms · 계약 {len(entries):,}건")
+        st.dataframe([{"단계": k, "ms": round(v * 1000, 2)} for k, v in sorted(_run["stages"].items(), key=lambda kv: -kv[1])],
+                     use_container_width=True, hide_index=True)
+        _snap = metrics.snapshot()
+        st.dataframe([{"단계": k, "횟수": v["count"], "평균 ms": round(v["sum"] / v["count"] * 1000, 2), "최대 ms": round(v["max"] * 1000, 2)}
+                      for k, v in sorted(_snap["timers"].items())], use_container_width=True, hide_index=True)
+        st.json({"counters": _snap["counters"], "gauges": _snap["gauges"], "memory": _snap["memory"],
+                 "result_cache": RESULT_CACHE.stats(),
+                 "audit_log": AUDIT.stats() if AUDIT is not None else None,
+                 "startup_seconds": startup.timings()}, expanded=False)
+        st.download_button("Prometheus 텍스트 내려받기", metrics.prometheus_text(), file_name="metrics.prom")
@@ -0,0 +1,501 @@
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import money
+from rate_store import NO_CODE, RateStore
+from tiers import Rules, default_rules
+
+# =========================
+# 수수료 계산 엔진 (Streamlit 비의존)
+# =========================
+
+
+@dataclass(frozen=True)
+class AgentProfile:
+    year: int                     # 위임년도
+    month: int                    # 위임월
+    std_activity: bool = False    # 당월 표준활동 달성 여부
+    retention_1st: int = 0        # 당월 유지율(%)
+    retention_13th: int = 85      # 13회차 예상 유지율(%)
+    retention_25th: int = 85      # 25회차 예상 유지율(%)
+    refund_p: int = 0             # 당월 예상 환수성적
+    refund_amt: int = 0           # 당월 예상 환수금
+    direct_recruits: int = 0      # 당월 직도입 인원
+
+
+@dataclass(frozen=True)
+class Contract:
+    product: str
+    type: str
+    pay_year: str
+    premium: int                  # 월초 보험료(원)
+    rate_code: int = NO_CODE      # RateStore 코드 (없으면 문자열로 조회)
+
+
+@dataclass
+class ContractResult:
+    prod: str
+    type: str
+    pay_year: str
+    premium: int
+    recruit_fee: int      # 금액은 모두 정수 원 (money.py 절사 규칙)
+    perf1: int
+    perf2: int
+    perf3: int
+    init2_1: int
+    init2_2: int
+    init2_3: int
+    retention1_amt: int
+    retention2_amt: int
+    converted2: int       # 2·3차년 환산성적 (유지수수료 월액은 이를 12로 나눠 절사 — 연간 흐름은 이 값으로)
+    converted3: int
+    sh_bonus: int
+    strategic: bool
+
+
+# =========================
+# 판정 기록 (계산 중 한 번에 남기는 규칙별 입력 · 결과 · 구간 · 미충족 조건)
+#   화면/API/일괄 정산의 "미산출 이유"는 모두 이 기록(또는 같은 조건 코드)에서 만든다
+# =========================
+INIT2_MIN_CONVERTED = 1_000_000
+
+# 규칙별 미충족 조건 코드 → 표시 문구 (표시 순서)
+REASONS: Dict[str, Dict[str, str]] = {
+    "settle": {
+        "tenure": "위임 13차월 이상",
+        "min_converted": "유효환산 구간 미달",
+        "std_activity": "표준활동 미달성",
+        "retention": "당월 유지율 기준 미달",
+    },
+    "init2": {
+        "std_activity": "표준활동 미달성",
+        "tenure": "위임 13차월 이상",
+        "min_converted": "유효환산 100만원 미만",
+        "max_rate": "성과수수료 최대 지급률 달성 상태",
+    },
+}
+
+
+def reason_text(rule: str, failed: Sequence[str]) -> str:
+    return ", ".join(REASONS[rule][c] for c in failed)
+
+
+@dataclass(frozen=True)
+class Decision:
+    rule: str                            # effective_converted / performance_rate / init2 / guarantee / settle ...
+    value: object                        # 결과 (지급률, 금액, 단가)
+    inputs: dict = field(default_factory=dict)
+    tier: Optional[int] = None           # 구간 규칙: 걸린 구간 번호 (0 = 첫 경계 미만)
+    failed: Tuple[str, ...] = ()         # 조건 규칙: 미충족 조건 코드 (REASONS 순서)
+
+
+def _failed(rule: str, checks: Dict[str, bool]) -> Tuple[str, ...]:
+    # checks: 조건 코드 → 미충족 여부
+    return tuple(c for c in REASONS[rule] if checks.get(c))
+
+
+@dataclass
+class CommissionResult:
+    rules_version: str
+    contract_months: int
+    total_converted_raw: int
+    effective_converted: int
+    base_rate: float
+    std_retention_now: Optional[int]
+    f1: float
+    f13: float
+    f25: float
+    dr_bonus: float
+    eligible_init2: bool
+    delta_R: float
+    total_sh_count: float
+    sh_unit: int
+    base_guarantee: int
+    add_guarantee: int
+    final_guarantee: int
+    eligible_settle: bool
+    sum_recruit: int
+    sum_perf1: int
+    sum_init2_1: int
+    sum_sh_bonus: int
+    base_comp: int
+    settle_bonus: int
+    next_month_total: int
+    results: "ContractResults" = field(default_factory=lambda: ContractResults.empty())
+    master_version: str = ""   # 계산에 사용한 상품 마스터 스냅샷 버전
+    trace: Tuple[Decision, ...] = ()
+
+    def decision(self, rule: str) -> Optional[Decision]:
+        return next((d for d in self.trace if d.rule == rule), None)
+
+    def reasons(self, rule: str) -> List[str]:
+        # 미충족 조건 문구 (settle / init2)
+        d = self.decision(rule)
+        return [REASONS[rule][c] for c in d.failed] if d is not None else []
+
+
+# =========================
+# 규칙 함수 (구간값은 tiers.py / data/commission_rules.json)
+# =========================
+
+
+def contract_months_between(year: int, month: int, as_of: date) -> int:
+    return (as_of.year - year) * 12 + (as_of.month - month) + 1  # 1=1차월 ...
+
+
+def std_retention(month_idx: int):
+    if month_idx <= 2:  return None
+    elif month_idx <= 6:  return 93
+    elif month_idx <= 12: return 90
+    else:                 return 85
+
+
+# 유지율 보정 계수
+def retention_factor(user_rate: int, standard_rate):
+    if standard_rate is None:
+        return 1.0
+    delta = user_rate - standard_rate
+    if delta >= 0:   return 1.00
+    elif delta > -5: return 0.85
+    else:            return 0.70
+
+
+# 성과수수료 기준율 테이블
+def performance_rate_by_months(months: int, eff: float, rules: Optional[Rules] = None) -> float:
+    return (rules or default_rules()).performance_rate.lookup(months, eff)
+
+
+# 전략건강 건수/단가
+def strategic_count(p: int, rules: Optional[Rules] = None) -> float:
+    return (rules or default_rules()).strategic_count.lookup(p)
+
+
+def per_unit_bonus(cnt: float, rules: Optional[Rules] = None) -> int:
+    return (rules or default_rules()).per_unit_bonus.lookup(cnt)
+
+
+# 직도입 우대 지급률
+def direct_recruit_bonus(direct_recruits: int, rules: Optional[Rules] = None) -> float:
+    return (rules or default_rules()).direct_recruit_bonus.lookup(direct_recruits)
+
+
+# 정착보장 수수료
+def guarantee_amount_base(effP: int, rules: Optional[Rules] = None) -> int:
+    return (rules or default_rules()).guarantee_base.lookup(effP)
+
+
+def direct_recruit_guarantee(direct_recruits: int, rules: Optional[Rules] = None) -> int:
+    return (rules or default_rules()).direct_recruit_guarantee.lookup(direct_recruits)
+
+
+def get_rates(tree: dict, product: str, tpe: str, payyear: str):
+    try:
+        r1, r2, r3 = tree[product][tpe]["rates"][payyear]
+        return float(r1), float(r2), float(r3)
+    except Exception:
+        return 0.0, 0.0, 0.0
+
+
+def contract_rates(c: Contract, tree: dict, rate_store: Optional[RateStore] = None):
+    if rate_store is None:
+        return get_rates(tree, c.product, c.type, c.pay_year)
+    code = c.rate_code if c.rate_code != NO_CODE else rate_store.code(c.product, c.type, c.pay_year)
+    return rate_store.get_rates(code)
+
+
+# =========================
+# 계산 본체
+#   agent_terms: 설계사 단위 지급률/계수 (합계값만 필요)
+#   contract_result: 계약 1건 수수료
+#   finalize: 정착보장 및 익월 합계
+# =========================
+@dataclass(frozen=True)
+class AgentTerms:
+    contract_months: int
+    total_converted_raw: int
+    effective_converted: int
+    base_rate: float
+    std_retention_now: Optional[int]
+    f1: float
+    f13: float
+    f25: float
+    dr_bonus: float
+    perf1_rate: float
+    eligible_init2: bool
+    delta_R: float
+    total_sh_count: float
+    sh_unit: int
+    # 환산 × 지급률 (bp × bp 정수) — (성과1, 성과2, 성과3, 초기정착2-1, 2-2, 2-3)
+    rates_bp2: Tuple[int, int, int, int, int, int] = (0, 0, 0, 0, 0, 0)
+    trace: Tuple[Decision, ...] = ()
+
+
+def fee_rates_bp2(base_rate: float, f1: float, f13: float, f25: float, dr_bonus: float,
+                  delta_R: float) -> Tuple[int, int, int, int, int, int]:
+    # 비율마다 bp 로 반올림한 뒤 곱한다 (곱한 값은 반올림하지 않음)
+    base, delta = money.bp(base_rate), money.bp(delta_R)
+    f1, f13, f25 = money.bp(f1), money.bp(f13), money.bp(f25)
+    perf1 = base * f1 + (money.bp(dr_bonus) * money.BP if base > 0 else 0)
+    return perf1, base * f13, base * f25, delta * f1, delta * f13, delta * f25
+
+
+def agent_terms(profile: AgentProfile, contract_months: int, total_converted_raw: int,
+                total_sh_count: float, rules: Rules) -> AgentTerms:
+    p = profile
+    effective_converted = max(0, total_converted_raw - money.won(p.refund_p))
+    base_rate = performance_rate_by_months(contract_months, effective_converted, rules)
+
+    # 초기정착2 전제조건
+    init2_checks = {
+        "std_activity": not p.std_activity,
+        "tenure": contract_months > 12,
+        "min_converted": effective_converted < INIT2_MIN_CONVERTED,
+    }
+    eligible_init2 = not any(init2_checks.values())
+    # 미대상일 때만 덧붙이는 설명 — 차월/환산 조건은 채웠는데 이미 최대 지급률 (대상이면 이유로 보이지 않는다)
+    init2_checks["max_rate"] = (not eligible_init2 and contract_months <= 12
+                                and effective_converted >= INIT2_MIN_CONVERTED and base_rate >= rules.init2_max_rate)
+    delta_R = max(0.0, rules.init2_max_rate - base_rate) if eligible_init2 else 0.0
+
+    std_now = std_retention(contract_months)
+    f1 = retention_factor(p.retention_1st, std_now)
+    dr_bonus = direct_recruit_bonus(p.direct_recruits, rules)
+    f13 = retention_factor(p.retention_13th, std_retention(13))
+    f25 = retention_factor(p.retention_25th, std_retention(25))
+    sh_unit = per_unit_bonus(total_sh_count, rules)
+
+    trace = (
+        Decision("effective_converted", effective_converted,
+                 {"total_converted_raw": total_converted_raw, "refund_p": p.refund_p}),
+        Decision("performance_rate", base_rate,
+                 {"contract_months": contract_months, "band": rules.performance_rate.band(contract_months),
+                  "effective_converted": effective_converted}, tier=rules.performance_rate.tier(effective_converted)),
+        Decision("retention_factor_1st", f1, {"retention": p.retention_1st, "standard": std_now}),
+        Decision("retention_factor_13th", f13, {"retention": p.retention_13th, "standard": std_retention(13)}),
+        Decision("retention_factor_25th", f25, {"retention": p.retention_25th, "standard": std_retention(25)}),
+        Decision("direct_recruit_bonus", dr_bonus if base_rate > 0 else 0.0,
+                 {"direct_recruits": p.direct_recruits, "base_rate": base_rate},
+                 tier=rules.direct_recruit_bonus.tier(p.direct_recruits)),
+        Decision("init2", delta_R,
+                 {"std_activity": bool(p.std_activity), "contract_months": contract_months,
+                  "effective_converted": effective_converted, "base_rate": base_rate,
+                  "init2_max_rate": rules.init2_max_rate}, failed=_failed("init2", init2_checks)),
+        Decision("per_unit_bonus", sh_unit, {"total_sh_count": total_sh_count},
+                 tier=rules.per_unit_bonus.tier(total_sh_count)),
+    )
+
+    return AgentTerms(
+        contract_months=contract_months,
+        total_converted_raw=total_converted_raw,
+        effective_converted=effective_converted,
+        base_rate=base_rate,
+        std_retention_now=std_now,
+        f1=f1,
+        f13=f13,
+        f25=f25,
+        dr_bonus=dr_bonus,
+        perf1_rate=(base_rate * f1) + (dr_bonus if base_rate > 0 else 0.0),
+        eligible_init2=eligible_init2,
+        delta_R=delta_R,
+        total_sh_count=total_sh_count,
+        sh_unit=sh_unit,
+        rates_bp2=fee_rates_bp2(base_rate, f1, f13, f25, dr_bonus, delta_R),
+        trace=trace,
+    )
+
+
+def contract_result(c: Contract, rates, terms: AgentTerms, sh_flag: bool, rules: Rules) -> ContractResult:
+    premium = money.won(c.premium)
+    y1, y2, y3 = (money.converted(premium, money.pct_bp(r)) for r in rates)
+    p1, p2, p3, i1, i2, i3 = terms.rates_bp2
+    return ContractResult(
+        prod=c.product, type=c.type, pay_year=c.pay_year, premium=premium,
+        recruit_fee=y1,
+        perf1=money.apply_bp2(y1, p1),
+        perf2=money.apply_bp2(y2, p2),
+        perf3=money.apply_bp2(y3, p3),
+        init2_1=money.apply_bp2(y1, i1),
+        init2_2=money.apply_bp2(y2, i2),
+        init2_3=money.apply_bp2(y3, i3),
+        retention1_amt=y2 // 12,
+        retention2_amt=y3 // 12,
+        converted2=y2,
+        converted3=y3,
+        sh_bonus=money.apply_bp(terms.sh_unit, money.bp(strategic_count(premium, rules))) if sh_flag else 0,
+        strategic=sh_flag,
+    )
+
+
+class ContractResults:
+    # 계약별 결과를 컬럼 배열로 보관 — ContractResult 행은 꺼낼 때만 만든다
+    #   상품명/유형/납기 컬럼은 입력 Contract 의 문자열을 그대로 참조
+    __slots__ = ("prod", "type", "pay_year", "premium", "recruit_fee", "perf1", "perf2", "perf3",
+                 "init2_1", "init2_2", "init2_3", "retention1_amt", "retention2_amt", "converted2", "converted3",
+                 "sh_bonus", "strategic")
+
+    def __init__(self, **cols):
+        for k in self.__slots__:
+            setattr(self, k, cols[k])
+
+    @classmethod
+    def empty(cls) -> "ContractResults":
+        z = np.zeros(0, dtype=np.int64)
+        return cls(prod=[], type=[], pay_year=[], strategic=np.zeros(0, dtype=bool),
+                   **{k: z for k in ("premium", "recruit_fee", "perf1", "perf2", "perf3", "init2_1", "init2_2",
+                                     "init2_3", "retention1_amt", "retention2_amt", "converted2", "converted3",
+                                     "sh_bonus")})
+
+    @classmethod
+    def compute(cls, contracts: Sequence[Contract], rates, sh_flag, terms: AgentTerms,
+                rules: Rules) -> "ContractResults":
+        # contract_result 의 배열 버전 — rates: (n, 3) 성적률, sh_flag: 전략건강 여부
+        n = len(contracts)
+        if not n:
+            return cls.empty()
+        premium = money.won(np.fromiter((c.premium for c in contracts), dtype=float, count=n))
+        r = money.pct_bp(np.asarray(rates, dtype=float).reshape(n, 3))
+        sh_flag = np.asarray(sh_flag, dtype=bool)
+        y1, y2, y3 = (money.converted(premium, r[:, k]) for k in range(3))
+        p1, p2, p3, i1, i2, i3 = terms.rates_bp2
+        sh_bonus = money.apply_bp(terms.sh_unit, money.bp(rules.strategic_count.lookup_array(premium)))
+        return cls(
+            prod=[c.product for c in contracts], type=[c.type for c in contracts],
+            pay_year=[c.pay_year for c in contracts], premium=premium,
+            recruit_fee=y1,
+            perf1=money.apply_bp2(y1, p1),
+            perf2=money.apply_bp2(y2, p2),
+            perf3=money.apply_bp2(y3, p3),
+            init2_1=money.apply_bp2(y1, i1),
+            init2_2=money.apply_bp2(y2, i2),
+            init2_3=money.apply_bp2(y3, i3),
+            retention1_amt=y2 // 12,
+            retention2_amt=y3 // 12,
+            converted2=y2,
+            converted3=y3,
+            sh_bonus=np.where(sh_flag, sh_bonus, 0),
+            strategic=sh_flag,
+        )
+
+    def __len__(self) -> int:
+        return len(self.prod)
+
+    def __getitem__(self, i: int) -> ContractResult:
+        return ContractResult(**{k: v[i] if isinstance(v, list) else v[i].item() for k, v in self.columns().items()})
+
+    def __iter__(self):
+        cols = self.columns()
+        names = list(cols)
+        for row in zip(*(v if isinstance(v, list) else v.tolist() for v in cols.values())):
+            yield ContractResult(**dict(zip(names, row)))
+
+    def columns(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def take(self, idx) -> "ContractResults":
+        # 행 순서 바꾸기/고르기 — idx: 정수 인덱스 배열
+        idx = np.asarray(idx, dtype=np.int64)
+        return ContractResults(**{k: [v[i] for i in idx.tolist()] if isinstance(v, list) else v[idx]
+                                  for k, v in self.columns().items()})
+
+    def column(self, name: str) -> np.ndarray:
+        return np.asarray(getattr(self, name))
+
+    def totals(self) -> Tuple[int, int, int, int]:
+        # (모집, 성과1, 초기정착2-1, 전략건강 보너스) 합 — 정수 원이라 합산 순서와 무관하게 계약별 금액의 합과 일치
+        return tuple(int(getattr(self, k).sum()) for k in ("recruit_fee", "perf1", "init2_1", "sh_bonus"))
+
+
+def finalize(profile: AgentProfile, terms: AgentTerms, sum_recruit: int, sum_perf1: int,
+             sum_init2_1: int, sum_sh_bonus: int, rules: Rules,
+             results: Optional["ContractResults"] = None, master_version: str = "") -> CommissionResult:
+    t = terms
+    base_guarantee = guarantee_amount_base(t.effective_converted, rules)
+    add_guarantee = direct_recruit_guarantee(profile.direct_recruits, rules)
+    final_guarantee = base_guarantee + add_guarantee
+
+    cond_ret = (t.std_retention_now is None) or (profile.retention_1st >= t.std_retention_now)
+    settle_checks = {
+        "tenure": t.contract_months > 12,
+        "min_converted": final_guarantee <= 0,
+        "std_activity": not profile.std_activity,
+        "retention": not cond_ret,
+    }
+    eligible_settle = not any(settle_checks.values())
+
+    base_comp = sum_recruit + sum_perf1 + sum_init2_1
+    base_comp_after_refund = max(0, base_comp - money.won(profile.refund_amt))
+    settle_bonus = max(0, final_guarantee - base_comp_after_refund) if eligible_settle else 0
+
+    trace = t.trace + (
+        Decision("guarantee", final_guarantee,
+                 {"effective_converted": t.effective_converted, "base_guarantee": base_guarantee,
+                  "direct_recruits": profile.direct_recruits, "add_guarantee": add_guarantee},
+                 tier=rules.guarantee_base.tier(t.effective_converted)),
+        Decision("settle", settle_bonus,
+                 {"contract_months": t.contract_months, "std_activity": bool(profile.std_activity),
+                  "retention_1st": profile.retention_1st, "standard": t.std_retention_now,
+                  "final_guarantee": final_guarantee, "base_comp": base_comp, "refund_amt": profile.refund_amt},
+                 failed=_failed("settle", settle_checks)),
+    )
+
+    next_month_total = sum_recruit + sum_perf1 + sum_init2_1 + sum_sh_bonus + (settle_bonus if t.contract_months <= 12 else 0)
+
+    return CommissionResult(
+        rules_version=rules.version,
+        contract_months=t.contract_months,
+        total_converted_raw=t.total_converted_raw,
+        effective_converted=t.effective_converted,
+        base_rate=t.base_rate,
+        std_retention_now=t.std_retention_now,
+        f1=t.f1, f13=t.f13, f25=t.f25,
+        dr_bonus=t.dr_bonus,
+        eligible_init2=t.eligible_init2,
+        delta_R=t.delta_R,
+        total_sh_count=t.total_sh_count,
+        sh_unit=t.sh_unit,
+        base_guarantee=base_guarantee,
+        add_guarantee=add_guarantee,
+        final_guarantee=final_guarantee,
+        eligible_settle=eligible_settle,
+        sum_recruit=sum_recruit,
+        sum_perf1=sum_perf1,
+        sum_init2_1=sum_init2_1,
+        sum_sh_bonus=sum_sh_bonus,
+        base_comp=base_comp,
+        settle_bonus=settle_bonus,
+        next_month_total=next_month_total,
+        results=results if results is not None else ContractResults.empty(),
+        master_version=master_version,
+        trace=trace,
+    )
+
+
+def compute_commission(profile: AgentProfile, contracts: Sequence[Contract], tree: dict,
+                       strategic_health: set, as_of: Optional[date] = None,
+                       rules: Optional[Rules] = None, rate_store: Optional[RateStore] = None,
+                       master_version: str = "") -> CommissionResult:
+    as_of = as_of or date.today()
+    rules = rules or default_rules()
+    contract_months = contract_months_between(profile.year, profile.month, as_of)
+
+    rates = [contract_rates(c, tree, rate_store) for c in contracts]
+
+    # 유효환산P 산정(1차년 환산 합 — 계약별 원 미만 절사 후 합산)
+    total_converted_raw = 0
+    for c, (r1, _, _) in zip(contracts, rates):
+        total_converted_raw += money.converted(money.won(c.premium), money.pct_bp(r1))
+
+    # 전략건강 건수
+    total_sh_count = 0.0
+    for c in contracts:
+        if c.product in strategic_health:
+            total_sh_count += strategic_count(c.premium, rules)
+
+    terms = agent_terms(profile, contract_months, total_converted_raw, total_sh_count, rules)
+
+    # 상품별 계산 (컬럼 배열)
+    results = ContractResults.compute(contracts, rates, [c.product in strategic_health for c in contracts], terms, rules)
+    return finalize(profile, terms, *results.totals(), rules, results, master_version)
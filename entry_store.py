@@ -0,0 +1,107 @@
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from engine import Contract
+from rate_store import NO_CODE, RateStore
+
+# =========================
+# 세션별 계약 목록 (컴팩트 저장)
+#   계약 1건 = (entry id, rate_code, 보험료) 정수 3개 — 배열 3개에 나란히 저장 (계약당 20바이트)
+#   상품명/유형/납기 문자열은 RateStore(스냅샷, 모든 세션이 공유)에만 있고 rate_code 로 참조
+#   위젯 키(prod_/type_/payyear_/premium_/del_ + id)는 저장하지 않고 그릴 때 만든다
+#   마스터에 없는 조합(NO_CODE)은 저장하지 않는다 — 음수 코드로 leaf 배열을 읽으면 엉뚱한 상품이 나온다
+# =========================
+def widget_key(kind: str, entry_id: int) -> str:
+    return f"{kind}_{entry_id}"
+
+
+class EntryStore:
+    __slots__ = ("store", "ids", "codes", "premiums", "next_id")
+
+    def __init__(self, store: RateStore):
+        self.store = store            # codes 가 가리키는 RateStore
+        self.ids = array("q")
+        self.codes = array("i")
+        self.premiums = array("q")
+        self.next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __bool__(self) -> bool:
+        return len(self.ids) > 0
+
+    def _names(self, code: int) -> Tuple[str, str, str]:
+        if code == NO_CODE:
+            raise ValueError("마스터에 없는 상품/유형/납기 조합입니다")
+        return self.store.names(code)
+
+    # ── 추가/삭제
+    def append(self, code: int, premium: int = 0) -> int:
+        if code == NO_CODE:
+            raise ValueError("마스터에 없는 상품/유형/납기 조합은 추가할 수 없습니다")
+        self.next_id += 1
+        self.ids.append(self.next_id)
+        self.codes.append(code)
+        self.premiums.append(premium)
+        return self.next_id
+
+    def extend(self, rows: Iterable[Tuple[int, int]]):
+        # rows: (rate_code, 보험료)
+        for code, premium in rows:
+            self.append(code, premium)
+
+    def remove(self, entry_id: int) -> bool:
+        try:
+            i = self.ids.index(entry_id)
+        except ValueError:
+            return False
+        for a in (self.ids, self.codes, self.premiums):
+            del a[i]
+        return True
+
+    # ── 조회/수정 (행 번호 기준)
+    def names(self, i: int) -> Tuple[str, str, str]:
+        return self._names(self.codes[i])
+
+    def set(self, i: int, product: str, tpe: str, pay_year: str, premium: Optional[int] = None):
+        code = self.store.code(product, tpe, pay_year)
+        if code == NO_CODE:
+            raise ValueError(f"마스터에 없는 조합입니다: {product} / {tpe} / {pay_year}")
+        self.codes[i] = code
+        if premium is not None:
+            self.premiums[i] = premium
+
+    def contract(self, i: int) -> Contract:
+        code = self.codes[i]
+        p, t, y = self._names(code)
+        return Contract(p, t, y, self.premiums[i], code)
+
+    def contracts(self) -> Dict[int, Contract]:
+        # entry id → Contract (화면 순서) — IncrementalCalc.sync 입력
+        return {eid: self.contract(i) for i, eid in enumerate(self.ids)}
+
+    # ── 마스터 교체
+    def rebind(self, store: RateStore, tree: dict, sorted_types: dict) -> List[str]:
+        # 새 스냅샷의 코드로 다시 매핑 — 없어진 상품 행은 빼고 그 상품명 목록을 돌려준다
+        # 유형/납기가 없어졌으면 첫 번째 값으로 바꾼다
+        dropped = []
+        ids, codes, premiums = array("q"), array("i"), array("q")
+        for eid, code, premium in zip(self.ids, self.codes, self.premiums):
+            p, t, y = self._names(code)
+            if p not in tree:
+                dropped.append(p)
+                continue
+            if t not in tree[p]:
+                t = sorted_types[p][0]
+            if y not in tree[p][t]["payyears"]:
+                y = tree[p][t]["payyears"][0]
+            new_code = store.code(p, t, y)
+            if new_code == NO_CODE:
+                dropped.append(p)
+                continue
+            ids.append(eid)
+            codes.append(new_code)
+            premiums.append(premium)
+        self.store, self.ids, self.codes, self.premiums = store, ids, codes, premiums
+        return dropped
@@ -0,0 +1,130 @@
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Mapping, Optional, Tuple
+
+import engine
+import money
+from engine import AgentProfile, CommissionResult, Contract, ContractResults
+from rate_store import RateStore
+from tiers import Rules, default_rules
+
+# =========================
+# 증분 계산: 계약 추가/수정/삭제 시 바뀐 계약만 다시 계산
+#   계약별 파생값(y1/y2/y3, 전략건강 건수)은 (상품명, 유형, 납기, 보험료) 키로 캐시
+#   설계사 합계(환산 합, 전략건강 건수)는 누적합을 패치 — 환산은 정수 원이라 오차 누적 없음
+#   성과1/초기정착2-1 은 계약별 절사 후 합이어야 하므로 환산값 히스토그램(값 → 계약 수)으로 합산
+# =========================
+
+
+@dataclass(frozen=True)
+class Derived:
+    rates: Tuple[float, float, float]
+    y1: int                # 1차년 환산 (money.converted, 원 미만 절사)
+    sh_count: float        # 전략건강 상품이 아니면 0
+    strategic: bool
+
+
+class IncrementalCalc:
+    def __init__(self, tree: dict, strategic_health: set, rate_store: Optional[RateStore] = None,
+                 rules: Optional[Rules] = None, cache_size: int = 4096, master_version: str = ""):
+        self.tree = tree
+        self.strategic_health = strategic_health
+        self.rate_store = rate_store
+        self.rules = rules or default_rules()
+        self.cache_size = cache_size
+        self.master_version = master_version
+        self._cache: "OrderedDict[tuple, Derived]" = OrderedDict()
+        self._entries: Dict[int, Tuple[Contract, Derived]] = {}
+        self.hits = self.misses = 0
+        # 누적 합계
+        self.y1_total = 0
+        self.y1_hist: Counter = Counter()  # 환산값 → 계약 수
+        self.sh_hist: Counter = Counter()  # 전략건강 건수 값 → 계약 수
+
+    # ── 계약 단위 파생값 (LRU)
+    def derive(self, c: Contract) -> Derived:
+        key = (c.product, c.type, c.pay_year, c.premium)
+        d = self._cache.get(key)
+        if d is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return d
+        self.misses += 1
+        rates = engine.contract_rates(c, self.tree, self.rate_store)
+        strategic = c.product in self.strategic_health
+        d = Derived(
+            rates=rates,
+            y1=money.converted(money.won(c.premium), money.pct_bp(rates[0])),
+            sh_count=engine.strategic_count(c.premium, self.rules) if strategic else 0.0,
+            strategic=strategic,
+        )
+        self._cache[key] = d
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return d
+
+    def _apply(self, d: Derived, sign: int):
+        self.y1_total += sign * d.y1
+        self.y1_hist[d.y1] += sign
+        if not self.y1_hist[d.y1]:
+            del self.y1_hist[d.y1]
+        if d.strategic:
+            self.sh_hist[d.sh_count] += sign
+            if not self.sh_hist[d.sh_count]:
+                del self.sh_hist[d.sh_count]
+
+    # ── 패치
+    def upsert(self, entry_id: int, c: Contract) -> bool:
+        old = self._entries.get(entry_id)
+        if old is not None and old[0] == c:
+            return False
+        d = self.derive(c)
+        if old is not None:
+            self._apply(old[1], -1)
+        self._apply(d, +1)
+        self._entries[entry_id] = (c, d)
+        return True
+
+    def remove(self, entry_id: int) -> bool:
+        old = self._entries.pop(entry_id, None)
+        if old is None:
+            return False
+        self._apply(old[1], -1)
+        return True
+
+    def sync(self, contracts: Mapping[int, Contract]) -> int:
+        # 현재 계약 목록(entry id → Contract, 화면 순서)과 맞추고 패치 건수를 돌려준다
+        patched = sum(self.remove(eid) for eid in [i for i in self._entries if i not in contracts])
+        for eid, c in contracts.items():
+            patched += self.upsert(eid, c)
+        if list(self._entries) != list(contracts):
+            self._entries = {eid: self._entries[eid] for eid in contracts}
+        return patched
+
+    # ── 합계
+    @property
+    def total_converted_raw(self) -> int:
+        return self.y1_total
+
+    @property
+    def total_sh_count(self) -> float:
+        return float(sum(v * n for v, n in self.sh_hist.items()))
+
+    def evaluate(self, profile: AgentProfile, as_of: Optional[date] = None, detail: bool = False) -> CommissionResult:
+        # 합계는 히스토그램 크기(서로 다른 환산값 수)에 비례; detail=True 일 때만 계약별 결과를 만든다(캐시된 요율 사용)
+        rules = self.rules
+        months = engine.contract_months_between(profile.year, profile.month, as_of or date.today())
+        terms = engine.agent_terms(profile, months, self.total_converted_raw, self.total_sh_count, rules)
+
+        p1, _, _, i1, _, _ = terms.rates_bp2
+        sum_perf1 = sum(n * money.apply_bp2(v, p1) for v, n in self.y1_hist.items())
+        sum_init2_1 = sum(n * money.apply_bp2(v, i1) for v, n in self.y1_hist.items())
+        sum_sh_bonus = sum(n * money.apply_bp(terms.sh_unit, money.bp(v)) for v, n in self.sh_hist.items())
+        results = None
+        if detail:
+            entries = list(self._entries.values())
+            results = ContractResults.compute([c for c, _ in entries], [d.rates for _, d in entries],
+                                              [d.strategic for _, d in entries], terms, rules)
+        return engine.finalize(profile, terms, self.y1_total, sum_perf1, sum_init2_1,
+                               sum_sh_bonus, rules, results, self.master_version)
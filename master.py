@@ -0,0 +1,143 @@
+import os
+import re
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+# =========================
+# 상품 마스터 로드 (UI 비의존)
+# =========================
+MASTER_CSV_PATH = "./data/product_master.csv"
+STRATEGIC_FLAGS = ["Y", "YES", "1", "TRUE"]
+
+
+def load_products_tree_from_csv(path: str):
+    if not os.path.exists(path):
+        return None, None, None  # TREE, DF, STRATEGIC
+    # 인코딩 가변 처리
+    with open(path, "rb") as f:
+        data_bytes = f.read()
+    try:
+        raw = data_bytes.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raw = data_bytes.decode("cp949")
+
+    df = pd.read_csv(StringIO(raw))
+    # 컬럼 정규화
+    def _norm(c: str) -> str:
+        k = c.strip().lower().replace(" ", "")
+        mapping = {
+            "상품명": ["상품명", "product", "상품"],
+            "유형": ["유형", "type", "상품유형"],
+            "납기": ["납기", "납입", "납입년도", "payyears", "납입년수"],
+            "1차년성적률": ["1차년성적률", "성적률1", "rate1", "yr1", "y1"],
+            "2차년성적률": ["2차년성적률", "성적률2", "rate2", "yr2", "y2"],
+            "3차년성적률": ["3차년성적률", "성적률3", "rate3", "yr3", "y3"],
+            "전략건강여부": ["전략건강여부", "전략건강", "strategic", "strategic_health", "sh"],
+        }
+        for std, alts in mapping.items():
+            if k in [a.lower().replace(" ", "") for a in alts]:
+                return std
+        return c
+    df = df.rename(columns={c: _norm(c) for c in df.columns})
+
+    req = {"상품명", "유형", "납기", "1차년성적률", "2차년성적률", "3차년성적률", "전략건강여부"}
+    if not req.issubset(set(df.columns)):
+        return None, None, None
+
+    # 정제
+    df["상품명"] = df["상품명"].astype(str).str.strip()
+    df["유형"] = df["유형"].astype(str).str.strip()
+    df["납기"] = df["납기"].astype(str).str.strip()
+    for col in ["1차년성적률", "2차년성적률", "3차년성적률"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(float)
+    df["전략건강여부"] = df["전략건강여부"].astype(str).str.upper().str.strip()
+
+    PRODUCTS_TREE = build_products_tree(df)
+    STRATEGIC_HEALTH = strategic_products(df)
+
+    return PRODUCTS_TREE, df, STRATEGIC_HEALTH
+
+
+# =========================
+# 평탄화 요율 테이블 (상품명, 유형, 납기 1행 = 1요율)
+# =========================
+RATE_COLUMNS = ["product", "type", "pay_year", "r1", "r2", "r3"]
+_PAY_SPLIT = re.compile(r"[,\s/]+")
+
+
+def _rate_codes(df: pd.DataFrame):
+    # 상품명/유형/납기를 정수 코드로 바꿔 납기 분할·중복 제거를 배열 연산으로 처리
+    p_codes, p_names = pd.factorize(df["상품명"], use_na_sentinel=False)
+    t_codes, t_names = pd.factorize(df["유형"], use_na_sentinel=False)
+    raw_codes, raw_pays = pd.factorize(df["납기"], use_na_sentinel=False)
+
+    # 납기 분할은 고유값에 대해서만 (빈 결과는 "기타")
+    parts = [[x for x in _PAY_SPLIT.split("" if pd.isna(u) else str(u)) if x] or ["기타"] for u in raw_pays]
+    y_codes_u, y_names = pd.factorize(pd.Index([x for p in parts for x in p]))
+    part_cnt = np.fromiter((len(p) for p in parts), dtype=np.int64, count=len(parts))
+    part_start = np.concatenate(([0], np.cumsum(part_cnt)[:-1]))
+
+    cnt = part_cnt[raw_codes]
+    src = np.repeat(np.arange(len(df)), cnt)
+    within = np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+    y_codes = y_codes_u[np.repeat(part_start[raw_codes], cnt) + within]
+    p, t = p_codes[src], t_codes[src]
+
+    # 동일 키는 마지막 행 우선 (트리의 rates[py] 덮어쓰기와 동일)
+    key = (p.astype(np.int64) * len(t_names) + t) * len(y_names) + y_codes
+    keep = ~pd.Series(key).duplicated(keep="last").to_numpy()
+    return p[keep], t[keep], y_codes[keep], src[keep], p_names, t_names, y_names, (p_codes, t_codes)
+
+
+def rate_table(df: pd.DataFrame) -> pd.DataFrame:
+    p, t, y, src, p_names, t_names, y_names, _ = _rate_codes(df)
+    return pd.DataFrame({
+        "product": p_names.take(p),
+        "type": t_names.take(t),
+        "pay_year": y_names.take(y),
+        "r1": df["1차년성적률"].to_numpy()[src],
+        "r2": df["2차년성적률"].to_numpy()[src],
+        "r3": df["3차년성적률"].to_numpy()[src],
+    }, columns=RATE_COLUMNS)
+
+
+def strategic_products(df: pd.DataFrame) -> set:
+    mask = df["전략건강여부"].isin(STRATEGIC_FLAGS)
+    return set(df.loc[mask, "상품명"])
+
+
+def build_products_tree(df: pd.DataFrame) -> dict:
+    # 상품명 → 유형 → {payyears(길이·사전순), rates{납기: (r1, r2, r3)}, strategic}
+    p, t, y, src, p_names, t_names, y_names, (row_p, row_t) = _rate_codes(df)
+    y_rank = np.empty(len(y_names), dtype=np.int64)
+    y_rank[sorted(range(len(y_names)), key=lambda i: (len(y_names[i]), y_names[i]))] = np.arange(len(y_names))
+
+    order = np.lexsort((y_rank[y], t, p))
+    p, t, y, src = p[order], t[order], y[order], src[order]
+
+    # (상품명, 유형) 중 원본 행 하나라도 Y 면 전략건강 (덮어쓴 행 포함)
+    sh_rows = df["전략건강여부"].isin(STRATEGIC_FLAGS).to_numpy()
+    sh_keys = np.unique(row_p[sh_rows].astype(np.int64) * len(t_names) + row_t[sh_rows])
+    pys = y_names.take(y).tolist()
+    rates = list(zip(df["1차년성적률"].to_numpy()[src].tolist(),
+                     df["2차년성적률"].to_numpy()[src].tolist(),
+                     df["3차년성적률"].to_numpy()[src].tolist()))
+
+    # (상품명, 유형) 그룹 경계
+    n = len(p)
+    cut = np.flatnonzero((p[1:] != p[:-1]) | (t[1:] != t[:-1])) + 1
+    starts = np.concatenate(([0], cut)).astype(np.int64)
+    ends = np.concatenate((cut, [n])).astype(np.int64)
+    strategic = np.isin(p[starts].astype(np.int64) * len(t_names) + t[starts], sh_keys).tolist() if n else []
+
+    tree = {}
+    names, tnames = p_names.take(p[starts]).tolist(), t_names.take(t[starts]).tolist()
+    for s, e, name, tpe, flag in zip(starts.tolist(), ends.tolist(), names, tnames, strategic):
+        tree.setdefault(name, {})[tpe] = {
+            "payyears": pys[s:e],
+            "rates": dict(zip(pys[s:e], rates[s:e])),
+            "strategic": bool(flag),
+        }
+    return tree
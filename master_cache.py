@@ -0,0 +1,113 @@
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+
+import master
+import metrics
+
+# =========================
+# 상품 마스터 디스크 캐시 (product_master.csv.cache)
+#   레이아웃: MAGIC | 헤더 길이(8바이트) | 헤더 JSON | pickle(TREE, DF, STRATEGIC)
+#   헤더 키: 원본 경로 · mtime · 크기 · sha256 (+ pandas 버전) — mtime/크기가 달라도 내용 해시가 같으면 재사용
+# =========================
+CACHE_FORMAT = 1
+MAGIC = b"DBLMC\x00\x01\n"
+_LEN = struct.Struct(">Q")
+
+
+def cache_path_for(csv_path: str) -> str:
+    return csv_path + ".cache"
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _source_meta(path: str, sha256: str = None) -> dict:
+    st = os.stat(path)
+    return {
+        "format": CACHE_FORMAT,
+        "pandas": master.pd.__version__,
+        "source": os.path.abspath(path),
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "sha256": sha256 or file_sha256(path),
+    }
+
+
+def read_cache(cache_path: str):
+    # (헤더, (TREE, DF, STRATEGIC)) — 파일이 없거나 깨졌으면 None
+    try:
+        with open(cache_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[:len(MAGIC)] != MAGIC:
+                    return None
+                start = len(MAGIC) + _LEN.size
+                (hlen,) = _LEN.unpack(mm[len(MAGIC):start])
+                header = json.loads(mm[start:start + hlen].decode("utf-8"))
+                with memoryview(mm) as view, view[start + hlen:] as body:
+                    payload = pickle.loads(body)
+        return header, payload
+    except Exception:  # 손상/버전 불일치 캐시는 무시하고 재생성
+        return None
+
+
+def write_cache(cache_path: str, header: dict, payload) -> bool:
+    head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(_LEN.pack(len(head)))
+            f.write(head)
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache_path)  # 교체는 원자적으로
+        return True
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return False
+
+
+def _freshness(header: dict, path: str) -> str:
+    # "stat": mtime/크기 일치, "hash": 내용만 일치(헤더 갱신 필요), "": 재생성 필요
+    if (header.get("format") != CACHE_FORMAT or header.get("pandas") != master.pd.__version__
+            or header.get("source") != os.path.abspath(path)):
+        return ""
+    st = os.stat(path)
+    if header.get("mtime_ns") == st.st_mtime_ns and header.get("size") == st.st_size:
+        return "stat"
+    return "hash" if header.get("sha256") == file_sha256(path) else ""
+
+
+def load_products_master(path: str, cache_path: str = None):
+    # 캐시가 유효하면 pandas 파싱 없이 복원, 아니면 CSV 파싱 후 캐시 재생성
+    if not os.path.exists(path):
+        return None, None, None
+    cache_path = cache_path or cache_path_for(path)
+
+    hit = read_cache(cache_path)
+    if hit is not None:
+        fresh = _freshness(hit[0], path)
+        if fresh == "hash":
+            write_cache(cache_path, _source_meta(path, hit[0]["sha256"]), hit[1])
+        if fresh:
+            metrics.incr("master_cache_total", result="hit" if fresh == "stat" else "rehash")
+            return hit[1]
+
+    metrics.incr("master_cache_total", result="miss")
+    meta = _source_meta(path)
+    with metrics.timer("master_csv_parse"):
+        tree, df, strategic = master.load_products_tree_from_csv(path)
+    if tree:
+        write_cache(cache_path, meta, (tree, df, strategic))
+    return tree, df, strategic
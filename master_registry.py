@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import pandas as pd
+
+import master
+import master_cache
+import metrics
+from product_search import ProductIndex
+from rate_store import RateStore
+
+# =========================
+# 상품 마스터 스냅샷 + 핫 리로드
+#   스냅샷은 불변 — 계산은 시작할 때 registry.current() 를 한 번 잡고 끝까지 그 스냅샷을 쓴다
+#   감시 스레드가 파일(mtime/크기 → 내용 해시)을 확인해 새 스냅샷을 만든 뒤 참조를 원자적으로 교체
+#   version = 파일 내용 sha256 앞 12자리 (결과에 master_version 으로 기록)
+# =========================
+WATCH_INTERVAL = 2.0
+
+
+@dataclass(frozen=True)
+class MasterSnapshot:
+    version: str
+    path: str
+    loaded_at: float
+    tree: dict = field(repr=False)
+    df: pd.DataFrame = field(repr=False)
+    strategic: frozenset = field(repr=False)
+    rate_store: RateStore = field(repr=False)
+    search: ProductIndex = field(repr=False)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["MasterSnapshot"]:
+        # 읽는 도중 파일이 바뀌면(해시 불일치) 다시 읽는다
+        for _ in range(3):
+            if not os.path.exists(path):
+                return None
+            before = master_cache.file_sha256(path)
+            tree, df, strategic = master_cache.load_products_master(path)
+            if not tree:
+                return None
+            if master_cache.file_sha256(path) == before:
+                return cls(before[:12], path, time.time(), tree, df, frozenset(strategic),
+                           RateStore.from_master_df(df), ProductIndex.from_tree(tree))
+        raise RuntimeError(f"상품 마스터가 계속 변경되고 있습니다: {path}")
+
+
+class MasterRegistry:
+    def __init__(self, path: str = master.MASTER_CSV_PATH, interval: float = WATCH_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.last_error: Optional[str] = None
+        self.swaps = 0
+        self._snapshot: Optional[MasterSnapshot] = None
+        self._stat = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def current(self) -> Optional[MasterSnapshot]:
+        snap = self._snapshot
+        if snap is None:
+            self.refresh()
+            snap = self._snapshot
+        return snap
+
+    @property
+    def version(self) -> Optional[str]:
+        snap = self._snapshot
+        return snap.version if snap else None
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def refresh(self) -> bool:
+        # 파일이 바뀌었으면 새 스냅샷으로 교체하고 True — 읽기 실패 시 기존 스냅샷 유지
+        with self._lock:
+            stat = self._file_stat()
+            if stat is None or (stat == self._stat and self._snapshot is not None):
+                return False
+            try:
+                if self._snapshot is not None and master_cache.file_sha256(self.path)[:12] == self._snapshot.version:
+                    self._stat = stat  # touch 등 내용 변화 없음
+                    return False
+                with metrics.timer("master_snapshot_load"):
+                    snap = MasterSnapshot.load(self.path)
+            except Exception as e:  # 배포 중 깨진 파일 등 — 다음 주기에 다시 시도
+                self.last_error = f"{type(e).__name__}: {e}"
+                metrics.incr("master_reload_total", result="error")
+                return False
+            if snap is None:
+                return False
+            self._stat = stat
+            self.last_error = None
+            if self._snapshot is not None:
+                self.swaps += 1
+                metrics.incr("master_reload_total", result="swap")
+            self._snapshot = snap  # 참조 교체 한 번 — 진행 중인 계산은 이전 스냅샷을 계속 사용
+            return True
+
+    # ── 감시 스레드
+    def start(self) -> "MasterRegistry":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, name="master-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
@@ -0,0 +1,246 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+# =========================
+# 성능 계측 (opt-in)
+#   DBLIFE_METRICS=1            켜기 (꺼져 있으면 timer/incr 는 바로 반환)
+#   DBLIFE_METRICS_TRACEMALLOC=1  tracemalloc 메모리 스냅샷
+#   DBLIFE_METRICS_PORT=9109    Prometheus 텍스트 엔드포인트(/metrics) 백그라운드 서버
+#   단계 타이머 · 카운터 · 게이지 → JSON 로그(logger "dblife.metrics") 또는 Prometheus 텍스트
+# =========================
+PREFIX = "dblife_"
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+log = logging.getLogger("dblife.metrics")
+
+_lock = threading.Lock()
+_enabled = False
+_counters: Dict[Tuple[str, tuple], float] = {}
+_gauges: Dict[Tuple[str, tuple], float] = {}
+_timers: Dict[str, list] = {}     # 단계 → [count, sum, max, 버킷별 count...]
+_local = threading.local()        # 현재 실행(rerun/요청)의 단계별 시간
+_server = None
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(trace_memory: bool = False, port: Optional[int] = None):
+    global _enabled
+    _enabled = True
+    if not log.handlers:
+        h = logging.StreamHandler(sys.stderr)
+        h.setFormatter(logging.Formatter("%(message)s"))
+        log.addHandler(h)
+        log.setLevel(logging.INFO)
+        log.propagate = False
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if port:
+        serve_prometheus(port)
+
+
+def _key(name: str, labels: dict) -> Tuple[str, tuple]:
+    return name, tuple(sorted(labels.items()))
+
+
+# =========================
+# 카운터 · 게이지 · 타이머
+# =========================
+def incr(name: str, n: float = 1, **labels):
+    if not _enabled:
+        return
+    k = _key(name, labels)
+    with _lock:
+        _counters[k] = _counters.get(k, 0) + n
+
+
+def gauge(name: str, value: float, **labels):
+    if not _enabled:
+        return
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(stage: str, seconds: float):
+    if not _enabled:
+        return
+    with _lock:
+        t = _timers.get(stage)
+        if t is None:
+            t = _timers[stage] = [0, 0.0, 0.0] + [0] * len(BUCKETS)
+        t[0] += 1
+        t[1] += seconds
+        t[2] = max(t[2], seconds)
+        for i, b in enumerate(BUCKETS):
+            if seconds <= b:
+                t[3 + i] += 1
+    run = getattr(_local, "run", None)
+    if run is not None:
+        run["stages"][stage] = run["stages"].get(stage, 0.0) + seconds
+
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.t0 = time.perf_counter()
+
+    def stop(self) -> float:
+        dt = time.perf_counter() - self.t0
+        observe(self.name, dt)
+        return dt
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def stop(self) -> float:
+        return 0.0
+
+
+_NO_STAGE = _NoStage()
+
+
+def start(stage: str):
+    # 긴 구간용: s = metrics.start("render") ... s.stop()
+    return _Stage(stage) if _enabled else _NO_STAGE
+
+
+@contextmanager
+def timer(stage: str):
+    s = start(stage)
+    try:
+        yield
+    finally:
+        s.stop()
+
+
+# =========================
+# 실행 단위 기록 (Streamlit rerun 1회, API 배치 1회 등)
+# =========================
+def begin_run(kind: str, **fields):
+    if not _enabled:
+        _local.run = None
+        return
+    _local.run = {"event": kind, "ts": time.time(), "t0": time.perf_counter(), "stages": {}, **fields}
+
+
+def end_run(**fields) -> Optional[dict]:
+    # 실행 요약을 JSON 한 줄로 로그하고 돌려준다
+    run = getattr(_local, "run", None)
+    _local.run = None
+    if run is None or not _enabled:
+        return None
+    total = time.perf_counter() - run.pop("t0")
+    observe(run["event"], total)
+    run.update(fields, total=round(total, 6), stages={k: round(v, 6) for k, v in run["stages"].items()})
+    mem = memory()
+    if mem:
+        run["memory"] = mem
+    log.info(json.dumps(run, ensure_ascii=False, default=str))
+    return run
+
+
+# =========================
+# 메모리
+# =========================
+def memory(top: int = 0) -> dict:
+    out = {}
+    try:
+        import resource
+        out["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:  # Windows
+        pass
+    if tracemalloc.is_tracing():
+        cur, peak = tracemalloc.get_traced_memory()
+        out.update(traced_bytes=cur, traced_peak_bytes=peak)
+        if top:
+            stats = tracemalloc.take_snapshot().statistics("lineno")[:top]
+            out["top"] = [{"where": str(s.traceback), "bytes": s.size, "count": s.count} for s in stats]
+    return out
+
+
+# =========================
+# 내보내기
+# =========================
+def snapshot() -> dict:
+    with _lock:
+        timers = {k: {"count": v[0], "sum": v[1], "max": v[2]} for k, v in _timers.items()}
+        counters = {_fmt(k): v for k, v in _counters.items()}
+        gauges = {_fmt(k): v for k, v in _gauges.items()}
+    return {"timers": timers, "counters": counters, "gauges": gauges, "memory": memory()}
+
+
+def _fmt(key: Tuple[str, tuple]) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels) + "}"
+
+
+def prometheus_text() -> str:
+    lines = []
+    with _lock:
+        counters, gauges = dict(_counters), dict(_gauges)
+        timers = {k: list(v) for k, v in _timers.items()}
+    for (name, labels), v in sorted(counters.items()):
+        lines.append(f"{PREFIX}{_fmt((name, labels))} {v}")
+    for (name, labels), v in sorted(gauges.items()):
+        lines.append(f"{PREFIX}{_fmt((name, labels))} {v}")
+    if timers:
+        lines.append(f"# TYPE {PREFIX}stage_seconds histogram")
+    for stage, t in sorted(timers.items()):
+        for b, n in zip(BUCKETS, t[3:]):
+            lines.append(f'{PREFIX}stage_seconds_bucket{{stage="{stage}",le="{b}"}} {n}')
+        lines.append(f'{PREFIX}stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {t[0]}')
+        lines.append(f'{PREFIX}stage_seconds_sum{{stage="{stage}"}} {t[1]:.6f}')
+        lines.append(f'{PREFIX}stage_seconds_count{{stage="{stage}"}} {t[0]}')
+    for k, v in memory().items():
+        lines.append(f"{PREFIX}memory_{k} {v}")
+    return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(port: int, host: str = "127.0.0.1"):
+    # Streamlit 처럼 HTTP 라우트를 못 붙이는 프로세스용 — /metrics 만 응답하는 데몬 스레드
+    global _server
+    if _server is not None:
+        return _server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        _server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:  # 다른 프로세스가 이미 사용 중
+        log.warning(json.dumps({"event": "metrics_server_error", "port": port, "error": str(e)}))
+        return None
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
+
+
+if os.environ.get("DBLIFE_METRICS", "").lower() in ("1", "true", "yes"):
+    enable(trace_memory=os.environ.get("DBLIFE_METRICS_TRACEMALLOC", "") in ("1", "true", "yes"),
+           port=int(os.environ.get("DBLIFE_METRICS_PORT", "0") or 0))
@@ -0,0 +1,59 @@
+import numpy as np
+
+# =========================
+# 고정소수점 금액 연산 (정수 원 · bp)
+#   금액: 정수 원 (스칼라는 int, 배열은 int64)
+#   비율: bp 정수 (1.0 = 10,000bp) — 지급률/유지율 계수/직도입 우대 등
+#   비율 × 비율: 1e-8 단위 정수 (bp × bp) — 곱한 지급률을 반올림 없이 보관
+#   성적률(%)도 bp: 312.5% → 31,250bp (= 3.125)
+#   반올림 규칙: 계약별 금액은 모두 원 미만 절사(floor) 후 합산 → 합계 = 계약별 금액의 합 (항상 일치)
+#     환산(y1/y2/y3) = floor(보험료 × 성적률), 수수료 = floor(절사된 환산 × 지급률), 유지수수료 = floor(y / 12)
+#   int64 한도: 금액 × (bp × bp) < 9.2e18 → 계약당 환산 약 800억원까지
+# =========================
+BP = 10_000
+BP2 = BP * BP
+
+
+def bp(x):
+    # 비율(float) → bp (가장 가까운 정수)
+    if np.ndim(x) == 0:
+        return int(round(float(x) * BP))
+    return np.rint(np.asarray(x, dtype=float) * BP).astype(np.int64)
+
+
+def pct_bp(rate_pct):
+    # 성적률(%) → bp
+    if np.ndim(rate_pct) == 0:
+        return int(round(float(rate_pct) * (BP / 100)))
+    return np.rint(np.asarray(rate_pct, dtype=float) * (BP / 100)).astype(np.int64)
+
+
+def won(x):
+    # 입력 금액(보험료 등) → 정수 원 (원 미만 절사)
+    if np.ndim(x) == 0:
+        return int(np.floor(x))
+    x = np.asarray(x)
+    if x.dtype.kind in "iub":
+        return x.astype(np.int64)
+    return np.floor(x.astype(float)).astype(np.int64)
+
+
+def converted(premium, rate_bp):
+    # 보험료 × 성적률 → 환산 (원 미만 절사)
+    return premium * rate_bp // BP
+
+
+def apply_bp(amount, rate_bp):
+    return amount * rate_bp // BP
+
+
+def apply_bp2(amount, rate_bp2):
+    # 금액 × (bp × bp) 지급률 (원 미만 절사)
+    return amount * rate_bp2 // BP2
+
+
+def sum_by(idx: np.ndarray, values: np.ndarray, n: int) -> np.ndarray:
+    # 그룹별 정수 합 (bincount 는 float64 가중치라 큰 금액에서 오차 가능)
+    out = np.zeros(n, dtype=np.int64)
+    np.add.at(out, idx, np.asarray(values, dtype=np.int64))
+    return out
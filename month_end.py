@@ -0,0 +1,169 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import batch
+import master
+from master_registry import MasterSnapshot
+from tiers import RULES_PATH, default_rules
+
+# =========================
+# 월말 일괄 정산 CLI
+#   python -m month_end --contracts contracts.csv --agents agents.csv --out out/ [--workers 8] [--format csv]
+#   설계사를 샤드로 나눠 프로세스 풀에서 batch.settle_batch 실행 (상품 마스터는 프로세스당 1회 로드)
+#   결과: <out>/contracts/part-00000.<ext>, <out>/agents/part-00000.<ext>
+#   기본 형식은 csv — parquet 은 pyarrow(또는 fastparquet)가 설치된 경우에만 (--format parquet)
+#   입력 검증(필수 컬럼, 중복/없는 agent, 보험료)은 샤드로 나누기 전에 — 오류는 행 번호/agent 를 밝혀 ValueError
+# =========================
+FORMATS = ("csv", "parquet")
+
+_WORKER = {}  # 프로세스별 (snapshot, rules)
+
+
+def read_table(path) -> pd.DataFrame:
+    # path: 파일 경로 또는 name 속성이 있는 파일 객체 (Streamlit 업로드)
+    ext = os.path.splitext(getattr(path, "name", path))[1].lower()
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    if ext in (".xlsx", ".xls"):
+        return pd.read_excel(path)
+    try:
+        return pd.read_csv(path, encoding="utf-8-sig")
+    except UnicodeDecodeError:
+        if hasattr(path, "seek"):
+            path.seek(0)
+        return pd.read_csv(path, encoding="cp949")
+
+
+def write_table(df: pd.DataFrame, path: str, fmt: str):
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def shard_agents(agents: pd.DataFrame, contracts: pd.DataFrame, shards: int) -> List[Tuple[pd.DataFrame, pd.DataFrame]]:
+    # 계약 수 기준으로 균등하게: 계약 많은 설계사부터 가장 가벼운 샤드에 배정
+    agent_index = pd.Index(agents["agent"])
+    aidx = agent_index.get_indexer(contracts["agent"])
+    load = np.bincount(aidx[aidx >= 0], minlength=len(agents)) + 1
+    shard_of = np.empty(len(agents), dtype=np.int64)
+    totals = np.zeros(shards, dtype=np.int64)
+    for i in np.argsort(-load, kind="stable"):
+        s = int(np.argmin(totals))
+        shard_of[i] = s
+        totals[s] += load[i]
+
+    contract_shard = np.where(aidx >= 0, shard_of[np.maximum(aidx, 0)], -1)
+    return [(agents[shard_of == s], contracts[contract_shard == s]) for s in range(shards) if (shard_of == s).any()]
+
+
+def _init_worker(master_path: str, rules_path: str):
+    snap = MasterSnapshot.load(master_path)
+    if snap is None:
+        raise FileNotFoundError(f"상품 마스터 파일이 없습니다: {master_path}")
+    _WORKER.update(snapshot=snap, rules=default_rules(rules_path))
+
+
+def _run_shard(task) -> Tuple[int, int, int]:
+    part, agents, contracts, as_of, out_dir, fmt = task
+    snap = _WORKER["snapshot"]
+    out, summary = batch.settle_batch(contracts, agents, snap.df, as_of, _WORKER["rules"], snap.rate_store,
+                                      snap.version)
+    write_table(out, os.path.join(out_dir, "contracts", f"part-{part:05d}.{fmt}"), fmt)
+    write_table(summary, os.path.join(out_dir, "agents", f"part-{part:05d}.{fmt}"), fmt)
+    return part, len(summary), len(out)
+
+
+def run(contracts: pd.DataFrame, agents: pd.DataFrame, out_dir: str, as_of: Optional[date] = None,
+        master_path: str = master.MASTER_CSV_PATH, rules_path: str = RULES_PATH, fmt: str = "csv",
+        workers: Optional[int] = None, shards: Optional[int] = None) -> Tuple[int, int]:
+    # 반환: (설계사 수, 계약 수)
+    as_of = as_of or date.today()
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers * 4
+
+    missing = [c for c in batch.CONTRACT_COLUMNS if c not in contracts]
+    if missing:
+        raise ValueError(f"계약 파일에 필수 컬럼이 없습니다: {', '.join(missing)}")
+    missing = [c for c in ("agent", "year", "month") if c not in agents]
+    if missing:
+        raise ValueError(f"설계사 파일에 필수 컬럼이 없습니다: {', '.join(missing)}")
+    dup = agents["agent"].duplicated()
+    if dup.any():
+        raise ValueError(f"설계사 파일에 중복된 agent 가 있습니다: {agents.loc[dup, 'agent'].unique()[:5].tolist()}")
+    unknown = ~contracts["agent"].isin(agents["agent"])
+    if unknown.any():
+        raise ValueError(f"설계사 입력에 없는 agent 의 계약이 있습니다: {contracts.loc[unknown, 'agent'].unique()[:5].tolist()}")
+    # 보험료: 빈 칸 · 숫자 아님 · 무한대 · 음수는 거절 (NaN 은 money.won 에서 INT64_MIN 이 되어 합계를 망친다)
+    premium = pd.to_numeric(contracts["premium"], errors="coerce")
+    bad = ~np.isfinite(premium.to_numpy(float)) | (premium < 0).to_numpy()
+    if bad.any():
+        rows = (np.flatnonzero(bad) + 2).tolist()  # 헤더 다음 행 = 2행
+        raise ValueError(f"계약 파일의 보험료가 비었거나 0 이상의 숫자가 아닙니다 ({len(rows):,}건): "
+                         f"{', '.join(f'{r}행' for r in rows[:10])}" + (" ..." if len(rows) > 10 else ""))
+    contracts = contracts.assign(premium=premium)
+
+    for sub in ("contracts", "agents"):
+        os.makedirs(os.path.join(out_dir, sub), exist_ok=True)
+    tasks = [(i, a, c, as_of, out_dir, fmt) for i, (a, c) in enumerate(shard_agents(agents, contracts, shards))]
+
+    n_agents = n_contracts = 0
+    if workers == 1:
+        _init_worker(master_path, rules_path)
+        done = map(_run_shard, tasks)
+    else:
+        pool = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(master_path, rules_path))
+        done = pool.map(_run_shard, tasks)
+    try:
+        for _, na, nc in done:
+            n_agents += na
+            n_contracts += nc
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    return n_agents, n_contracts
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m month_end", description="월말 수수료 일괄 정산")
+    ap.add_argument("--contracts", required=True, help="계약 파일 (agent, product, type, pay_year, premium)")
+    ap.add_argument("--agents", required=True, help="설계사 파일 (agent, year, month, std_activity, retention_*, refund_*, direct_recruits)")
+    ap.add_argument("--out", required=True, help="결과 디렉터리")
+    ap.add_argument("--as-of", type=lambda s: datetime.strptime(s, "%Y-%m-%d").date(), default=None,
+                    help="정산 기준일 YYYY-MM-DD (기본: 오늘)")
+    ap.add_argument("--master", default=master.MASTER_CSV_PATH)
+    ap.add_argument("--rules", default=RULES_PATH)
+    ap.add_argument("--format", choices=FORMATS, default="csv", help="결과 형식 (parquet 은 pyarrow 필요)")
+    ap.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: CPU 수)")
+    ap.add_argument("--shards", type=int, default=None, help="샤드 수 (기본: workers × 4)")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    try:
+        contracts = read_table(args.contracts)
+        agents = read_table(args.agents)
+        n_agents, n_contracts = run(contracts, agents, args.out, args.as_of, args.master, args.rules,
+                                    args.format, args.workers, args.shards)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 1
+    except BrokenProcessPool as e:
+        # 작업 프로세스 준비(_init_worker: 마스터/규칙 로드) 실패 또는 비정상 종료
+        print(f"오류: 작업 프로세스가 중단되었습니다 — 상품 마스터({args.master}) · 규칙({args.rules}) 파일을 "
+              f"확인하세요 ({e})", file=sys.stderr)
+        return 1
+    print(f"설계사 {n_agents:,}명 · 계약 {n_contracts:,}건 정산 완료 ({time.perf_counter() - t0:.1f}초) → {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
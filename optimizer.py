@@ -0,0 +1,253 @@
+import itertools
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import batch
+import engine
+import money
+from engine import AgentProfile, CommissionResult, Contract
+from rate_store import NO_CODE, RateStore
+from tiers import Rules, default_rules
+
+# =========================
+# 보험료 배분 최적화 (what-if)
+#   익월 합계는 구간값(계단) 함수라 보험료를 1원씩 늘려 보는 대신 구간 경계만 후보로 본다
+#   - 전략건강 계약: 보험료가 strategic_count 경계(3만/5만)일 때만 의미 있음 → 경계별 계약 수 조합만 열거
+#     같은 경계 조합이면 1차년 성적률(r1)이 높은 후보에 높은 경계를 배정 (환산 손실 최소)
+#   - 나머지 예산: 같은 계약 구성에서 익월 합계는 환산 합에 대해 비감소 → 전액을 r1 최대 후보에 배정
+#   - 후보 배분 전체를 batch.settle_arrays 한 번으로 평가 (기존 계약 행은 배분마다 반복 — 계약별 절사라 합쳐 넣으면 달라짐)
+#   상위 배분마다 다음 구간(지급률/정착보장/초기정착2/전략건강 건수·단가)까지 필요한 추가 보험료와 증가액 계산
+# =========================
+PREMIUM_UNIT = 1_000
+MAX_CONTRACTS = 20
+TOP = 5
+
+
+@dataclass(frozen=True)
+class Candidate:
+    product: str
+    type: str
+    pay_year: str
+    r1: float
+    strategic: bool
+
+
+@dataclass
+class NextTier:
+    kind: str              # performance_rate / guarantee / init2 / strategic_count / per_unit_bonus
+    label: str
+    extra_premium: int     # 추가로 필요한 월초 보험료
+    product: str
+    gain: int              # 익월 합계 증가액
+
+
+@dataclass
+class Allocation:
+    lines: List[Tuple[Candidate, int]]     # (후보, 월초 보험료)
+    premium: int
+    result: CommissionResult
+    next_tiers: List[NextTier] = field(default_factory=list)
+
+    @property
+    def next_month_total(self) -> int:
+        return self.result.next_month_total
+
+
+@dataclass
+class OptimizeResult:
+    allocations: List[Allocation]
+    evaluated: int          # 평가한 배분 수
+    seconds: float
+
+
+def candidates_from(leaves: Sequence[Tuple[str, str, str]], rate_store: RateStore,
+                    strategic_health: set) -> List[Candidate]:
+    # (상품명, 유형, 납기) → 후보 (마스터에 없는 조합은 제외)
+    out = []
+    for p, t, y in leaves:
+        code = rate_store.code(p, t, y)
+        if code != NO_CODE:
+            out.append(Candidate(p, t, y, float(rate_store.get_rates(code)[0]), p in strategic_health))
+    return out
+
+
+def _ceil_unit(x: float, unit: int) -> int:
+    return int(-(-max(0.0, x) // unit) * unit)
+
+
+def _sh_levels(rules: Rules, unit: int, min_premium: int) -> List[int]:
+    # strategic_count 가 0보다 큰 경계 보험료 (오름차순)
+    thr, val = rules.strategic_count.thresholds, rules.strategic_count.values
+    return [max(_ceil_unit(t, unit), min_premium) for t, v in zip(thr, val[1:]) if v > 0]
+
+
+class _Evaluator:
+    # 배분(새 계약 목록) 여러 개를 settle_arrays 한 번으로 평가 — 반환: 익월 합계 배열
+    def __init__(self, profile: AgentProfile, base: Sequence[Contract], rate_store: RateStore,
+                 strategic_health: set, as_of: date, rules: Rules):
+        self.profile, self.as_of, self.rules = profile, as_of, rules
+        # 익월 합계에는 1차년 성적률만 쓰인다
+        self.base = [(c.premium, engine.contract_rates(c, {}, rate_store)[0], c.product in strategic_health)
+                     for c in base]
+        self.count = 0
+
+    def __call__(self, allocations: Sequence[Sequence[Tuple[Candidate, int]]]) -> np.ndarray:
+        aidx, prem, r1, sh = [], [], [], []
+        for a, lines in enumerate(allocations):
+            rows = self.base + [(m, c.r1, c.strategic) for c, m in lines]
+            aidx += [a] * len(rows)
+            for p, r, s in rows:
+                prem.append(p)
+                r1.append(r)
+                sh.append(s)
+        n = len(allocations)
+        rates = np.zeros((len(prem), 3))
+        rates[:, 0] = r1
+        agents = {k: np.full(n, getattr(self.profile, k)) for k in batch.AGENT_COLUMNS[1:]}
+        _, summary = batch.settle_arrays(np.asarray(aidx, dtype=np.int64), rates, np.asarray(prem, dtype=np.int64),
+                                         np.asarray(sh, dtype=bool), agents, self.as_of, self.rules)
+        self.count += n
+        return np.asarray(summary["next_month_total"], dtype=np.int64)
+
+
+def _enumerate(cands: List[Candidate], budget: int, levels: List[int], max_contracts: int,
+               max_per_product: int, unit: int, min_premium: int) -> List[List[Tuple[Candidate, int]]]:
+    # 전략건강 경계별 계약 수 조합 × 나머지 예산 배정 후보(r1 최대 전체/전략건강/일반)
+    slots = sorted((c for c in cands if c.strategic for _ in range(max_per_product)), key=lambda c: -c.r1)
+    fillers = []
+    for pool in (cands, [c for c in cands if c.strategic], [c for c in cands if not c.strategic]):
+        if pool:
+            best = max(pool, key=lambda c: c.r1)
+            if best not in fillers:
+                fillers.append(best)
+
+    cap = min(len(slots), max_contracts)
+    out, seen = [], set()
+    ranges = [range(0, min(cap, budget // lv) + 1) for lv in levels]
+    for counts in itertools.product(*ranges):
+        n_sh = sum(counts)
+        spend = sum(n * lv for n, lv in zip(counts, levels))
+        if n_sh > cap or spend > budget:
+            continue
+        # 높은 경계부터 r1 높은 슬롯에 배정
+        lines, i = [], 0
+        for n, lv in sorted(zip(counts, levels), key=lambda x: -x[1]):
+            for _ in range(n):
+                lines.append([slots[i], lv])
+                i += 1
+        rest = (budget - spend) // unit * unit
+        for f in fillers or [None]:
+            alloc = [list(x) for x in lines]
+            if f is not None and rest > 0:
+                same = [x for x in alloc if x[0] == f]
+                if same:
+                    same[0][1] += rest  # 이미 배정된 슬롯에 얹음 (계약 수 그대로)
+                elif len(alloc) < max_contracts and rest >= min_premium:
+                    alloc.append([f, rest])
+            key = tuple(sorted((c.product, c.type, c.pay_year, m) for c, m in alloc))
+            if key in seen:
+                continue
+            seen.add(key)
+            out.append([(c, int(m)) for c, m in alloc])
+    return out
+
+
+def _with(lines: List[Tuple[Candidate, int]], c: Candidate, add: int, new_line: bool = False) -> List[Tuple[Candidate, int]]:
+    # c 줄에 보험료를 더한 배분 (없거나 new_line 이면 새 계약)
+    out = list(lines)
+    for i, (x, m) in enumerate(out):
+        if x == c and not new_line:
+            out[i] = (x, m + add)
+            return out
+    return out + [(c, add)]
+
+
+def _next_tiers(profile: AgentProfile, alloc: Allocation, cands: List[Candidate], levels: List[int],
+                evaluate: _Evaluator, rules: Rules, unit: int) -> List[NextTier]:
+    # 현재 배분에서 다음 구간까지 필요한 추가 보험료와 그때의 익월 합계 증가액
+    #   환산 구간(지급률/정착보장/초기정착2): r1 최대 후보에 추가, 전략건강: 1건 추가 또는 낮은 경계 1건 상향
+    res = alloc.result
+    eff, months = res.effective_converted, res.contract_months
+    steps = []  # (kind, label, 상품명, 변경 배분)
+
+    best = max(cands, key=lambda c: c.r1)
+    if best.r1 > 0:
+        pr = rules.performance_rate
+        targets = [next((("performance_rate", f"성과수수료 지급률 {v:.0%}", t)
+                         for t, v in zip(pr.thresholds, pr.values[pr.band(months)][1:]) if t > eff), None)]
+        if months <= 12:
+            gb = rules.guarantee_base
+            targets.append(next((("guarantee", f"정착보장 기준금액 {v:,}원", t)
+                                 for t, v in zip(gb.thresholds, gb.values[1:]) if t > eff), None))
+            if profile.std_activity and eff < engine.INIT2_MIN_CONVERTED:
+                targets.append(("init2", "초기정착수수료2 (유효환산 100만P)", engine.INIT2_MIN_CONVERTED))
+        w = best.r1 / 100.0
+        rate = money.pct_bp(best.r1)
+        # 환수성적이 환산 합계보다 크면 유효환산은 0 으로 묶여 있다 — 그 부족분부터 채워야 하므로 묶기 전 값 기준
+        net = res.total_converted_raw - money.won(profile.refund_p)
+        for kind, label, thr in filter(None, targets):
+            need = _ceil_unit((thr - net) / w, unit)
+            # 보험료를 올린 줄의 환산 증가분(절사 후)으로 확인
+            cur = next((m for c, m in alloc.lines if c == best), 0)
+            while money.converted(cur + need, rate) - money.converted(cur, rate) < thr - net:
+                need += unit
+            steps.append((kind, label, best.product, _with(alloc.lines, best, need)))
+
+    sh = [c for c in cands if c.strategic]
+    if sh and levels:
+        top = max(sh, key=lambda c: c.r1)
+        steps.append(("per_unit_bonus", f"전략건강 1건 추가 ({levels[0]:,}원)", top.product,
+                      _with(alloc.lines, top, levels[0], new_line=True)))
+        for i, (c, m) in enumerate(alloc.lines):
+            up = next((lv for lv in levels if lv > m), None) if c.strategic else None
+            if up is not None:
+                lines = list(alloc.lines)
+                lines[i] = (c, up)
+                steps.append(("strategic_count", f"전략건강 {m:,}→{up:,}원", c.product, lines))
+                break
+
+    if not steps:
+        return []
+    totals = evaluate([lines for _, _, _, lines in steps])
+    out = [NextTier(kind, label, sum(m for _, m in lines) - alloc.premium, product, int(t - res.next_month_total))
+           for (kind, label, product, lines), t in zip(steps, totals)]
+    return sorted(out, key=lambda s: s.extra_premium)
+
+
+def optimize(profile: AgentProfile, base: Sequence[Contract], candidates: Sequence[Candidate], budget: int,
+             rate_store: RateStore, strategic_health: set, as_of: Optional[date] = None,
+             rules: Optional[Rules] = None, top: int = TOP, max_contracts: int = MAX_CONTRACTS,
+             max_per_product: int = 1, unit: int = PREMIUM_UNIT, min_premium: int = 0,
+             master_version: str = "") -> OptimizeResult:
+    # base: 이미 등록된 계약, candidates: 추가 후보, budget: 추가 월초 보험료 한도(원)
+    t0 = time.perf_counter()
+    as_of = as_of or date.today()
+    rules = rules or default_rules()
+    cands = list(dict.fromkeys(candidates))
+    if budget <= 0 or not cands:
+        return OptimizeResult([], 0, time.perf_counter() - t0)
+    if budget < min_premium:
+        raise ValueError(f"예산이 최소 보험료({min_premium:,}원)보다 작습니다.")
+
+    levels = _sh_levels(rules, unit, min_premium)
+    evaluate = _Evaluator(profile, base, rate_store, strategic_health, as_of, rules)
+    allocs = _enumerate(cands, budget, levels, max_contracts, max_per_product, unit, min_premium)
+    totals = evaluate(allocs)
+    spent = np.array([sum(m for _, m in a) for a in allocs])
+    order = np.lexsort((spent, -totals))[:top]  # 익월 합계 내림차순 → 보험료 오름차순
+
+    out = []
+    for i in order.tolist():
+        lines = allocs[i]
+        contracts = list(base) + [Contract(c.product, c.type, c.pay_year, m, rate_store.code(c.product, c.type, c.pay_year))
+                                  for c, m in lines]
+        res = engine.compute_commission(profile, contracts, {}, strategic_health, as_of, rules, rate_store,
+                                        master_version)
+        alloc = Allocation(lines, int(spent[i]), res)
+        alloc.next_tiers = _next_tiers(profile, alloc, cands, levels, evaluate, rules, unit)
+        out.append(alloc)
+    return OptimizeResult(out, evaluate.count, time.perf_counter() - t0)
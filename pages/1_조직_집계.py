@@ -0,0 +1,185 @@
+import hashlib
+import time
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+import metrics
+import month_end
+import rollup
+import startup
+
+# =========================
+# 조직 집계 대시보드 (지점장 · 팀장용)
+#   설계사 파일 + 계약 파일(month_end 와 같은 형식, 설계사 파일에 branch 컬럼 추가)로 rollup.Rollup 큐브를 만든다
+#   큐브는 세션에 보관 — 필터 · 나누기 · 설계사 목록은 큐브 조회만, 설계사 1명 수정은 그 설계사만 다시 정산
+# =========================
+st.set_page_config(page_title="조직 집계 — DB생명 수수료", layout="wide")
+metrics.begin_run("rollup")
+
+SNAPSHOT = startup.registry().current()
+if SNAPSHOT is None:
+    st.error("상품 마스터를 찾을 수 없습니다. 백엔드에 product_master.csv를 배포해 주세요.")
+    st.stop()
+
+LABELS = {
+    "branch": "지점", "tenure_band": "재직 구간", "product": "상품명", "agent": "설계사", "contract_months": "차월",
+    "agents": "설계사 수", "effective_converted": "유효환산", "sum_recruit": "모집수수료", "sum_perf1": "성과수수료1",
+    "sum_init2_1": "초기정착수수료2-1", "sum_sh_bonus": "전략건강 보너스", "strategic_count": "전략건강 건수",
+    "eligible_settle": "정착보장 대상", "settle_bonus": "정착보장 수수료", "next_month_total": "익월 합계",
+    "contracts": "계약 수", "premium": "월초 보험료", "recruit_fee": "모집수수료", "perf1": "성과수수료1",
+    "strategic_contracts": "전략건강 계약 수", "sh_bonus": "전략건강 보너스",
+    "settle_reasons": "정착보장 미산출 이유", "init2_reasons": "초기정착2 미산출 이유",
+}
+MAX_ROWS = 500
+
+
+def display(df: pd.DataFrame) -> pd.DataFrame:
+    # 금액/건수 → 천 단위 구분 문자열, 컬럼명 → 한글
+    out = df.copy()
+    for c in out.columns:
+        if c == "strategic_count":
+            out[c] = out[c].map(lambda v: f"{v:,.1f}")
+        elif c == "eligible_settle" and out[c].dtype == bool:
+            out[c] = out[c].map(lambda v: "Y" if v else "")
+        elif pd.api.types.is_integer_dtype(out[c]) and c not in ("agent", "contract_months"):
+            out[c] = out[c].map(lambda v: f"{v:,}")
+    return out.rename(columns=LABELS)
+
+
+st.title("🏢 조직 집계")
+st.caption("※ 설계사별 익월 예상 수수료를 지점 · 재직 구간 · 상품별로 합산합니다 (정착보장은 설계사 단위라 상품별 표에는 없음)")
+
+# =========================
+# 입력 파일 → 큐브 (파일 · 기준일 · 마스터 버전이 바뀔 때만 다시 만든다)
+# =========================
+u1, u2, u3 = st.columns([2, 2, 1])
+with u1:
+    agents_file = st.file_uploader("설계사 파일 (agent, branch, year, month, std_activity, retention_*, refund_*, "
+                                   "direct_recruits)", type=["csv", "xlsx", "xls", "parquet"], key="rollup_agents")
+with u2:
+    contracts_file = st.file_uploader("계약 파일 (agent, product, type, pay_year, premium)",
+                                      type=["csv", "xlsx", "xls", "parquet"], key="rollup_contracts")
+with u3:
+    as_of = st.date_input("정산 기준일", value=datetime.today().date(), key="rollup_as_of")
+
+if agents_file is None or contracts_file is None:
+    st.info("설계사 파일과 계약 파일을 올리면 집계를 보여줍니다. 설계사 파일에 branch(지점) 컬럼이 없으면 "
+            f"'{rollup.NO_BRANCH}'으로 묶습니다.")
+    st.stop()
+
+_key = (hashlib.sha256(agents_file.getvalue()).hexdigest(), hashlib.sha256(contracts_file.getvalue()).hexdigest(),
+        as_of, SNAPSHOT.version)
+if st.session_state.get("rollup_key") != _key:
+    try:
+        with st.spinner("설계사 전체 정산 중..."):
+            agents_file.seek(0)
+            contracts_file.seek(0)
+            t0 = time.perf_counter()
+            st.session_state["rollup"] = rollup.Rollup.build(
+                month_end.read_table(contracts_file), month_end.read_table(agents_file), SNAPSHOT.rate_store,
+                SNAPSHOT.strategic, as_of, master_version=SNAPSHOT.version)
+            st.session_state["rollup_build_s"] = time.perf_counter() - t0
+    except (OSError, ValueError, KeyError, ImportError) as e:
+        st.error(f"집계를 만들 수 없습니다: {e}")
+        st.stop()
+    st.session_state["rollup_key"] = _key
+    st.session_state.pop("rollup_last_update", None)
+R: rollup.Rollup = st.session_state["rollup"]
+
+# =========================
+# 필터 · 합계
+# =========================
+_q0 = time.perf_counter()
+f1, f2, f3 = st.columns([3, 3, 2])
+with f1:
+    sel_branches = st.multiselect("지점", sorted(R.branches.labels), key="rollup_branches")
+with f2:
+    sel_bands = st.multiselect("재직 구간", list(rollup.TENURE_LABELS), key="rollup_bands")
+with f3:
+    group = st.radio("나누기", ["지점", "재직 구간", "지점 × 재직 구간"], key="rollup_by", horizontal=True)
+branches, bands = sel_branches or None, sel_bands or None
+by = {"지점": ("branch",), "재직 구간": ("tenure_band",), "지점 × 재직 구간": ("branch", "tenure_band")}[group]
+
+tot = R.totals(branches, bands)
+m = st.columns(6)
+m[0].metric("설계사 수", f"{tot['agents']:,}명")
+m[1].metric("유효환산", f"{tot['effective_converted']:,}P")
+m[2].metric("모집수수료", f"{tot['sum_recruit']:,}원")
+m[3].metric("성과수수료1", f"{tot['sum_perf1']:,}원")
+m[4].metric("전략건강 건수", f"{tot['strategic_count']:,.1f}건")
+m[5].metric("정착보장 수수료(예상)", f"{tot['settle_bonus']:,}원", f"대상 {tot['eligible_settle']:,}명", delta_color="off")
+
+# =========================
+# 지점 · 재직 구간별
+# =========================
+st.subheader(f"📊 {group}별")
+_groups = R.by_group(by, branches, bands).sort_values(list(by), key=lambda s: s.map(
+    {b: i for i, b in enumerate(rollup.TENURE_LABELS)}) if s.name == "tenure_band" else s)
+st.dataframe(display(_groups), use_container_width=True, hide_index=True)
+
+# =========================
+# 상품별 (계약 단위 지표)
+# =========================
+st.subheader("📦 상품별")
+sel_products = st.multiselect("상품 (비우면 전체, 모집수수료 상위 50개)", sorted(R.products.labels),
+                              key="rollup_products")
+_products = R.by_product(("product",), branches, bands, sel_products or None)
+_products = _products.sort_values("recruit_fee", ascending=False)
+st.dataframe(display(_products if sel_products else _products.head(50)), use_container_width=True, hide_index=True)
+
+# =========================
+# 설계사 목록 (drill-down)
+# =========================
+st.subheader("👤 설계사별")
+_agents = R.agents(branches, bands).sort_values("next_month_total", ascending=False)
+st.dataframe(display(_agents.head(MAX_ROWS)), use_container_width=True, hide_index=True)
+if len(_agents) > MAX_ROWS:
+    st.caption(f"※ 익월 합계 상위 {MAX_ROWS:,}명만 표시 (조건에 맞는 설계사 {len(_agents):,}명)")
+_query_s = time.perf_counter() - _q0
+
+# =========================
+# 설계사 1명 수정 → 증분 반영 (그 설계사만 다시 정산)
+# =========================
+with st.expander("✏️ 설계사 입력 수정 (증분 반영)"):
+    agent = st.selectbox("설계사", _agents["agent"].tolist(), key="rollup_edit_agent")
+    if agent is not None:
+        prof, cs = R.agent_input(agent)
+        with st.form(f"rollup_edit_{agent}"):
+            e1, e2, e3, e4 = st.columns(4)
+            with e1:
+                branch = st.text_input("지점", value=prof["branch"])
+                std_activity = st.checkbox("표준활동 달성", value=bool(prof["std_activity"]))
+            with e2:
+                ret1 = st.number_input("당월 유지율(%)", 0, 100, int(prof["retention_1st"]))
+                ret13 = st.number_input("13회차 예상 유지율(%)", 0, 100, int(prof["retention_13th"]))
+            with e3:
+                ret25 = st.number_input("25회차 예상 유지율(%)", 0, 100, int(prof["retention_25th"]))
+                dr = st.number_input("당월 직도입 인원(명)", 0, 99, int(prof["direct_recruits"]))
+            with e4:
+                refund_p = st.number_input("당월 예상 환수성적", 0, None, int(prof["refund_p"]), step=10_000)
+                refund_amt = st.number_input("당월 예상 환수금", 0, None, int(prof["refund_amt"]), step=10_000)
+            edited = st.data_editor(cs, num_rows="dynamic", use_container_width=True, key=f"rollup_cs_{agent}")
+            submitted = st.form_submit_button("반영")
+        if submitted:
+            edited = edited.dropna(subset=["product"])
+            edited = edited.assign(premium=pd.to_numeric(edited["premium"], errors="coerce").fillna(0))
+            t0 = time.perf_counter()
+            try:
+                R.update_agent(agent, {"branch": branch.strip() or rollup.NO_BRANCH, "std_activity": std_activity,
+                                       "retention_1st": ret1, "retention_13th": ret13, "retention_25th": ret25,
+                                       "refund_p": refund_p, "refund_amt": refund_amt, "direct_recruits": dr},
+                               edited)
+            except ValueError as e:
+                st.error(f"반영할 수 없습니다: {e}")
+            else:
+                st.session_state["rollup_last_update"] = (agent, time.perf_counter() - t0)
+                st.rerun()
+
+_last = st.session_state.get("rollup_last_update")
+st.caption(f"설계사 {len(R):,}명 · 전체 정산 {st.session_state.get('rollup_build_s', 0) * 1000:,.0f}ms · "
+           f"이번 조회 {_query_s * 1000:,.1f}ms · 증분 반영 {R.updates:,}회"
+           + (f" (마지막: {_last[0]} {_last[1] * 1000:,.1f}ms)" if _last else "")
+           + f" · 마스터 {SNAPSHOT.version} · 기준일 {as_of}")
+metrics.end_run(agents=len(R), master_version=SNAPSHOT.version)
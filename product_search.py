@@ -0,0 +1,140 @@
+import heapq
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+# =========================
+# 상품 검색 인덱스 (자동완성)
+#   문서 = 상품명, 상품명+유형 — 공백/기호를 뺀 소문자 문자열과 초성 문자열 두 벌을 색인
+#   1-gram/2-gram 역색인으로 후보를 좁힌 뒤 부분 문자열 확인
+#   순위: 상품명 일치 → 접두 일치 → 앞쪽 일치 → 짧은 이름
+#   같은 질의는 LRU 캐시로 바로 응답 (타이핑 중 반복 질의)
+#   질의에 자음(ㄱ~ㅎ)이 있으면 초성 검색: "ㅂㄴㅊㄱ" → 백년친구, "암ㅈㅅ" → 암종신
+#     섞인 질의는 자음만 초성으로 맞추고 완성된 글자는 그 자리에 그대로 있어야 한다 ("암ㅈㅅ" 은 연장생활에 맞지 않음)
+# =========================
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_CHOSEONG_SET = frozenset(CHOSEONG)
+_HANGUL_FIRST, _HANGUL_LAST = 0xAC00, 0xD7A3
+
+
+def normalize(text: str) -> str:
+    return "".join(ch for ch in unicodedata.normalize("NFC", str(text)).lower() if ch.isalnum())
+
+
+def choseong(text: str) -> str:
+    # 완성형 한글 → 초성, 그 외 문자는 그대로 (normalize 된 문자열 기준)
+    out = []
+    for ch in text:
+        code = ord(ch)
+        out.append(CHOSEONG[(code - _HANGUL_FIRST) // 588] if _HANGUL_FIRST <= code <= _HANGUL_LAST else ch)
+    return "".join(out)
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    product: str
+    type: Optional[str]   # 유형명으로 맞은 경우
+    score: Tuple
+
+
+def _grams(text: str):
+    yield from set(text)
+    yield from {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+class ProductIndex:
+    __slots__ = ("docs", "n_products", "texts", "cho_texts", "_post", "_cho_post", "_cache", "cache_size")
+
+    def __init__(self, docs: List[Tuple[str, Optional[str]]], cache_size: int = 1024):
+        # 문서 번호 = 정적 순위: 상품명 문서(짧은 이름 → 가나다) 다음 유형 문서
+        self.docs = sorted(docs, key=lambda d: (d[1] is not None, len(d[0]), d[0], d[1] or ""))
+        self.n_products = sum(t is None for _, t in docs)
+        self.texts = [normalize(p if t is None else p + t) for p, t in self.docs]
+        self.cho_texts = [choseong(s) for s in self.texts]
+        self._post = self._postings(self.texts)
+        self._cho_post = self._postings(self.cho_texts)
+        self._cache: "OrderedDict[tuple, List[SearchHit]]" = OrderedDict()
+        self.cache_size = cache_size
+
+    @staticmethod
+    def _postings(texts: List[str]) -> Dict[str, FrozenSet[int]]:
+        post: Dict[str, set] = {}
+        for i, s in enumerate(texts):
+            for g in _grams(s):
+                post.setdefault(g, set()).add(i)
+        return {g: frozenset(ids) for g, ids in post.items()}
+
+    @classmethod
+    def from_tree(cls, tree: dict) -> "ProductIndex":
+        return cls([(p, None) for p in tree] + [(p, t) for p in tree for t in tree[p]])
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def search(self, query: str, limit: int = 20) -> List[SearchHit]:
+        q = normalize(query)
+        if not q:
+            return []
+        cho = any(ch in _CHOSEONG_SET for ch in q)
+        key = (q, limit)
+        hit = self._cache.get(key)
+        if hit is not None:
+            try:
+                self._cache.move_to_end(key)
+            except KeyError:  # 다른 스레드가 방금 밀어낸 경우
+                pass
+            return hit
+
+        hits = self._search(q, cho, limit)
+        self._cache[key] = hits
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return hits
+
+    def _search(self, q: str, cho: bool, limit: int) -> List[SearchHit]:
+        if cho:
+            # 초성 색인으로 후보를 좁힌 뒤 완성된 글자(자음이 아닌 글자)는 원문과 같은 자리인지 확인
+            qc, texts, post = choseong(q), self.cho_texts, self._cho_post
+            literal = [(j, ch) for j, ch in enumerate(q) if ch not in _CHOSEONG_SET]
+
+            def find(i: int) -> int:
+                s, pos = self.texts[i], texts[i].find(qc)
+                while pos >= 0 and any(s[pos + j] != ch for j, ch in literal):
+                    pos = texts[i].find(qc, pos + 1)
+                return pos
+        else:
+            qc, texts, post = q, self.texts, self._post
+
+            def find(i: int) -> int:
+                return texts[i].find(q)
+
+        grams = [qc] if len(qc) == 1 else {qc[i:i + 2] for i in range(len(qc) - 1)}
+        sets = sorted((post.get(g, frozenset()) for g in grams), key=len)
+        cand = sets[0].intersection(*sets[1:]) if sets else frozenset()
+
+        # 순위: 상품명 문서 우선 → 접두 일치 → 앞쪽 일치 → 정적 순위(짧은 이름)
+        def scored(ids):
+            for i in ids:
+                pos = find(i)
+                if pos >= 0:
+                    yield pos > 0, pos, i
+
+        n = self.n_products
+        out, seen = [], set()
+        for _, pos, i in heapq.nsmallest(limit, scored(i for i in cand if i < n)):
+            out.append(SearchHit(self.docs[i][0], None, (False, pos, i)))
+            seen.add(self.docs[i][0])
+        if len(out) < limit:
+            for _, pos, i in sorted(scored(i for i in cand if i >= n)):
+                product, tpe = self.docs[i]
+                if product in seen:
+                    continue
+                out.append(SearchHit(product, tpe, (True, pos, i)))
+                seen.add(product)
+                if len(out) == limit:
+                    break
+        return out
+
+    def products(self, query: str, limit: int = 20) -> List[str]:
+        return [h.product for h in self.search(query, limit)]
@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+import batch
+import money
+from engine import AgentProfile, CommissionResult
+from rate_store import RateStore
+from tiers import Rules, default_rules
+
+# =========================
+# 36개월 수수료 현금흐름 예측
+#   m = 1 은 익월 지급월, 설계사 차월은 (현재 차월 + m - 1) 로 진행 → 13/25 개월차 지급분은 그 시점 구간 지급률 적용
+#   1차년: m=1 에 모집 + 성과1 + 초기정착2-1 + 전략건강 + 정착보장
+#   2차년: m=13 에 성과2 + 초기정착2-2, m=13~24 매월 유지수수료1(y2/12)
+#   3차년: m=25 에 성과3 + 초기정착2-3, m=25~36 매월 유지수수료2(y3/12)
+#   계약 유지 곡선 S(m): S(1)=1 → S(13)=13회차 유지율 → S(25)=25회차 유지율 (구간별 월 기하 보간, 25 이후는 13~25 감소율 연장)
+#   horizon 은 36 이 기본 — 더 길게 주면 37개월 이후는 지급 항목이 없어 0
+#   흐름은 유지 확률을 곱한 기대값이라 float64 (원 단위 금액을 여러 해 합쳐도 오차가 원 미만)
+# =========================
+HORIZON = 36
+COMPONENTS = ["first_year", "perf2", "init2_2", "retention1", "perf3", "init2_3", "retention2"]
+
+
+@dataclass
+class Projection:
+    agent: np.ndarray                      # (A,)
+    total: np.ndarray                      # (A, H) float64
+    components: Dict[str, np.ndarray]      # 항목별 (A, H) float64
+    contract_flows: Optional[np.ndarray] = None   # (C, H) float64 — per_contract=True 일 때
+
+    def frame(self) -> pd.DataFrame:
+        cols = [f"m{m}" for m in range(1, self.total.shape[1] + 1)]
+        return pd.DataFrame(self.total, columns=cols).assign(agent=self.agent)[["agent"] + cols]
+
+
+def survival_curve(ret13: np.ndarray, ret25: np.ndarray, horizon: int = HORIZON) -> np.ndarray:
+    # (A, H) — 열 m-1 = S(m)
+    s13 = np.clip(np.asarray(ret13, dtype=float) / 100.0, 1e-6, 1.0)[:, None]
+    s25 = np.clip(np.asarray(ret25, dtype=float) / 100.0, 1e-6, 1.0)[:, None]
+    s25 = np.minimum(s25, s13)
+    m = np.arange(1, horizon + 1, dtype=float)[None, :]
+    g1 = s13 ** (1 / 12)            # 1~13 월 감소율
+    g2 = (s25 / s13) ** (1 / 12)    # 13~25 월 감소율
+    return np.where(m <= 13, g1 ** (m - 1), s13 * g2 ** (m - 13))
+
+
+def _width(horizon: int) -> int:
+    # 배열 열 수 — 3차년 지급월(36)까지는 항상 만들고 horizon 으로 자른다
+    if horizon < 1:
+        raise ValueError(f"horizon 은 1개월 이상이어야 합니다: {horizon}")
+    return max(horizon, HORIZON)
+
+
+def _agent_flows(first_year, y2, y3, keep2, keep3, months, eff, f13, f25, delta_R, ret13, ret25, rules: Rules,
+                 horizon: int):
+    # keep2/keep3: 유지수수료 월액 — 계약별 floor(y / 12) 의 합 (engine retention1_amt/retention2_amt)
+    a = len(first_year)
+    width = _width(horizon)
+    S = survival_curve(ret13, ret25, width)
+    r13 = rules.performance_rate.lookup_array(months + 12, eff)
+    r25 = rules.performance_rate.lookup_array(months + 24, eff)
+
+    comp = {k: np.zeros((a, width)) for k in COMPONENTS}
+    comp["first_year"][:, 0] = first_year
+    comp["perf2"][:, 12] = y2 * r13 * f13 * S[:, 12]
+    comp["init2_2"][:, 12] = y2 * delta_R * f13 * S[:, 12]
+    comp["retention1"][:, 12:24] = keep2[:, None] * S[:, 12:24]
+    comp["perf3"][:, 24] = y3 * r25 * f25 * S[:, 24]
+    comp["init2_3"][:, 24] = y3 * delta_R * f25 * S[:, 24]
+    comp["retention2"][:, 24:36] = keep3[:, None] * S[:, 24:36]
+    comp = {k: v[:, :horizon] for k, v in comp.items()}
+    return sum(comp.values()), comp, S, r13, r25
+
+
+def _agent_input(agents: pd.DataFrame, key: str) -> np.ndarray:
+    return agents[key].fillna(batch.AGENT_DEFAULTS[key]).to_numpy(float) if key in agents \
+        else np.full(len(agents), float(batch.AGENT_DEFAULTS[key]))
+
+
+def project_portfolio(contracts: pd.DataFrame, agents: pd.DataFrame, master_df: pd.DataFrame,
+                      as_of: Optional[date] = None, rules: Optional[Rules] = None,
+                      rate_store: Optional[RateStore] = None, horizon: int = HORIZON,
+                      per_contract: bool = False) -> Projection:
+    # 설계사 여러 명의 포트폴리오 → 설계사 × 월 (A, H) 현금흐름 (계약 × 월 행렬은 per_contract=True 일 때만)
+    rules = rules or default_rules()
+    out, summ = batch.settle_batch(contracts, agents, master_df, as_of, rules, rate_store)
+    aidx = pd.Index(summ["agent"]).get_indexer(out["agent"])
+    n = len(summ)
+
+    y2c = out["converted2"].to_numpy()
+    y3c = out["converted3"].to_numpy()
+    months = summ["contract_months"].to_numpy()
+    first_year = (summ["sum_recruit"] + summ["sum_perf1"] + summ["sum_init2_1"] + summ["sum_sh_bonus"]).to_numpy() \
+        + np.where(months <= 12, summ["settle_bonus"].to_numpy(), 0.0)
+    ag = agents.set_index("agent").reindex(summ["agent"])
+    ret13, ret25 = _agent_input(ag, "retention_13th"), _agent_input(ag, "retention_25th")
+
+    total, comp, S, r13, r25 = _agent_flows(
+        first_year, *(money.sum_by(aidx, out[c].to_numpy(), n).astype(float)
+                      for c in ("converted2", "converted3", "retention1_amt", "retention2_amt")),
+        months, summ["effective_converted"].to_numpy(), summ["f13"].to_numpy(), summ["f25"].to_numpy(),
+        summ["delta_R"].to_numpy(), ret13, ret25, rules, horizon,
+    )
+
+    contract_flows = None
+    if per_contract:
+        # 계약 단위 흐름 (정착보장은 설계사 단위 지급이라 제외)
+        delta_R = summ["delta_R"].to_numpy()
+        f = np.zeros((len(out), S.shape[1]))
+        f[:, 0] = out[["recruit_fee", "perf1", "init2_1", "sh_bonus"]].sum(axis=1).to_numpy()
+        f[:, 12] += y2c * ((r13 + delta_R) * summ["f13"].to_numpy())[aidx]
+        f[:, 24] += y3c * ((r25 + delta_R) * summ["f25"].to_numpy())[aidx]
+        f[:, 12:24] += out["retention1_amt"].to_numpy()[:, None]
+        f[:, 24:36] += out["retention2_amt"].to_numpy()[:, None]
+        f *= S[aidx]
+        contract_flows = f[:, :horizon]
+
+    return Projection(agent=summ["agent"].to_numpy(), total=total, components=comp, contract_flows=contract_flows)
+
+
+def project_result(calc: CommissionResult, profile: AgentProfile, rules: Optional[Rules] = None,
+                   horizon: int = HORIZON) -> Projection:
+    # 화면 계산 결과(설계사 1명) → 36개월 흐름
+    rules = rules or default_rules()
+    y2, y3, keep2, keep3 = (float(calc.results.column(c).sum())
+                            for c in ("converted2", "converted3", "retention1_amt", "retention2_amt"))
+    first_year = calc.sum_recruit + calc.sum_perf1 + calc.sum_init2_1 + calc.sum_sh_bonus \
+        + (calc.settle_bonus if calc.contract_months <= 12 else 0)
+    total, comp, _, _, _ = _agent_flows(
+        *(np.array([v], dtype=float) for v in (first_year, y2, y3, keep2, keep3)),
+        np.array([calc.contract_months]),
+        *(np.array([v], dtype=float) for v in (calc.effective_converted, calc.f13, calc.f25, calc.delta_R,
+                                                profile.retention_13th, profile.retention_25th)),
+        rules, horizon,
+    )
+    return Projection(agent=np.array([None]), total=total, components=comp)
@@ -0,0 +1,97 @@
+from array import array
+from typing import TYPE_CHECKING, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# =========================
+# 정수 코드 기반 요율 저장소
+#   상품명/유형/납기 문자열은 한 번만 보관(intern)하고, 요율 1행 = float32 × 3 (12바이트)
+#   rate_code = (상품명, 유형, 납기) 조합의 행 번호 → rates[3*code : 3*code+3]
+#   pandas/master 는 쓰는 메서드 안에서 import — engine 이 이 모듈을 import 해도 pandas 를 끌어오지 않는다
+# =========================
+NO_CODE = -1
+
+
+class RateStore:
+    __slots__ = ("products", "types", "pay_years", "_codes", "_leaf", "_index",
+                 "leaf_product", "leaf_type", "leaf_pay_year", "rates")
+
+    def __init__(self, products, types, pay_years, leaf_p, leaf_t, leaf_y, rates):
+        self.products = list(products)
+        self.types = list(types)
+        self.pay_years = list(pay_years)
+        self.leaf_product = array("i", leaf_p)
+        self.leaf_type = array("i", leaf_t)
+        self.leaf_pay_year = array("i", leaf_y)
+        self.rates = array("f", rates)    # r1, r2, r3 연속 배치
+        self._codes = None  # (상품명→코드, 유형→코드, 납기→코드)
+        self._leaf = None   # 결합 정수키 → rate_code
+        self._index = None
+
+    @classmethod
+    def from_master_df(cls, df: "pd.DataFrame") -> "RateStore":
+        import master
+
+        p, t, y, src, p_names, t_names, y_names, _ = master._rate_codes(df)
+        r = np.column_stack([df[c].to_numpy(float)[src] for c in ("1차년성적률", "2차년성적률", "3차년성적률")])
+        return cls(
+            p_names.tolist(), t_names.tolist(), y_names.tolist(),
+            p.astype(np.int32), t.astype(np.int32), y.astype(np.int32),
+            r.astype(np.float32).ravel(),
+        )
+
+    def __len__(self) -> int:
+        return len(self.leaf_product)
+
+    # ── 스칼라 조회
+    def _combined(self, p: int, t: int, y: int) -> int:
+        return (p * len(self.types) + t) * len(self.pay_years) + y
+
+    def code(self, product: str, tpe: str, pay_year: str) -> int:
+        if self._leaf is None:
+            self._codes = tuple({nm: i for i, nm in enumerate(names)}
+                                for names in (self.products, self.types, self.pay_years))
+            self._leaf = {self._combined(p, t, y): i
+                          for i, (p, t, y) in enumerate(zip(self.leaf_product, self.leaf_type, self.leaf_pay_year))}
+        pc, tc, yc = self._codes
+        p, t, y = pc.get(product), tc.get(tpe), yc.get(pay_year)
+        if p is None or t is None or y is None:
+            return NO_CODE
+        return self._leaf.get(self._combined(p, t, y), NO_CODE)
+
+    def get_rates(self, code: int) -> Tuple[float, float, float]:
+        if code < 0:
+            return 0.0, 0.0, 0.0
+        i = 3 * code
+        r = self.rates
+        return r[i], r[i + 1], r[i + 2]
+
+    def names(self, code: int) -> Tuple[str, str, str]:
+        return (self.products[self.leaf_product[code]], self.types[self.leaf_type[code]],
+                self.pay_years[self.leaf_pay_year[code]])
+
+    # ── 배열 조회
+    @property
+    def matrix(self) -> np.ndarray:
+        # (n, 3) float32 — 복사 없는 view
+        return np.frombuffer(self.rates, dtype=np.float32).reshape(-1, 3)
+
+    def codes(self, products, types, pay_years) -> np.ndarray:
+        import pandas as pd
+
+        if self._index is None:
+            self._index = pd.MultiIndex.from_arrays([
+                np.asarray(self.products, dtype=object)[np.asarray(self.leaf_product)],
+                np.asarray(self.types, dtype=object)[np.asarray(self.leaf_type)],
+                np.asarray(self.pay_years, dtype=object)[np.asarray(self.leaf_pay_year)],
+            ])
+        return self._index.get_indexer(pd.MultiIndex.from_arrays([products, types, pay_years]))
+
+    def rates_for(self, codes: np.ndarray) -> np.ndarray:
+        # 미등록 코드(-1)는 0%
+        out = self.matrix[np.maximum(codes, 0)].astype(float)
+        out[codes < 0] = 0.0
+        return out
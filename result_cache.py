@@ -0,0 +1,132 @@
+import dataclasses
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+import metrics
+from engine import AgentProfile, CommissionResult, Contract
+
+# =========================
+# 계산 결과 캐시 (프로세스 공용, LRU + TTL)
+#   키 = 입력 정규화 해시: 마스터 버전, 규칙 버전, 위임차월, 설계사 입력값, 계약 (상품명, 유형, 납기, 보험료) 정렬 목록
+#     위임년월 대신 위임차월을 쓰므로 기준일이 달라도 차월이 같으면 같은 키
+#     계약 순서는 키에 들어가지 않는다 — 결과는 정렬 순서로 저장하고 꺼낼 때 호출자 순서로 되돌린다
+#   마스터가 교체되면(bind) 이전 버전 결과를 모두 비운다
+#   derived(): 같은 키에 딸린 부가 결과(시뮬레이션 등)도 "종류:키" 로 같은 LRU 에 보관
+# =========================
+MAX_ENTRIES = 2048
+TTL_SECONDS = 600.0
+
+
+def _contract_key(c: Contract) -> tuple:
+    return c.product, c.type, c.pay_year, c.premium
+
+
+def canonical_key(profile: AgentProfile, contract_months: int, contracts: Sequence[Contract],
+                  master_version: str, rules_version: str) -> Tuple[str, np.ndarray]:
+    # 반환: (키, 정렬 순서) — order[i] = 정렬 후 i번째 계약의 원래 위치
+    keys = [_contract_key(c) for c in contracts]
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    p = profile
+    canon = (master_version, rules_version, contract_months, bool(p.std_activity), p.retention_1st,
+             p.retention_13th, p.retention_25th, p.refund_p, p.refund_amt, p.direct_recruits,
+             tuple(keys[i] for i in order))
+    digest = hashlib.blake2b(repr(canon).encode("utf-8"), digest_size=16).hexdigest()
+    return digest, np.asarray(order, dtype=np.int64)
+
+
+class ResultCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl: float = TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version: Optional[str] = None
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()  # CommissionResult 또는 derived 결과
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expired = self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_rate(self) -> float:
+        n = self.hits + self.misses
+        return self.hits / n if n else 0.0
+
+    def stats(self) -> dict:
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate,
+                "evictions": self.evictions, "expired": self.expired, "invalidations": self.invalidations,
+                "master_version": self.version}
+
+    # ── 무효화
+    def bind(self, master_version: str):
+        # 마스터 버전이 바뀌면 전체 비움 (키에도 버전이 들어 있지만 이전 결과가 메모리에 남지 않도록)
+        if master_version == self.version:
+            return
+        with self._lock:
+            if master_version != self.version:
+                if self._data:
+                    self.invalidations += 1
+                    metrics.incr("result_cache_invalidations_total")
+                self._data.clear()
+                self.version = master_version
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    # ── 조회/저장
+    def get(self, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._data.get(key)
+            if hit is not None and hit[0] < now:
+                del self._data[key]
+                self.expired += 1
+                hit = None
+            if hit is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        metrics.incr("result_cache_total", result="miss" if hit is None else "hit")
+        metrics.gauge("result_cache_hit_rate", self.hit_rate)
+        return None if hit is None else hit[1]
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        metrics.gauge("result_cache_entries", len(self._data))
+
+    def commission(self, profile: AgentProfile, contract_months: int, contracts: Sequence[Contract],
+                   master_version: str, rules_version: str,
+                   compute: Callable[[], CommissionResult]) -> CommissionResult:
+        # compute(): contracts 순서대로 계산한 결과 — 미스일 때만 호출
+        self.bind(master_version)
+        key, order = canonical_key(profile, contract_months, contracts, master_version, rules_version)
+        hit = self.get(key)
+        if hit is None:
+            res = compute()
+            self.put(key, dataclasses.replace(res, results=res.results.take(order)))
+            return res
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        return dataclasses.replace(hit, results=hit.results.take(inverse))
+
+    def derived(self, kind: str, profile: AgentProfile, contract_months: int, contracts: Sequence[Contract],
+                master_version: str, rules_version: str, compute: Callable[[], Any]) -> Any:
+        # 계산 결과에서 파생되는 값(계약 순서와 무관한 것만) — 같은 입력이면 다시 계산하지 않는다
+        self.bind(master_version)
+        key = f"{kind}:{canonical_key(profile, contract_months, contracts, master_version, rules_version)[0]}"
+        hit = self.get(key)
+        if hit is None:
+            hit = compute()
+            self.put(key, hit)
+        return hit
@@ -0,0 +1,342 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import batch
+import metrics
+import money
+from rate_store import RateStore
+from tiers import Rules, default_rules
+
+# =========================
+# 조직 집계 (지점 · 재직 구간 · 상품) — 팀장/지점장용 롤업
+#   build(): 설계사 배치를 batch.settle_arrays 한 번으로 정산하고 큐브에 미리 합산
+#     설계사 큐브 (지점, 재직 구간) × AGENT_METRICS        — 유효환산 · 정착보장처럼 설계사 단위 값
+#     상품 큐브   (지점, 재직 구간, 상품) × CONTRACT_METRICS — 환산 · 성과1 · 전략건강 건수처럼 계약 단위 값
+#   update_agent(): 설계사 1명의 입력이 바뀌면 그 설계사만 다시 정산 → 큐브에서 이전 기여분을 빼고 새 값을 더한다
+#     정산은 설계사끼리 독립이라 1명만 정산한 값 = 전체 배치에서의 그 설계사 값
+#   조회(totals · by_group · by_product · agents)는 큐브 축 합/마스크 — 전체 재계산 없음
+#   큐브 값은 모두 int64: 금액은 정수 원, 전략건강 건수는 bp(0.5건 = 5,000) — 빼고 더해도 오차가 쌓이지 않는다
+# =========================
+TENURE_BANDS = (2, 6, 12, 24)   # 재직 구간 상한(위임차월, 포함) — 유지율 기준 구간 + 2년차
+TENURE_LABELS = ("1~2개월", "3~6개월", "7~12개월", "13~24개월", "25개월~")
+NO_BRANCH = "(미지정)"
+DIMENSIONS = ("branch", "tenure_band", "product")
+
+AGENT_METRICS = ("agents", "effective_converted", "sum_recruit", "sum_perf1", "sum_init2_1", "sum_sh_bonus",
+                 "strategic_count", "eligible_settle", "settle_bonus", "next_month_total")
+CONTRACT_METRICS = ("contracts", "premium", "recruit_fee", "perf1", "strategic_contracts", "strategic_count",
+                    "sh_bonus")
+BP_METRICS = ("strategic_count",)   # bp 로 보관 → 조회 시 건수(float)로
+INPUT_COLUMNS = ["product", "type", "pay_year", "premium"]
+
+
+def tenure_band(months) -> np.ndarray:
+    # 위임차월 → 재직 구간 번호 (TENURE_LABELS 인덱스)
+    return np.searchsorted(TENURE_BANDS, months, side="left")
+
+
+class _Dim:
+    # 축 라벨 ↔ 정수 코드 (새 라벨은 뒤에 추가)
+    __slots__ = ("labels", "_index")
+
+    def __init__(self, labels: Iterable = ()):
+        self.labels: List = []
+        self._index: Dict = {}
+        for x in labels:
+            self.code(x)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def code(self, label) -> int:
+        i = self._index.get(label)
+        if i is None:
+            i = self._index[label] = len(self.labels)
+            self.labels.append(label)
+        return i
+
+    def codes(self, labels) -> np.ndarray:
+        inv, uniq = pd.factorize(np.asarray(labels, dtype=object))
+        return np.asarray([self.code(x) for x in uniq], dtype=np.int64)[inv] if len(inv) else np.zeros(0, np.int64)
+
+    def find(self, labels: Iterable) -> np.ndarray:
+        # 필터용 — 없는 라벨은 무시
+        return np.asarray([self._index[x] for x in labels if x in self._index], dtype=np.int64)
+
+
+@dataclass
+class _Agent:
+    row: int
+    profile: dict          # batch.AGENT_COLUMNS + branch
+    contracts: tuple       # INPUT_COLUMNS 순서의 배열 4개
+    product_idx: np.ndarray
+    values: np.ndarray     # 계약별 CONTRACT_METRICS (k, M)
+
+
+def _grow(arr: np.ndarray, shape: Sequence[int]) -> np.ndarray:
+    # 축마다 필요한 크기보다 작으면 두 배씩 늘린 0 배열에 복사 (새 지점/상품/설계사가 생길 때만)
+    if all(n <= s for n, s in zip(shape, arr.shape)):
+        return arr
+    new = tuple(max(n, 2 * s, 4) if n > s else s for n, s in zip(shape, arr.shape))
+    out = np.zeros(new + arr.shape[len(shape):], dtype=arr.dtype)
+    out[tuple(slice(0, s) for s in arr.shape[:len(shape)])] = arr
+    return out
+
+
+class Rollup:
+    def __init__(self, rate_store: RateStore, strategic_health: Iterable[str], as_of: Optional[date] = None,
+                 rules: Optional[Rules] = None, master_version: str = ""):
+        self.rate_store = rate_store
+        self.strategic_health = frozenset(strategic_health)
+        self.as_of = as_of or date.today()
+        self.rules = rules or default_rules()
+        self.master_version = master_version
+        self.branches = _Dim()
+        self.bands = _Dim(TENURE_LABELS)
+        self.products = _Dim()
+        nt = len(TENURE_LABELS)
+        self._agent_cube = np.zeros((0, nt, len(AGENT_METRICS)), dtype=np.int64)
+        self._product_cube = np.zeros((0, nt, 0, len(CONTRACT_METRICS)), dtype=np.int64)
+        # 설계사 행 (drill-down 용) — 삭제된 행은 live=False, 번호는 _free 에 두고 다음 추가 때 다시 쓴다
+        self._ids: List = []
+        self._free: List[int] = []
+        self._a_dims = np.zeros((0, 3), dtype=np.int64)            # 지점, 재직 구간, 위임차월
+        self._a_values = np.zeros((0, len(AGENT_METRICS)), dtype=np.int64)
+        self._a_reasons = np.zeros((0, 2), dtype=object)           # 정착보장 · 초기정착2 미산출 이유
+        self._a_live = np.zeros(0, dtype=bool)
+        self._agents: Dict[object, _Agent] = {}
+        self.updates = 0
+
+    @classmethod
+    def build(cls, contracts: pd.DataFrame, agents: pd.DataFrame, rate_store: RateStore,
+              strategic_health: Iterable[str], as_of: Optional[date] = None, rules: Optional[Rules] = None,
+              master_version: str = "") -> "Rollup":
+        # contracts: batch.CONTRACT_COLUMNS, agents: agent, year, month (+ branch, 나머지 AgentProfile 필드는 기본값)
+        r = cls(rate_store, strategic_health, as_of, rules, master_version)
+        missing = [c for c in batch.CONTRACT_COLUMNS if c not in contracts]
+        if missing:
+            raise ValueError(f"계약 입력에 필수 컬럼이 없습니다: {', '.join(missing)}")
+        missing = [c for c in ("agent", "year", "month") if c not in agents]
+        if missing:
+            raise ValueError(f"설계사 입력에 필수 컬럼이 없습니다: {', '.join(missing)}")
+        with metrics.timer("rollup_build"):
+            r._insert(agents, contracts)
+        metrics.gauge("rollup_agents", len(r._agents))
+        return r
+
+    # ── 정산 + 큐브 반영
+    def _insert(self, agents: pd.DataFrame, contracts: pd.DataFrame):
+        # 아직 집계에 없는 설계사들을 정산해 더한다
+        profiles = batch.agent_frame(agents)
+        branch = agents["branch"] if "branch" in agents else pd.Series(NO_BRANCH, index=agents.index)
+        profiles["branch"] = branch.fillna(NO_BRANCH).astype(str).to_numpy()
+        agent_index = pd.Index(profiles["agent"])
+        if not agent_index.is_unique:
+            raise ValueError("설계사 입력에 중복된 agent 가 있습니다.")
+        dup = [a for a in profiles["agent"] if a in self._agents]
+        if dup:
+            raise ValueError(f"이미 집계에 있는 agent 입니다: {dup[:5]}")
+
+        aidx = agent_index.get_indexer(contracts["agent"])
+        if (aidx < 0).any():
+            unknown = contracts.loc[aidx < 0, "agent"].unique()
+            raise ValueError(f"설계사 입력에 없는 agent 의 계약이 있습니다: {list(unknown[:5])}")
+        order = np.argsort(aidx, kind="stable")
+        aidx = aidx[order]
+        c = contracts[INPUT_COLUMNS].iloc[order].reset_index(drop=True)
+
+        codes = self.rate_store.codes(c["product"], c["type"], c["pay_year"])
+        sh_flag = c["product"].isin(self.strategic_health).to_numpy()
+        per_contract, summary = batch.settle_arrays(aidx, self.rate_store.rates_for(codes),
+                                                    c["premium"].to_numpy(float), sh_flag,
+                                                    {k: profiles[k].to_numpy() for k in batch.AGENT_COLUMNS[1:]},
+                                                    self.as_of, self.rules)
+
+        n = len(profiles)
+        a_vals = np.empty((n, len(AGENT_METRICS)), dtype=np.int64)
+        a_cols = {"agents": 1, "strategic_count": money.bp(summary["total_sh_count"]),
+                  "eligible_settle": summary["eligible_settle"]}
+        for j, m in enumerate(AGENT_METRICS):
+            a_vals[:, j] = a_cols[m] if m in a_cols else summary[m]
+        c_vals = np.empty((len(c), len(CONTRACT_METRICS)), dtype=np.int64)
+        c_cols = {"contracts": 1, "premium": money.won(c["premium"].to_numpy()), "strategic_contracts": sh_flag,
+                  "strategic_count": money.bp(per_contract["sh_count"])}
+        for j, m in enumerate(CONTRACT_METRICS):
+            c_vals[:, j] = c_cols[m] if m in c_cols else per_contract[m]
+
+        b = self.branches.codes(profiles["branch"])
+        months = np.asarray(summary["contract_months"], dtype=np.int64)
+        t = tenure_band(months)
+        p = self.products.codes(c["product"])
+        self._fit()
+        self._add(b, t, a_vals, b[aidx], t[aidx], p, c_vals, +1)
+
+        # 설계사 행 (빈 행부터 재사용 — update_agent 는 같은 행에 다시 들어간다) + 다음 갱신 때 뺄 계약별 기여분
+        ids = profiles["agent"].tolist()
+        reuse = [self._free.pop() for _ in range(min(n, len(self._free)))]
+        for r, a in zip(reuse, ids):
+            self._ids[r] = a
+        rows = np.array(reuse + list(range(len(self._ids), len(self._ids) + n - len(reuse))), dtype=np.int64)
+        self._ids.extend(ids[len(reuse):])
+        cap = (len(self._ids),)
+        self._a_dims, self._a_values = _grow(self._a_dims, cap), _grow(self._a_values, cap)
+        self._a_reasons, self._a_live = _grow(self._a_reasons, cap), _grow(self._a_live, cap)
+        self._a_dims[rows] = np.column_stack([b, t, months])
+        self._a_values[rows] = a_vals
+        self._a_reasons[rows, 0], self._a_reasons[rows, 1] = summary["settle_reasons"], summary["init2_reasons"]
+        self._a_live[rows] = True
+
+        bounds = np.searchsorted(aidx, np.arange(n + 1))
+        cols = [c[k].to_numpy() for k in INPUT_COLUMNS]
+        for i, (prof, s, e) in enumerate(zip(profiles.to_dict("records"), bounds[:-1], bounds[1:])):
+            self._agents[prof["agent"]] = _Agent(int(rows[i]), prof, tuple(x[s:e] for x in cols), p[s:e],
+                                                 c_vals[s:e])
+
+    def _fit(self):
+        # 새 지점/상품 라벨만큼 큐브를 늘린다
+        nb, nt, npr = len(self.branches), len(TENURE_LABELS), len(self.products)
+        self._agent_cube = _grow(self._agent_cube, (nb, nt))
+        self._product_cube = _grow(self._product_cube, (nb, nt, npr))
+
+    def _add(self, b, t, a_vals, cb, ct, p, c_vals, sign: int):
+        np.add.at(self._agent_cube, (b, t), sign * a_vals)
+        np.add.at(self._product_cube, (cb, ct, p), sign * c_vals)
+
+    def _drop(self, agent) -> _Agent:
+        st = self._agents.pop(agent)
+        b, t = self._a_dims[st.row, :1], self._a_dims[st.row, 1:2]
+        k = len(st.product_idx)
+        self._add(b, t, self._a_values[st.row][None], np.repeat(b, k), np.repeat(t, k), st.product_idx, st.values, -1)
+        self._a_values[st.row] = 0
+        self._a_live[st.row] = False
+        self._free.append(st.row)
+        return st
+
+    # ── 증분 갱신
+    def update_agent(self, agent, profile: Optional[Mapping] = None, contracts: Optional[pd.DataFrame] = None):
+        # profile: 바뀐 필드만 (AgentProfile 필드 + branch), contracts: 그 설계사의 계약 전체(INPUT_COLUMNS) — None 이면 그대로
+        # 없는 agent 면 새로 추가 (year, month 필요)
+        with metrics.timer("rollup_update"):
+            old = self._agents.get(agent)
+            if old is None:
+                prof = {"agent": agent, "branch": NO_BRANCH, **batch.AGENT_DEFAULTS}
+                if not profile or "year" not in profile or "month" not in profile:
+                    raise ValueError(f"새 설계사({agent})는 위임년월(year, month)이 필요합니다.")
+                cs = pd.DataFrame(columns=INPUT_COLUMNS)
+            else:
+                prof = dict(old.profile)
+                cs = pd.DataFrame(dict(zip(INPUT_COLUMNS, old.contracts)), columns=INPUT_COLUMNS)
+            unknown = set(profile or {}) - set(batch.AGENT_COLUMNS[1:]) - {"branch"}
+            if unknown:
+                raise ValueError(f"알 수 없는 설계사 필드: {sorted(unknown)}")
+            prof.update(profile or {})
+            if contracts is not None:
+                missing = [k for k in INPUT_COLUMNS if k not in contracts]
+                if missing:
+                    raise ValueError(f"계약 입력에 필수 컬럼이 없습니다: {', '.join(missing)}")
+                cs = contracts[INPUT_COLUMNS]
+            if old is not None:
+                self._drop(agent)
+            try:
+                self._insert(pd.DataFrame([prof]), cs.assign(agent=[agent] * len(cs)))
+            except Exception:
+                if old is not None:  # 되돌림 — 이전 입력으로 다시 넣는다
+                    self._insert(pd.DataFrame([old.profile]),
+                                 pd.DataFrame(dict(zip(INPUT_COLUMNS, old.contracts))).assign(agent=agent))
+                raise
+            self.updates += 1
+
+    def remove_agent(self, agent) -> bool:
+        if agent not in self._agents:
+            return False
+        with metrics.timer("rollup_update"):
+            self._drop(agent)
+        self.updates += 1
+        return True
+
+    def agent_input(self, agent) -> Tuple[dict, pd.DataFrame]:
+        # 수정 화면용 현재 입력 (설계사 필드, 계약 목록)
+        st = self._agents[agent]
+        return dict(st.profile), pd.DataFrame(dict(zip(INPUT_COLUMNS, st.contracts)), columns=INPUT_COLUMNS)
+
+    def __len__(self) -> int:
+        return len(self._agents)
+
+    def __contains__(self, agent) -> bool:
+        return agent in self._agents
+
+    # ── 조회
+    def _slice(self, cube: np.ndarray, dims: Sequence[_Dim], names: Sequence[str], names_m: Sequence[str],
+               by: Sequence[str], filters: Mapping[str, Optional[Iterable]]) -> pd.DataFrame:
+        unknown = [d for d in by if d not in names]
+        if unknown:
+            raise ValueError(f"이 큐브에서 나눌 수 없는 축입니다: {unknown} (가능: {list(names)})")
+        cube = cube[tuple(slice(0, len(d)) for d in dims)]
+        labels = []
+        for ax, (name, d) in enumerate(zip(names, dims)):
+            sel = filters.get(name)
+            if sel is None:
+                labels.append(np.asarray(d.labels, dtype=object))
+            else:
+                idx = d.find(sel)
+                cube = np.take(cube, idx, axis=ax)
+                labels.append(np.asarray(d.labels, dtype=object)[idx])
+        keep = [names.index(d) for d in by]
+        cube = cube.sum(axis=tuple(ax for ax in range(len(names)) if ax not in keep))
+        cube = cube.transpose(tuple(np.argsort(np.argsort(keep))) + (len(keep),)) if keep else cube
+        flat = cube.reshape(-1, len(names_m))
+        grid = np.indices(cube.shape[:-1]).reshape(len(keep), -1) if keep else np.zeros((0, 1), dtype=np.int64)
+        live = flat[:, 0] > 0
+        out = pd.DataFrame({d: labels[names.index(d)][grid[i][live]] for i, d in enumerate(by)})
+        for j, m in enumerate(names_m):
+            out[m] = flat[live, j] / money.BP if m in BP_METRICS else flat[live, j]
+        return out
+
+    def by_group(self, by: Sequence[str] = ("branch",), branches: Optional[Iterable[str]] = None,
+                 bands: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        # 설계사 단위 지표 합계 — by: branch / tenure_band 중 0~2개
+        with metrics.timer("rollup_query"):
+            return self._slice(self._agent_cube, (self.branches, self.bands), DIMENSIONS[:2], AGENT_METRICS,
+                               list(by), {"branch": branches, "tenure_band": bands})
+
+    def by_product(self, by: Sequence[str] = ("product",), branches: Optional[Iterable[str]] = None,
+                   bands: Optional[Iterable[str]] = None, products: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        # 계약 단위 지표 합계 — by: branch / tenure_band / product 중 0~3개
+        with metrics.timer("rollup_query"):
+            return self._slice(self._product_cube, (self.branches, self.bands, self.products), DIMENSIONS,
+                               CONTRACT_METRICS, list(by), {"branch": branches, "tenure_band": bands,
+                                                            "product": products})
+
+    def totals(self, branches: Optional[Iterable[str]] = None, bands: Optional[Iterable[str]] = None) -> dict:
+        df = self.by_group((), branches, bands)
+        # 행 하나를 dict 로 — iloc 행은 float 으로 섞이므로 컬럼별로 꺼낸다
+        return {m: df[m].iloc[0].item() if len(df) else 0 for m in AGENT_METRICS}
+
+    def agents(self, branches: Optional[Iterable[str]] = None, bands: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        # drill-down: 조건에 맞는 설계사별 값
+        with metrics.timer("rollup_query"):
+            n = len(self._ids)
+            mask = self._a_live[:n].copy()
+            if branches is not None:
+                mask &= np.isin(self._a_dims[:n, 0], self.branches.find(branches))
+            if bands is not None:
+                mask &= np.isin(self._a_dims[:n, 1], self.bands.find(bands))
+            rows = np.flatnonzero(mask)
+            dims = self._a_dims[rows]
+            out = pd.DataFrame({
+                "agent": np.asarray(self._ids, dtype=object)[rows],
+                "branch": np.asarray(self.branches.labels, dtype=object)[dims[:, 0]],
+                "tenure_band": np.asarray(TENURE_LABELS, dtype=object)[dims[:, 1]],
+                "contract_months": dims[:, 2],
+            })
+            for j, m in enumerate(AGENT_METRICS[1:], 1):
+                v = self._a_values[rows, j]
+                out[m] = v / money.BP if m in BP_METRICS else v
+            out["eligible_settle"] = out["eligible_settle"].astype(bool)
+            out["settle_reasons"] = self._a_reasons[rows, 0]
+            out["init2_reasons"] = self._a_reasons[rows, 1]
+            return out
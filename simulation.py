@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+import engine
+import money
+from batch import retention_factor_vec
+from engine import AgentProfile, CommissionResult
+from projection import HORIZON, survival_curve
+from tiers import Rules, default_rules
+
+# =========================
+# 유지율 시나리오 몬테카를로 시뮬레이션
+#   당월 유지율: 슬라이더 값을 평균으로 하는 Beta 분포에서 추출 (집중도 ret1_kappa)
+#   계약별 해지 시점: 13/25회차 유지율로 만든 유지 곡선 S(m)에서 역변환 추출 → 시나리오별 13/25회차 유지율(보험료 가중)
+#   시나리오 × 계약 (N, C) 배열로 한 번에 평가, chunk 단위로 나눠 메모리 제한
+#   금액은 엔진과 같은 정수 원 (money.py 절사 규칙) — 입력값 그대로인 시나리오의 익월 총합 = 화면 계산 결과
+# =========================
+CHUNK_SCENARIOS = 20_000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+@dataclass
+class SimulationResult:
+    next_month: np.ndarray     # (N,) 익월 총합 (정수 원)
+    three_year: np.ndarray     # (N,) 36개월 총합 (정수 원)
+    retention_1st: np.ndarray  # (N,) 시나리오 당월 유지율(%)
+    retention_13th: np.ndarray
+    retention_25th: np.ndarray
+
+    def percentiles(self, q: Sequence[float] = PERCENTILES) -> pd.DataFrame:
+        cols = {"익월 총합": self.next_month, "3년 총합": self.three_year,
+                "당월 유지율": self.retention_1st, "13회차 유지율": self.retention_13th,
+                "25회차 유지율": self.retention_25th}
+        return pd.DataFrame({k: np.percentile(v, q) for k, v in cols.items()}, index=[f"P{p:g}" for p in q])
+
+
+def _sample_ret1(rng: np.random.Generator, mean_pct: float, kappa: float, n: int) -> np.ndarray:
+    m = min(max(mean_pct / 100.0, 1e-3), 1 - 1e-3)
+    return rng.beta(m * kappa, (1 - m) * kappa, n) * 100.0
+
+
+def _level_sums(f: np.ndarray, amount: np.ndarray, rate_bp2, alive: Optional[np.ndarray] = None) -> np.ndarray:
+    # 시나리오별 유지율 계수 f (값은 1.0/0.85/0.70 뿐) → 계수마다 계약별 금액을 한 번만 절사해 합산
+    #   rate_bp2: 계수(bp) → 지급률(bp × bp), alive: (N, C) 유지 계약 마스크 (없으면 전 계약)
+    levels, inv = np.unique(f, return_inverse=True)
+    amt = np.stack([money.apply_bp2(amount, rate_bp2(money.bp(v))) for v in levels]) if len(amount) \
+        else np.zeros((len(levels), 0), dtype=np.int64)
+    if alive is None:
+        return amt.sum(axis=1)[inv]
+    return np.take_along_axis(alive.astype(np.int64) @ amt.T, inv[:, None], axis=1)[:, 0]
+
+
+def simulate(calc: CommissionResult, profile: AgentProfile, n: int = 10_000, rules: Optional[Rules] = None,
+             seed: Optional[int] = None, ret1_kappa: float = 400.0,
+             chunk: int = CHUNK_SCENARIOS) -> SimulationResult:
+    # calc: 화면 계산 결과(detail=True) — 계약별 y1/y2/y3 와 설계사 조건을 그대로 사용
+    rules = rules or default_rules()
+    rng = np.random.default_rng(seed)
+    res = calc.results
+
+    premium = res.column("premium").astype(float)
+    y1c = res.column("recruit_fee")
+    y2c = res.column("converted2")
+    y3c = res.column("converted3")
+    w = premium / premium.sum() if premium.sum() > 0 else np.full(len(res), 1.0 / max(len(res), 1))
+
+    months = np.array([calc.contract_months])
+    eff = np.array([calc.effective_converted], dtype=float)
+    r13 = rules.performance_rate.lookup_array(months + 12, eff)[0]
+    r25 = rules.performance_rate.lookup_array(months + 24, eff)[0]
+    S = survival_curve([profile.retention_13th], [profile.retention_25th], HORIZON)[0]
+    neg_S = -S.astype(float)  # searchsorted 용 오름차순
+
+    std_now = np.nan if calc.std_retention_now is None else float(calc.std_retention_now)
+    std13, std25 = float(engine.std_retention(13)), float(engine.std_retention(25))
+    # 지급률 (bp × bp) — engine.fee_rates_bp2 와 같은 반올림, 계약별 금액은 절사 후 합산
+    base_bp, delta_bp = money.bp(calc.base_rate), money.bp(calc.delta_R)
+    dr_bp2 = money.bp(calc.dr_bonus) * money.BP if base_bp > 0 else 0
+    r13_bp, r25_bp = money.bp(r13), money.bp(r25)
+    refund = money.won(profile.refund_amt)
+    ret2_amt, ret3_amt = y2c // 12, y3c // 12
+
+    parts = {k: [] for k in ("next", "three", "ret1", "ret13", "ret25")}
+    for start in range(0, n, chunk):
+        k = min(chunk, n - start)
+
+        # ── 익월: 당월 유지율 → f1, 정착보장 유지율 조건
+        ret1 = _sample_ret1(rng, profile.retention_1st, ret1_kappa, k)
+        f1 = retention_factor_vec(ret1, np.full(k, std_now))
+        perf1 = _level_sums(f1, y1c, lambda f: base_bp * f + dr_bp2)
+        init2_1 = _level_sums(f1, y1c, lambda f: delta_bp * f)
+        cond_ret = np.isnan(std_now) | (ret1 >= std_now)
+        eligible = (calc.contract_months <= 12) and bool(profile.std_activity) and calc.final_guarantee > 0
+        base_comp = np.maximum(0, calc.sum_recruit + perf1 + init2_1 - refund)
+        settle = np.where(cond_ret & eligible, np.maximum(0, calc.final_guarantee - base_comp), 0)
+        next_month = (calc.sum_recruit + perf1 + init2_1 + calc.sum_sh_bonus
+                      + (settle if calc.contract_months <= 12 else 0))
+
+        # ── 2·3차년: 계약별 유지 개월 수 (S(m) > U 인 m 의 개수)
+        u = rng.random((k, len(res)))
+        alive = np.searchsorted(neg_S, -u, side="left")
+        alive13 = alive >= 13
+        alive25 = alive >= 25
+        ret13 = alive13 @ w * 100.0
+        ret25 = alive25 @ w * 100.0
+        f13 = retention_factor_vec(ret13, np.full(k, std13))
+        f25 = retention_factor_vec(ret25, np.full(k, std25))
+        paid2 = np.clip(alive - 12, 0, 12)
+        paid3 = np.clip(alive - 24, 0, 12)
+        year2 = (_level_sums(f13, y2c, lambda f: r13_bp * f, alive13)
+                 + _level_sums(f13, y2c, lambda f: delta_bp * f, alive13) + paid2 @ ret2_amt)
+        year3 = (_level_sums(f25, y3c, lambda f: r25_bp * f, alive25)
+                 + _level_sums(f25, y3c, lambda f: delta_bp * f, alive25) + paid3 @ ret3_amt)
+
+        for key, v in zip(parts, (next_month, next_month + year2 + year3, ret1, ret13, ret25)):
+            parts[key].append(v)
+
+    cat = {key: np.concatenate(v) if v else np.empty(0) for key, v in parts.items()}
+    return SimulationResult(cat["next"], cat["three"], cat["ret1"], cat["ret13"], cat["ret25"])
@@ -0,0 +1,89 @@
+import importlib
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import metrics
+
+# =========================
+# 콜드 스타트: 첫 화면(머리글 · 기본 정보 입력)을 먼저 그리고 무거운 준비는 백그라운드에서
+#   prewarm()  프로세스당 한 번 — pandas 등 무거운 모듈 import + 상품 마스터 스냅샷 로드를 데몬 스레드에서 시작
+#   registry() 스냅샷이 필요한 시점에 호출 — 준비가 끝날 때까지 대기 (이미 끝났으면 바로 반환)
+#   mark()     프로세스 첫 실행의 시점 기록 (header · first_paint · interactive, T0 기준 초) → timings(), metrics 게이지
+#   DBLIFE_PREWARM=0 이면 스레드 없이 registry() 를 부른 스레드에서 순서대로 준비 (비교 측정용)
+# =========================
+HEAVY_MODULES = ("pandas", "master", "master_cache", "master_registry", "batch", "contract_import",
+                 "optimizer", "projection", "simulation")
+T0 = time.perf_counter()    # 이 모듈을 처음 import 한 시각 ≈ 프로세스 첫 실행 시작
+
+_lock = threading.RLock()
+_thread: Optional[threading.Thread] = None
+_registry = None
+_error: Optional[BaseException] = None
+_marks: Dict[str, float] = {}
+
+
+def enabled() -> bool:
+    return os.environ.get("DBLIFE_PREWARM", "1") not in ("0", "false", "no")
+
+
+def _warm(path: Optional[str]):
+    global _registry, _error
+    try:
+        for name in HEAVY_MODULES:
+            importlib.import_module(name)
+        mark("imports_ready")
+        import master
+        from master_registry import MasterRegistry
+
+        reg = MasterRegistry(path or master.MASTER_CSV_PATH)
+        reg.current()
+        _registry = reg.start()
+        mark("master_ready")
+    except BaseException as e:  # 대기하는 쪽(registry)에서 다시 올린다
+        _error = e
+
+
+def prewarm(path: Optional[str] = None) -> Optional[threading.Thread]:
+    global _thread
+    if not enabled():
+        return None
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_warm, args=(path,), name="startup-prewarm", daemon=True)
+            _thread.start()
+    return _thread
+
+
+def registry(path: Optional[str] = None, timeout: Optional[float] = None):
+    global _error, _thread
+    # 준비된 MasterRegistry (감시 스레드 시작됨) — prewarm 이 꺼져 있으면 여기서 준비
+    with metrics.timer("startup_wait"):
+        t = prewarm(path)
+        if t is None:
+            with _lock:
+                if _registry is None:
+                    _warm(path)
+        else:
+            t.join(timeout)
+    with _lock:
+        err = _error
+        if err is not None:
+            # 실패는 한 번만 올리고 비운다 — 다음 호출에서 다시 준비 (마스터 파일이 잠깐 없었던 경우 등)
+            _error, _thread = None, None
+            raise err
+    return _registry
+
+
+def mark(name: str):
+    # 프로세스당 이름별 첫 기록만 남긴다
+    with _lock:
+        if name in _marks:
+            return
+        _marks[name] = time.perf_counter() - T0
+    metrics.gauge(f"startup_{name}_seconds", _marks[name])
+
+
+def timings() -> Dict[str, float]:
+    return dict(_marks)
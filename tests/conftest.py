@@ -0,0 +1,55 @@
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+
+# 모듈은 저장소 최상위에 평평하게 있다 — pytest 를 어디서 실행해도 import 되도록
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import master  # noqa: E402
+from master_registry import MasterSnapshot  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def master_data(_env):
+    # (상품 트리, 마스터 DataFrame, 전략건강 상품명) — 실제 data/product_master.csv
+    return master.load_products_tree_from_csv(master.MASTER_CSV_PATH)
+
+
+@pytest.fixture(scope="session")
+def snapshot(_env):
+    return MasterSnapshot.load(master.MASTER_CSV_PATH)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _env():
+    # 마스터/규칙 경로(./data/...)는 저장소 최상위 기준, API 는 data/audit.sqlite3 에 기록하지 않도록
+    #   세션 범위라 다른 fixture(마스터 로드, api 앱)보다 먼저 적용
+    with pytest.MonkeyPatch.context() as mp:
+        mp.chdir(ROOT)
+        mp.setenv("DBLIFE_AUDIT", "0")
+        yield
+
+
+@pytest.fixture(scope="session")
+def mixed_portfolio(master_data):
+    # 설계사 300명 — 재직 구간 · 환수 · 표준활동 · 미등록 조합(0%)이 고루 섞이도록
+    tree = master_data[0]
+    keys = [(p, t, y) for p in tree for t in tree[p] for y in tree[p][t]["payyears"]]
+    rng = random.Random(7)
+    agents, contracts = [], []
+    for a in range(300):
+        agents.append(dict(agent=f"A{a}", year=rng.choice([2023, 2024, 2025, 2026]), month=rng.randint(1, 12),
+                           std_activity=rng.random() < 0.6, retention_1st=rng.randint(70, 100),
+                           retention_13th=rng.randint(70, 100), retention_25th=rng.randint(70, 100),
+                           refund_p=rng.choice([0, 0, 100_000, 3_000_000]), refund_amt=rng.choice([0, 50_000]),
+                           direct_recruits=rng.randint(0, 4)))
+        for _ in range(rng.randint(0, 10)):
+            p, t, y = rng.choice(keys) if rng.random() > 0.05 else ("미등록", "주보험", "99년납")
+            contracts.append(dict(agent=f"A{a}", product=p, type=t, pay_year=y,
+                                  premium=rng.choice([30_000, 50_000, 100_000, rng.randint(1, 3_000) * 1_000 + 333])))
+    return pd.DataFrame(agents), pd.DataFrame(contracts)
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+import api
+
+
+@pytest.fixture(scope="module")
+def app():
+    a = api.CommissionAPI()
+    a.startup()
+    return a
+
+
+def _call(app, method, path, body=None, qs=b""):
+    # ASGI 호출 한 번 → (status, JSON 본문) — 응답을 보내지 않으면 status 는 None
+    sent = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"" if body is None else json.dumps(body).encode(),
+                "more_body": False}
+
+    async def send(m):
+        if m["type"] == "http.response.start":
+            sent["status"] = m["status"]
+        else:
+            sent["body"] = json.loads(m["body"])
+
+    async def run():
+        await app({"type": "http", "method": method, "path": path, "query_string": qs}, receive, send)
+        return sent.get("status"), sent.get("body")
+    return run()
+
+
+def _gather(*calls):
+    async def run():
+        return await asyncio.gather(*calls)
+    return asyncio.run(run())
+
+
+@pytest.fixture(scope="module")
+def leaf(app):
+    tree = app.service.snapshot.tree
+    product = next(iter(tree))
+    tpe = next(iter(tree[product]))
+    return product, tpe, tree[product][tpe]["payyears"]
+
+
+def _request(leaf, premium=100_000, **profile):
+    product, tpe, pay_years = leaf
+    return {"profile": {"year": 2025, "month": 1, **profile},
+            "contracts": [{"product": product, "type": tpe, "pay_year": pay_years[0], "premium": premium}]}
+
+
+def test_pay_years_returns_values(app, leaf):
+    product, tpe, pay_years = leaf
+    status, body = asyncio.run(_call(app, "GET", "/products/pay-years", qs=f"product={product}&type={tpe}".encode()))
+    assert status == 200
+    assert body == list(pay_years)
+    assert "rates" not in body
+
+
+@pytest.mark.parametrize("profile, premium", [
+    ({"refund_p": "abc"}, 100_000),
+    ({"retention_1st": None}, 100_000),
+    ({}, -5),
+    ({}, float("nan")),
+])
+def test_bad_payload_is_400_and_does_not_fail_neighbours(app, leaf, profile, premium):
+    bad = _request(leaf, premium, **profile)
+    if premium != premium:   # NaN 은 JSON 표준이 아니라 문자열 그대로 보낸다
+        bad["contracts"][0]["premium"] = "NaN"
+    (s1, good), (s2, err) = _gather(_call(app, "POST", "/commission", _request(leaf)),
+                                    _call(app, "POST", "/commission", bad))
+    assert s1 == 200 and good["next_month_total"] >= 0
+    assert s2 == 400 and "error" in err
+
+
+def test_batch_endpoint_isolates_bad_items(app, leaf):
+    status, body = asyncio.run(_call(app, "POST", "/commission/batch",
+                                     [_request(leaf), _request(leaf, refund_p="abc"), _request(leaf, -1)]))
+    assert status == 200
+    assert body[0]["total_converted_raw"] > 0
+    assert "error" in body[1] and "refund_p" in body[1]["error"]
+    assert "error" in body[2]
+
+
+def test_string_profile_values_are_parsed(app, leaf):
+    status, body = asyncio.run(_call(app, "POST", "/commission",
+                                     _request(leaf, refund_p="0", std_activity="false")))
+    assert status == 200 and body["total_converted_raw"] > 0
+
+
+def test_internal_error_is_500_for_that_request_only(app, leaf, monkeypatch):
+    orig = api.batch.settle_arrays
+
+    def boom(aidx, *a, **k):
+        # 계약이 2건 이상인 정산만 실패 — 같은 배치의 1건짜리 요청은 따로 다시 계산되어 성공해야 한다
+        if len(aidx) > 1:
+            raise RuntimeError("boom")
+        return orig(aidx, *a, **k)
+
+    monkeypatch.setattr(api.batch, "settle_arrays", boom)
+    two = _request(leaf)
+    two["contracts"] *= 2
+    (s1, good), (s2, err) = _gather(_call(app, "POST", "/commission", _request(leaf)),
+                                    _call(app, "POST", "/commission", two))
+    assert s1 == 200 and good["total_converted_raw"] > 0
+    assert s2 == 500 and "RuntimeError" in err["error"]
+
+
+def test_unknown_paths_share_one_metric_label(app, monkeypatch):
+    seen = []
+    monkeypatch.setattr(api.metrics, "incr", lambda name, n=1, **labels: seen.append((name, labels)))
+    _gather(*(_call(app, "GET", p) for p in ("/health", "/products/", "/nope/1", "/nope/2")))
+    assert sorted(lb["path"] for name, lb in seen if name == "api_requests_total") == \
+        ["/health", "/products", "other", "other"]
+
+
+def test_batch_settles_off_the_event_loop(app, leaf, monkeypatch):
+    # 배치 계산이 끝나지 않은 동안에도 다른 요청(/health)은 응답한다
+    gate, orig = threading.Event(), app.batcher.fn
+
+    def slow(items):
+        gate.wait(5)
+        return orig(items)
+
+    monkeypatch.setattr(app.batcher, "fn", slow)
+
+    async def run():
+        pending = asyncio.ensure_future(_call(app, "POST", "/commission", _request(leaf)))
+        await asyncio.sleep(0.05)
+        try:
+            health = await asyncio.wait_for(_call(app, "GET", "/health"), 2)
+            assert not pending.done()
+        finally:
+            gate.set()
+        return health, await pending
+
+    (s1, _), (s2, body) = asyncio.run(run())
+    assert s1 == 200 and s2 == 200 and body["total_converted_raw"] > 0
+
+
+def test_builtin_server_status_line_matches_code(app):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"GET /nope HTTP/1.1\r\nconnection: close\r\n\r\n")
+        reader.feed_eof()
+        out = []
+
+        class Writer:
+            write = out.append
+
+            async def drain(self):
+                pass
+
+            def close(self):
+                pass
+
+        await api._handle_conn(app, reader, Writer())
+        return b"".join(out)
+    assert asyncio.run(run()).startswith(b"HTTP/1.1 404 Not Found\r\n")
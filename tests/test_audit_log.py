@@ -0,0 +1,82 @@
+import sqlite3
+from datetime import date
+
+import pytest
+
+import audit_log
+import engine
+
+AS_OF = date(2026, 10, 1)
+
+
+@pytest.fixture()
+def log(tmp_path):
+    a = audit_log.AuditLog(str(tmp_path / "audit.sqlite3"), flush_interval=0.01)
+    yield a
+    a.close()
+
+
+@pytest.fixture(scope="module")
+def calc(master_data, snapshot):
+    tree, _, sh = master_data
+    profile = engine.AgentProfile(2026, 4, True, 95, 85, 85)
+    contracts = [engine.Contract(*snapshot.rate_store.names(i), 100_000) for i in range(3)]
+    return profile, contracts, engine.compute_commission(profile, contracts, tree, sh, AS_OF)
+
+
+def test_record_round_trip(log, calc):
+    profile, contracts, res = calc
+    assert log.record(profile, contracts, res, agent="X1", calc_date=AS_OF)
+    assert log.flush(5)
+    (row,) = log.history("X1", today=AS_OF)
+    assert row["next_month_total"] == res.next_month_total and row["n_contracts"] == 3
+    assert (row["appt_year"], row["appt_month"], row["contract_months"]) == (2026, 4, res.contract_months)
+    full = log.get(row["id"])
+    assert full["inputs"]["contracts"][0] == [contracts[0].product, contracts[0].type, contracts[0].pay_year, 100_000]
+    assert full["outputs"]["contracts"]["perf1"] == res.results.column("perf1").tolist()
+    assert log.by_appointment(2026, 4)[0]["id"] == row["id"]
+
+
+def test_history_window_and_monthly(log, calc):
+    profile, contracts, res = calc
+    for d in (date(2025, 9, 30), date(2025, 10, 1), date(2026, 9, 1), AS_OF, AS_OF):
+        log.record(profile, contracts[:1] if d == AS_OF else contracts, res, agent="X2", calc_date=d)
+    log.record(profile, contracts, res, agent="other", calc_date=AS_OF)
+    assert log.flush(5)
+    # 이번 달 포함 12개월 = 2025-11-01 ~ 2026-10-01
+    assert [r["calc_date"] for r in log.history("X2", 12, today=AS_OF)] == ["2026-10-01", "2026-10-01", "2026-09-01"]
+    months = log.monthly("X2", 13, today=AS_OF)
+    assert [(m["month"], m["calcs"]) for m in months] == [("2025-10", 1), ("2026-09", 1), ("2026-10", 2)]
+    assert audit_log.months_back(AS_OF, 12) == date(2025, 11, 1)
+
+
+def test_rows_are_append_only(log, calc):
+    profile, contracts, res = calc
+    log.record(profile, contracts, res, agent="X3", calc_date=AS_OF)
+    assert log.flush(5)
+    con = sqlite3.connect(log.path)
+    for sql in ("UPDATE calc_log SET agent = 'x'", "DELETE FROM calc_log"):
+        with pytest.raises(sqlite3.DatabaseError, match="append-only"):
+            con.execute(sql)
+    con.close()
+
+
+def test_bad_item_drops_only_its_batch(log, calc):
+    profile, contracts, res = calc
+    log.record({"year": 2026}, contracts, res)      # month 없음 → 이 배치만 실패
+    assert log.flush(5)
+    assert log.dropped == 1 and log.last_error
+    assert log.record(profile, contracts, res, agent="X4", calc_date=AS_OF) and log.flush(5)
+    assert log.stats()["writer_alive"] and len(log.history("X4", today=AS_OF)) == 1
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("DBLIFE_AUDIT", "0")
+    assert audit_log.from_env() is None
+    monkeypatch.setenv("DBLIFE_AUDIT", "1")
+    monkeypatch.setenv("DBLIFE_AUDIT_DB", str(tmp_path / "env.sqlite3"))
+    a = audit_log.from_env()
+    try:
+        assert a.path == str(tmp_path / "env.sqlite3")
+    finally:
+        a.close()
@@ -0,0 +1,51 @@
+import pytest
+
+import contract_import
+from entry_store import EntryStore
+
+
+@pytest.fixture(scope="module")
+def leaves(snapshot):
+    return [snapshot.rate_store.names(i) for i in range(3)]
+
+
+def _csv(rows) -> str:
+    return "상품명,유형,납입년도,월초보험료\n" + "\n".join(",".join(map(str, r)) for r in rows)
+
+
+def test_valid_rows_and_row_numbered_errors(snapshot, leaves):
+    (p, t, y), (p2, _, _) = leaves[0], leaves[1]
+    text = _csv([(p, t, y, '"100,000"'), ("없는상품", t, y, 1), (p, "없는유형", y, 1), (p, t, "99년납", 1),
+                 (p, t, y, "abc"), (p, t, y, -1), (p2, *leaves[1][1:], 50_000)])
+    res = contract_import.import_contracts(text, snapshot.rate_store, chunksize=3)
+    assert res.total == 7
+    assert [(r["product"], r["premium"]) for r in res.rows] == [(p, 100_000), (p2, 50_000)]
+    assert [r for r, _ in res.errors] == [3, 4, 5, 6, 7]
+    reasons = [why for _, why in res.errors]
+    assert reasons[0].startswith("미등록 상품명") and reasons[1].startswith("해당 상품에 없는 유형")
+    assert reasons[2].startswith("해당 유형에 없는 납입년도") and all(w.startswith("보험료 오류") for w in reasons[3:])
+
+
+def test_huge_premium_is_a_row_error_not_an_overflow(snapshot, leaves):
+    # array("q") 에 넣기 전에 걸러진다 — 한도 이하는 그대로 등록
+    p, t, y = leaves[0]
+    res = contract_import.import_contracts(_csv([(p, t, y, 10 ** 30), (p, t, y, contract_import.MAX_PREMIUM),
+                                                 (p, t, y, contract_import.MAX_PREMIUM + 1)]), snapshot.rate_store)
+    assert [r for r, _ in res.errors] == [2, 4]
+    assert all("한도 초과" in why for _, why in res.errors)
+    entries = EntryStore(snapshot.rate_store)
+    entries.extend((r["rate_code"], r["premium"]) for r in res.rows)
+    assert list(entries.premiums) == [contract_import.MAX_PREMIUM]
+
+
+def test_missing_column_raises(snapshot):
+    with pytest.raises(ValueError, match="premium"):
+        contract_import.import_contracts("상품명\t유형\t납입년도\nA\tB\tC", snapshot.rate_store)
+
+
+def test_known_pairs_built_once_per_import(snapshot, leaves, monkeypatch):
+    calls = []
+    orig = contract_import._known_pairs
+    monkeypatch.setattr(contract_import, "_known_pairs", lambda s: calls.append(1) or orig(s))
+    contract_import.import_contracts(_csv([("없는상품", "x", "y", 1)] * 10), snapshot.rate_store, chunksize=2)
+    assert len(calls) == 1
@@ -0,0 +1,44 @@
+import pytest
+
+from entry_store import EntryStore
+from master_registry import MasterSnapshot
+from rate_store import NO_CODE
+
+
+def test_append_remove_and_contracts(snapshot):
+    store = snapshot.rate_store
+    e = EntryStore(store)
+    ids = [e.append(code, 10_000 * (code + 1)) for code in (0, 1, 2)]
+    assert ids == [1, 2, 3] and len(e) == 3
+    assert e.remove(2) and not e.remove(2)
+    cs = e.contracts()
+    assert list(cs) == [1, 3]
+    assert (cs[3].product, cs[3].type, cs[3].pay_year) == store.names(2)
+    assert cs[3].premium == 30_000 and cs[3].rate_code == 2
+    with pytest.raises(ValueError):
+        e.append(NO_CODE)
+    # 삭제 뒤에도 id 는 다시 쓰지 않는다 (위젯 키 충돌 방지)
+    assert e.append(0) == 4
+
+
+def test_set_and_rebind(snapshot, tmp_path):
+    store = snapshot.rate_store
+    e = EntryStore(store)
+    e.extend([(0, 1_000), (1, 2_000)])
+    e.set(0, *store.names(1), premium=5_000)
+    assert list(e.codes) == [1, 1] and list(e.premiums) == [5_000, 2_000]
+    with pytest.raises(ValueError):
+        e.set(0, "없는상품", "주보험", "10년납")
+
+    # 첫 번째 상품이 빠진 마스터로 교체 → 해당 행은 빠지고 이름이 돌아온다
+    gone = store.names(1)[0]
+    df = snapshot.df[snapshot.df["상품명"] != gone]
+    df.to_csv(tmp_path / "master.csv", index=False)
+    new = MasterSnapshot.load(str(tmp_path / "master.csv"))
+    e.extend([(store.code(*store.names(i)), 7_000) for i in range(len(store)) if store.names(i)[0] != gone][:1])
+    kept = e.contract(2)
+    dropped = e.rebind(new.rate_store, new.tree, {p: list(new.tree[p]) for p in new.tree})
+    assert dropped == [gone, gone] and len(e) == 1 and e.store is new.rate_store
+    now = e.contract(0)
+    assert (now.product, now.type, now.pay_year, now.premium) == (kept.product, kept.type, kept.pay_year, 7_000)
+    assert now.rate_code == new.rate_store.code(now.product, now.type, now.pay_year)
@@ -0,0 +1,54 @@
+import random
+from datetime import date
+
+import engine
+from incremental import IncrementalCalc
+
+AS_OF = date(2026, 10, 1)
+FIELDS = ("total_converted_raw", "effective_converted", "total_sh_count", "sum_recruit", "sum_perf1",
+          "sum_init2_1", "sum_sh_bonus", "settle_bonus", "next_month_total")
+
+
+def test_patches_match_full_recompute(master_data, snapshot):
+    # 추가 · 수정 · 삭제를 섞은 편집 순서 — 매 단계 전체 재계산과 원 단위까지 같아야 한다
+    tree, _, sh = master_data
+    store = snapshot.rate_store
+    rng = random.Random(3)
+    profile = engine.AgentProfile(2026, 4, True, 95, 85, 85, refund_p=200_000, direct_recruits=1)
+    inc = IncrementalCalc(tree, sh, store)
+    contracts, next_id = {}, 0
+    for step in range(200):
+        op = rng.random()
+        if op < 0.5 or not contracts:
+            next_id += 1
+            eid = next_id
+        else:
+            eid = rng.choice(list(contracts))
+        if op > 0.85 and contracts:
+            del contracts[eid]
+        else:
+            contracts[eid] = engine.Contract(*store.names(rng.randrange(len(store))),
+                                             rng.choice([30_000, 50_000, 123_457, rng.randint(1, 900) * 1_000]))
+        inc.sync(dict(contracts))
+        got = inc.evaluate(profile, AS_OF, detail=step % 50 == 0)
+        want = engine.compute_commission(profile, list(contracts.values()), tree, sh, AS_OF)
+        for f in FIELDS:
+            assert getattr(got, f) == getattr(want, f), (step, f)
+        if step % 50 == 0:
+            assert got.results.column("perf1").tolist() == want.results.column("perf1").tolist()
+
+
+def test_sync_patches_only_changes(master_data, snapshot):
+    tree, _, sh = master_data
+    store = snapshot.rate_store
+    inc = IncrementalCalc(tree, sh, store)
+    cs = {i: engine.Contract(*store.names(i), 50_000) for i in range(5)}
+    assert inc.sync(cs) == 5
+    assert inc.sync(cs) == 0
+    cs[2] = engine.Contract(*store.names(2), 60_000)
+    del cs[4]
+    assert inc.sync(cs) == 2
+    # 같은 (상품, 유형, 납기, 보험료) 는 파생값 캐시를 다시 쓴다
+    misses = inc.misses
+    inc.sync({9: cs[0], **cs})
+    assert inc.misses == misses
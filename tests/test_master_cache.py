@@ -0,0 +1,56 @@
+import os
+import shutil
+
+import pytest
+
+import master
+import master_cache
+
+
+@pytest.fixture()
+def csv(tmp_path, monkeypatch):
+    path = str(tmp_path / "master.csv")
+    shutil.copy(master.MASTER_CSV_PATH, path)
+    seen = []
+    monkeypatch.setattr(master_cache.metrics, "incr", lambda name, n=1, **lb: seen.append(lb.get("result")))
+    return path, seen
+
+
+def _touch(path, delta_ns=1_000_000):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + delta_ns))
+
+
+def test_hit_rehash_and_miss(csv, master_data):
+    path, seen = csv
+    tree, df, sh = master_cache.load_products_master(path)
+    assert os.path.exists(master_cache.cache_path_for(path))
+    assert tree == master_data[0] and sh == master_data[2]
+    cached = master_cache.load_products_master(path)
+    assert cached[0] == tree and cached[1].equals(df)
+    # 내용이 같으면 mtime 만 바뀌어도 재사용하고 헤더를 갱신
+    _touch(path)
+    master_cache.load_products_master(path)
+    master_cache.load_products_master(path)
+    assert seen == ["miss", "hit", "rehash", "hit"]
+
+
+def test_changed_content_is_reparsed(csv):
+    path, seen = csv
+    master_cache.load_products_master(path)
+    with open(path, encoding="utf-8-sig") as f:
+        lines = f.read().splitlines()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines[:-1]) + "\n")   # 마지막 행 삭제
+    _touch(path)
+    tree, df, _ = master_cache.load_products_master(path)
+    assert seen == ["miss", "miss"] and len(df) == len(lines) - 2
+
+
+def test_corrupt_or_missing(csv, tmp_path):
+    path, seen = csv
+    with open(master_cache.cache_path_for(path), "wb") as f:
+        f.write(master_cache.MAGIC + b"\x00" * 3)
+    assert master_cache.load_products_master(path)[0]
+    assert seen == ["miss"]
+    assert master_cache.load_products_master(str(tmp_path / "none.csv")) == (None, None, None)
@@ -0,0 +1,68 @@
+from datetime import date
+
+import numpy as np
+
+import batch
+import engine
+import money
+
+
+def _agents(n=1, **kw):
+    # settle_arrays 입력 — AgentProfile 필드별 배열 (기본값 + kw)
+    base = {"year": 2026, "month": 1, **batch.AGENT_DEFAULTS, **kw}
+    return {k: np.full(n, base[k]) for k in batch.AGENT_COLUMNS[1:]}
+
+
+def test_scalar_and_array_agree():
+    premium = np.array([33_333, 1, 999_999, 0])
+    rate = money.pct_bp(np.array([312.5, 100, 7.77, 250]))
+    assert rate.tolist() == [31_250, 10_000, 777, 25_000]
+    arr = money.converted(premium, rate)
+    assert arr.dtype == np.int64
+    assert arr.tolist() == [money.converted(int(p), int(r)) for p, r in zip(premium, rate)]
+    assert money.converted(33_333, 31_250) == 104_165        # 104,165.625 → 절사
+
+
+def test_won_floors_input_amounts():
+    assert money.won(99_999.99) == 99_999
+    assert money.won(np.array([1.9, 2.0, 3.5])).tolist() == [1, 2, 3]
+    assert money.won(np.array([5, 6])).dtype == np.int64
+
+
+def test_apply_bp2_floors_after_product():
+    # 1,000원 × (0.35 × 0.85) = 297.5 → 297
+    assert money.apply_bp2(1_000, money.bp(0.35) * money.bp(0.85)) == 297
+    assert money.apply_bp(1_000, money.bp(0.333)) == 333
+
+
+def test_sum_by_is_exact_for_large_amounts():
+    v = np.array([2 ** 53 + 1, 1, 3], dtype=np.int64)
+    assert money.sum_by(np.array([0, 0, 1]), v, 2).tolist() == [2 ** 53 + 2, 3]
+
+
+def test_floor_per_contract_then_sum():
+    # 계약별로 절사한 뒤 합산 — 합계를 한 번에 절사한 값(208,331)과 다르다
+    premium = np.array([33_333.0, 33_333.0])
+    rates = np.array([[312.5, 312.5, 312.5]] * 2)
+    per_contract, summary = batch.settle_arrays(np.array([0, 0]), rates, premium, np.zeros(2, dtype=bool),
+                                                _agents(), date(2026, 6, 1), engine.default_rules())
+    assert per_contract["recruit_fee"].tolist() == [104_165, 104_165]
+    assert summary["total_converted_raw"][0] == 208_330 == per_contract["recruit_fee"].sum()
+    assert summary["sum_perf1"][0] == per_contract["perf1"].sum()
+    assert summary["sum_init2_1"][0] == per_contract["init2_1"].sum()
+    assert per_contract["retention1_amt"].tolist() == (per_contract["converted2"] // 12).tolist()
+    assert per_contract["retention2_amt"].tolist() == (per_contract["converted3"] // 12).tolist()
+
+
+def test_engine_floors_per_contract(snapshot, master_data):
+    tree, _, sh = master_data
+    store = snapshot.rate_store
+    code = next(i for i in range(len(store)) if money.pct_bp(store.get_rates(i)[0]) % money.BP)
+    p, t, y = store.names(code)
+    profile = engine.AgentProfile(2026, 1, True, 95, 85, 85)
+    r = engine.compute_commission(profile, [engine.Contract(p, t, y, 33_333)] * 3, tree, sh, date(2026, 6, 1))
+    one = money.converted(33_333, money.pct_bp(store.get_rates(code)[0]))
+    assert r.results.column("recruit_fee").tolist() == [one] * 3
+    assert r.total_converted_raw == r.sum_recruit == 3 * one
+    for k, total in zip(("recruit_fee", "perf1", "init2_1", "sh_bonus"), r.results.totals()):
+        assert isinstance(total, int) and total == int(r.results.column(k).sum())
@@ -0,0 +1,92 @@
+import glob
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import batch
+import month_end
+
+AS_OF = date(2026, 10, 1)
+
+
+@pytest.fixture()
+def files(tmp_path, snapshot):
+    # 설계사 2명 · 계약 3건 CSV — 테스트마다 고쳐 쓴다
+    store = snapshot.rate_store
+    leaves = [store.names(i) for i in range(3)]
+    contracts = pd.DataFrame([{"agent": a, "product": p, "type": t, "pay_year": y, "premium": 100_000}
+                              for a, (p, t, y) in zip([1, 1, 2], leaves)])
+    agents = pd.DataFrame({"agent": [1, 2], "year": [2026, 2025], "month": [3, 1], "std_activity": [True, False]})
+
+    def write(c=contracts, a=agents):
+        c.to_csv(tmp_path / "contracts.csv", index=False)
+        a.to_csv(tmp_path / "agents.csv", index=False)
+        return ["--contracts", str(tmp_path / "contracts.csv"), "--agents", str(tmp_path / "agents.csv"),
+                "--out", str(tmp_path / "out"), "--as-of", AS_OF.isoformat(), "--workers", "1"]
+    return write, contracts, agents
+
+
+def test_default_run_writes_csv(files, snapshot, tmp_path, capsys):
+    write, contracts, agents = files
+    assert month_end.main(write()) == 0
+    parts = sorted(glob.glob(str(tmp_path / "out" / "agents" / "*.csv")))
+    assert parts, "기본 형식은 csv"
+    out = pd.concat(map(pd.read_csv, parts)).sort_values("agent").reset_index(drop=True)
+    _, summary = batch.settle_batch(contracts, agents, snapshot.df, AS_OF, rate_store=snapshot.rate_store)
+    assert out["next_month_total"].tolist() == summary["next_month_total"].tolist()
+    assert "정산 완료" in capsys.readouterr().out
+
+
+def _error(argv, capsys) -> str:
+    assert month_end.main(argv) == 1
+    return capsys.readouterr().err
+
+
+def test_duplicate_agent_is_a_cli_error(files, capsys):
+    write, contracts, agents = files
+    err = _error(write(a=pd.concat([agents, agents.iloc[:1]])), capsys)
+    assert "중복된 agent" in err and ": [1]" in err
+
+
+def test_unknown_agent_and_missing_columns(files, capsys):
+    write, contracts, agents = files
+    assert "없는 agent" in _error(write(a=agents.iloc[:1]), capsys)
+    assert "필수 컬럼" in _error(write(c=contracts.drop(columns="premium")), capsys)
+
+
+@pytest.mark.parametrize("premium", [None, "abc", -1, float("inf")])
+def test_bad_premium_names_the_row(files, capsys, premium):
+    write, contracts, agents = files
+    contracts = contracts.astype({"premium": object})
+    contracts.loc[1, "premium"] = premium
+    err = _error(write(c=contracts), capsys)
+    assert "보험료" in err and "3행" in err
+
+
+def test_worker_start_failure_is_a_cli_error(files, tmp_path, capsys):
+    write, _, _ = files
+    argv = write() + ["--master", str(tmp_path / "missing.csv")]
+    assert "상품 마스터" in _error(argv, capsys)
+    argv[argv.index("--workers") + 1] = "2"
+    assert "작업 프로세스" in _error(argv, capsys)
+
+
+# ── 설계사 입력 빈 칸 (batch.agent_frame)
+def test_blank_agent_cells_use_defaults(master_data, mixed_portfolio):
+    # 빈 칸(NaN)은 컬럼이 없을 때와 같은 기본값 — INT64_MIN 으로 합계가 틀어지지 않는다
+    agents, contracts = mixed_portfolio
+    blank = agents.assign(refund_p=float("nan"), direct_recruits=float("nan"))
+    dropped = agents.drop(columns=["refund_p", "direct_recruits"])
+    _, s1 = batch.settle_batch(contracts, blank, master_data[1], AS_OF)
+    _, s2 = batch.settle_batch(contracts, dropped, master_data[1], AS_OF)
+    pd.testing.assert_frame_equal(s1, s2)
+    assert (s1["effective_converted"] == s1["total_converted_raw"]).all()
+
+
+def test_blank_appointment_month_names_the_agent(master_data, mixed_portfolio):
+    agents, contracts = mixed_portfolio
+    agents = agents.astype({"month": float})
+    agents.loc[3, "month"] = float("nan")
+    with pytest.raises(ValueError, match="A3"):
+        batch.settle_batch(contracts, agents, master_data[1], AS_OF)
@@ -0,0 +1,53 @@
+import itertools
+import random
+from datetime import date
+
+import pytest
+
+import engine
+import optimizer
+
+AS_OF = date(2026, 10, 1)
+
+
+@pytest.fixture(scope="module")
+def leaves(snapshot):
+    store = snapshot.rate_store
+    return [store.names(i) for i in range(len(store))]
+
+
+@pytest.mark.parametrize("seed", [1, 5, 9])
+def test_best_allocation_beats_grid_search(master_data, snapshot, leaves, seed):
+    # 10,000원 단위 전수 탐색보다 익월 합계가 작지 않아야 한다
+    tree, _, sh = master_data
+    store = snapshot.rate_store
+    rng = random.Random(seed)
+    cands = optimizer.candidates_from(rng.sample([lf for lf in leaves if lf[0] in sh], 2)
+                                      + rng.sample([lf for lf in leaves if lf[0] not in sh], 1), store, sh)
+    profile = engine.AgentProfile(2026, rng.randint(1, 9), rng.random() < 0.7, rng.randint(85, 100), 85, 85,
+                                  direct_recruits=rng.randint(0, 2))
+    base = [engine.Contract(*rng.choice(leaves), rng.randint(1, 30) * 10_000) for _ in range(rng.randint(0, 3))]
+    budget = 100_000
+    res = optimizer.optimize(profile, base, cands, budget, store, sh, AS_OF, unit=10_000, max_contracts=3)
+    best = res.allocations[0]
+    assert best.premium <= budget and best.premium == sum(m for _, m in best.lines)
+    grid = range(0, budget + 1, 10_000)
+    brute = max(engine.compute_commission(profile, base + [engine.Contract(c.product, c.type, c.pay_year, m)
+                                                           for c, m in zip(cands, ps) if m > 0],
+                                          tree, sh, AS_OF).next_month_total
+                for ps in itertools.product(grid, repeat=3) if sum(ps) <= budget)
+    assert best.next_month_total >= brute
+    # 배분 순위: 익월 합계 내림차순
+    totals = [a.next_month_total for a in res.allocations]
+    assert totals == sorted(totals, reverse=True)
+
+
+def test_empty_budget_and_minimum(snapshot, leaves, master_data):
+    sh = master_data[2]
+    store = snapshot.rate_store
+    cands = optimizer.candidates_from(leaves[:2] + [("없는상품", "주보험", "10년납")], store, sh)
+    assert len(cands) == 2
+    profile = engine.AgentProfile(2026, 5, True, 95, 85, 85)
+    assert optimizer.optimize(profile, [], cands, 0, store, sh, AS_OF).allocations == []
+    with pytest.raises(ValueError, match="최소 보험료"):
+        optimizer.optimize(profile, [], cands, 10_000, store, sh, AS_OF, min_premium=30_000)
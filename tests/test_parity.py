@@ -0,0 +1,34 @@
+from datetime import date
+
+import pytest
+
+import batch
+import engine
+
+AS_OF = date(2026, 10, 1)
+SUMMARY_FIELDS = ("contract_months", "total_converted_raw", "effective_converted", "base_rate", "eligible_init2",
+                  "delta_R", "total_sh_count", "sh_unit", "final_guarantee", "eligible_settle", "settle_bonus",
+                  "sum_recruit", "sum_perf1", "sum_init2_1", "sum_sh_bonus", "next_month_total")
+CONTRACT_FIELDS = ("premium", "recruit_fee", "perf1", "perf2", "perf3", "init2_1", "init2_2", "init2_3",
+                   "retention1_amt", "retention2_amt", "converted2", "converted3", "sh_bonus", "strategic")
+
+
+def test_engine_matches_settle_batch(master_data, mixed_portfolio):
+    tree, df, sh = master_data
+    agents, contracts = mixed_portfolio
+    out, summary = batch.settle_batch(contracts, agents, df, AS_OF)
+    by_agent = dict(tuple(out.groupby("agent", sort=False)))
+    for i, a in enumerate(agents.to_dict("records")):
+        profile = engine.AgentProfile(**{k: v for k, v in a.items() if k != "agent"})
+        mine = contracts[contracts["agent"] == a["agent"]]
+        cs = [engine.Contract(c.product, c.type, c.pay_year, c.premium) for c in mine.itertuples()]
+        r = engine.compute_commission(profile, cs, tree, sh, AS_OF)
+        row = summary.iloc[i]
+        for f in SUMMARY_FIELDS:
+            assert getattr(r, f) == pytest.approx(row[f]), (a["agent"], f)
+
+        # 계약별 금액 (정수 원 — 정확히 같아야 한다)
+        if cs:
+            rows = by_agent[a["agent"]]
+            for f in CONTRACT_FIELDS:
+                assert r.results.column(f).tolist() == rows[f].tolist(), (a["agent"], f)
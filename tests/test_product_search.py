@@ -0,0 +1,37 @@
+from product_search import ProductIndex, choseong, normalize
+
+
+def _index():
+    tree = {"뉴-암종신보험": {"주보험": {}}, "연장생활보험": {"주보험": {}}, "백년친구 건강보험": {"암특약": {}},
+            "(무)700 종신보험": {"주보험": {}}}
+    return ProductIndex.from_tree(tree)
+
+
+def test_choseong_and_normalize():
+    assert normalize(" 뉴-암 종신(2404) ") == "뉴암종신2404"
+    assert choseong("백년친구700") == "ㅂㄴㅊㄱ700"
+
+
+def test_plain_and_choseong_queries():
+    idx = _index()
+    assert idx.products("종신") == ["뉴-암종신보험", "(무)700 종신보험"]   # 앞쪽 일치가 먼저
+    assert idx.products("ㅂㄴㅊㄱ") == ["백년친구 건강보험"]
+    assert idx.products("ㅇㅈㅅ") == ["연장생활보험", "뉴-암종신보험"]
+    # 유형명으로 맞으면 유형과 함께
+    hit = idx.search("암특약")[0]
+    assert (hit.product, hit.type) == ("백년친구 건강보험", "암특약")
+
+
+def test_mixed_query_matches_syllables_literally():
+    # 완성된 글자 "암" 은 그대로 — 초성만 ㅇ 인 연장생활보험은 맞지 않는다
+    idx = _index()
+    assert idx.products("암ㅈㅅ") == ["뉴-암종신보험"]
+    assert idx.products("7ㅈㅅ") == []
+    assert idx.products("700ㅈ") == ["(무)700 종신보험"]
+    assert idx.products("연ㅈㅅ") == ["연장생활보험"]
+
+
+def test_repeated_query_is_cached():
+    idx = _index()
+    assert idx.search("암ㅈㅅ") is idx.search("암 ㅈㅅ")
+    assert idx.search("암ㅈㅅ") is not idx.search("ㅇㅈㅅ")
@@ -0,0 +1,40 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+import projection
+
+AS_OF = date(2026, 10, 1)
+
+
+@pytest.fixture(scope="module")
+def portfolio(master_data, mixed_portfolio):
+    agents, contracts = mixed_portfolio
+    return agents.iloc[:40], contracts[contracts["agent"].isin(agents["agent"].iloc[:40])], master_data[1]
+
+
+def test_horizon_sizes_the_output(portfolio):
+    agents, contracts, df = portfolio
+    p36 = projection.project_portfolio(contracts, agents, df, AS_OF, per_contract=True)
+    p48 = projection.project_portfolio(contracts, agents, df, AS_OF, horizon=48, per_contract=True)
+    p12 = projection.project_portfolio(contracts, agents, df, AS_OF, horizon=12)
+    assert p36.total.shape == (40, 36) and p48.total.shape == (40, 48) and p12.total.shape == (40, 12)
+    assert p48.contract_flows.shape[1] == 48 and list(p48.frame().columns)[-1] == "m48"
+    # 37개월 이후는 지급 항목이 없다
+    np.testing.assert_array_equal(p48.total[:, :36], p36.total)
+    assert not p48.total[:, 36:].any()
+    np.testing.assert_array_equal(p12.total, p36.total[:, :12])
+    with pytest.raises(ValueError, match="horizon"):
+        projection.project_portfolio(contracts, agents, df, AS_OF, horizon=0)
+
+
+def test_flows_are_float64_and_add_up(portfolio):
+    agents, contracts, df = portfolio
+    p = projection.project_portfolio(contracts, agents, df, AS_OF, per_contract=True)
+    assert p.total.dtype == np.float64 and p.contract_flows.dtype == np.float64
+    np.testing.assert_allclose(sum(p.components.values()), p.total)
+    # 1개월차 = 익월 총합 (정수 원 그대로), 계약 흐름 합 = 설계사 흐름 - 정착보장
+    _, summary = projection.batch.settle_batch(contracts, agents, df, AS_OF)
+    assert p.total[:, 0].tolist() == summary["next_month_total"].astype(float).tolist()
+    assert p.contract_flows[:, 1:].sum() == pytest.approx(p.total[:, 1:].sum(), rel=1e-12)
@@ -0,0 +1,86 @@
+from datetime import date
+
+import pytest
+
+import engine
+from result_cache import ResultCache
+
+AS_OF = date(2026, 10, 1)
+PROFILE = engine.AgentProfile(2026, 3, True, 95, 85, 85)
+
+
+@pytest.fixture()
+def setup(master_data, snapshot):
+    tree, _, sh = master_data
+    store = snapshot.rate_store
+    contracts = [engine.Contract(*store.names(i), 10_000 * (i + 1)) for i in (5, 0, 3)]
+    calls = []
+
+    def compute(cs):
+        def run():
+            calls.append(1)
+            return engine.compute_commission(PROFILE, cs, tree, sh, AS_OF)
+        return run
+    return contracts, compute, calls
+
+
+def _get(cache, cs, compute, master="v1", rules="r1", profile=PROFILE):
+    return cache.commission(profile, 7, cs, master, rules, compute(cs))
+
+
+def test_hit_returns_results_in_caller_order(setup):
+    contracts, compute, calls = setup
+    cache = ResultCache()
+    first = _get(cache, contracts, compute)
+    shuffled = contracts[::-1]
+    again = _get(cache, shuffled, compute)
+    assert len(calls) == 1 and cache.hits == 1
+    assert again.results.column("premium").tolist() == [c.premium for c in shuffled]
+    assert again.next_month_total == first.next_month_total
+
+
+def test_inputs_and_versions_change_the_key(setup):
+    contracts, compute, calls = setup
+    cache = ResultCache()
+    _get(cache, contracts, compute)
+    _get(cache, contracts, compute, rules="r2")
+    _get(cache, contracts[:2], compute)
+    _get(cache, contracts, compute, profile=engine.AgentProfile(2026, 3, True, 90, 85, 85))
+    assert len(calls) == 4 and cache.hits == 0
+
+
+def test_master_swap_clears_everything(setup):
+    contracts, compute, calls = setup
+    cache = ResultCache()
+    _get(cache, contracts, compute)
+    cache.derived("sim", PROFILE, 7, contracts, "v1", "r1", lambda: "derived")
+    assert len(cache) == 2
+    _get(cache, contracts, compute, master="v2")
+    assert cache.invalidations == 1 and len(cache) == 1 and len(calls) == 2
+    # 되돌아가도 이전 결과는 남아 있지 않다
+    _get(cache, contracts, compute, master="v1")
+    assert len(calls) == 3
+
+
+def test_ttl_and_lru_eviction(setup, monkeypatch):
+    contracts, compute, calls = setup
+    cache = ResultCache(max_entries=2, ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr("result_cache.time.monotonic", lambda: now[0])
+    for n in (1, 2, 3):
+        _get(cache, contracts[:n], compute)
+    assert cache.evictions == 1 and len(cache) == 2
+    _get(cache, contracts[:1], compute)         # 가장 오래된 항목은 밀려났다
+    assert len(calls) == 4
+    now[0] += 11
+    _get(cache, contracts[:1], compute)
+    assert cache.expired == 1 and len(calls) == 5
+
+
+def test_derived_is_computed_once_per_key(setup):
+    contracts, _, _ = setup
+    cache = ResultCache()
+    runs = []
+    for cs in (contracts, contracts[::-1]):
+        assert cache.derived("sim", PROFILE, 7, cs, "v1", "r1", lambda: runs.append(1) or len(runs)) == 1
+    assert cache.derived("other", PROFILE, 7, contracts, "v1", "r1", lambda: "x") == "x"
@@ -0,0 +1,100 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import batch
+import rollup
+from bench.synth import synthetic_portfolio
+
+AS_OF = date(2025, 6, 30)
+
+
+@pytest.fixture()
+def portfolio(snapshot):
+    contracts, agents = synthetic_portfolio(snapshot.rate_store, 4_000, 200, as_of=AS_OF, seed=3)
+    rng = np.random.default_rng(0)
+    agents["branch"] = np.array(["강남", "부산", "대전", "광주"], dtype=object)[rng.integers(0, 4, len(agents))]
+    return contracts, agents
+
+
+def _build(snapshot, contracts, agents):
+    return rollup.Rollup.build(contracts, agents, snapshot.rate_store, snapshot.strategic, AS_OF)
+
+
+def _same(r: rollup.Rollup, fresh: rollup.Rollup):
+    def norm(df, by):
+        return df.sort_values(list(by)).reset_index(drop=True) if by else df
+
+    for by in [(), ("branch",), ("tenure_band",), ("branch", "tenure_band")]:
+        pd.testing.assert_frame_equal(norm(r.by_group(by), by), norm(fresh.by_group(by), by))
+    for by in [("product",), ("branch", "product"), ("tenure_band", "branch", "product")]:
+        pd.testing.assert_frame_equal(norm(r.by_product(by), by), norm(fresh.by_product(by), by))
+    pd.testing.assert_frame_equal(norm(r.agents(), ("agent",)), norm(fresh.agents(), ("agent",)))
+    assert r.totals() == fresh.totals()
+
+
+def test_build_matches_settle_batch(snapshot, portfolio):
+    contracts, agents = portfolio
+    r = _build(snapshot, contracts, agents)
+    _, summary = batch.settle_batch(contracts, agents, snapshot.df, AS_OF, rate_store=snapshot.rate_store)
+    tot = r.totals()
+    for m in ("effective_converted", "sum_recruit", "sum_perf1", "sum_init2_1", "sum_sh_bonus", "settle_bonus",
+              "next_month_total"):
+        assert tot[m] == summary[m].sum(), m
+        assert isinstance(tot[m], int), m
+    assert tot["strategic_count"] == pytest.approx(summary["total_sh_count"].sum())
+    drill = r.agents().set_index("agent").loc[summary["agent"]]
+    assert drill["next_month_total"].tolist() == summary["next_month_total"].tolist()
+    assert drill["settle_reasons"].tolist() == summary["settle_reasons"].tolist()
+
+
+def test_incremental_updates_match_rebuild(snapshot, portfolio):
+    contracts, agents = portfolio
+    r = _build(snapshot, contracts, agents)
+    rows = len(r._ids)
+    rng = np.random.default_rng(1)
+    for k in range(30):
+        agent = int(agents["agent"].iloc[rng.integers(0, len(agents))])
+        prof = {"retention_1st": int(rng.integers(80, 101)), "direct_recruits": int(rng.integers(0, 4))}
+        if k % 5 == 0:
+            prof["branch"] = "신규지점"
+        if k % 7 == 0:
+            prof["year"], prof["month"] = 2025, 1
+        mine = contracts[contracts["agent"] == agent].assign(premium=lambda d: d["premium"] + 10_000)
+        if k % 3 == 0:
+            mine = mine.iloc[1:]
+        if k % 4 == 0:
+            mine = pd.concat([mine, pd.DataFrame({"agent": [agent], "product": ["신상품X"], "type": ["주보험"],
+                                                  "pay_year": ["10년납"], "premium": [50_000]})])
+        r.update_agent(agent, prof, mine.drop(columns="agent"))
+        for f, v in prof.items():
+            agents.loc[agents["agent"] == agent, f] = v
+        contracts = pd.concat([contracts[contracts["agent"] != agent], mine], ignore_index=True)
+    assert len(r._ids) == rows        # 갱신은 같은 행을 다시 쓴다
+
+    # 새 설계사 추가 · 삭제 (삭제된 행은 다음 추가 때 재사용)
+    gone = int(agents["agent"].iloc[0])
+    assert r.remove_agent(gone)
+    agents, contracts = agents[agents["agent"] != gone], contracts[contracts["agent"] != gone]
+    new = pd.DataFrame({"product": ["신상품X"], "type": ["주보험"], "pay_year": ["10년납"], "premium": [30_000]})
+    r.update_agent(99_999, {"year": 2024, "month": 3, "branch": "강남"}, new)
+    agents = pd.concat([agents, pd.DataFrame([{"agent": 99_999, "year": 2024, "month": 3, "branch": "강남",
+                                               **batch.AGENT_DEFAULTS}])], ignore_index=True)
+    contracts = pd.concat([contracts, new.assign(agent=99_999)], ignore_index=True)
+    assert len(r._ids) == rows
+
+    _same(r, _build(snapshot, contracts, agents))
+
+
+def test_failed_update_keeps_previous_state(snapshot, portfolio):
+    contracts, agents = portfolio
+    r = _build(snapshot, contracts, agents)
+    before = r.by_group(("branch",))
+    agent = int(agents["agent"].iloc[0])
+    with pytest.raises(ValueError):
+        r.update_agent(agent, {"no_such_field": 1})
+    with pytest.raises(ValueError):
+        r.update_agent(agent, None, pd.DataFrame({"product": ["x"]}))
+    pd.testing.assert_frame_equal(r.by_group(("branch",)), before)
@@ -0,0 +1,49 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+import engine
+import money
+import simulation
+from tiers import default_rules
+
+AS_OF = date(2026, 10, 1)
+
+
+@pytest.fixture(scope="module")
+def contracts(snapshot):
+    store = snapshot.rate_store
+    return [engine.Contract(*store.names(i), premium) for i, premium in
+            zip(range(0, 60, 6), [30_000, 50_000, 100_000, 123_457, 333_333, 70_001, 45_000, 99_999, 250_000, 10_003])]
+
+
+@pytest.mark.parametrize("ret1, std_activity", [(99, True), (50, True), (99, False)])
+def test_scenario_at_inputs_matches_engine_to_the_won(master_data, contracts, ret1, std_activity):
+    # 당월 유지율이 기준과 멀면 모든 시나리오의 계수가 입력값과 같다 → 익월 총합이 엔진 결과와 원 단위까지 같아야 한다
+    tree, _, sh = master_data
+    profile = engine.AgentProfile(2026, 6, std_activity, ret1, 85, 85, refund_amt=10_000, direct_recruits=1)
+    calc = engine.compute_commission(profile, contracts, tree, sh, AS_OF)
+    sim = simulation.simulate(calc, profile, n=500, seed=0)
+    assert sim.next_month.dtype == np.int64 and sim.three_year.dtype == np.int64
+    assert (sim.next_month == calc.next_month_total).all()
+    assert (sim.three_year >= sim.next_month).all()
+
+
+def test_full_retention_years_are_floored_per_contract(master_data, contracts):
+    # 13/25회차 유지율 100% → 전 계약 유지: 2·3차년 = 계약별 절사 금액의 합 (유지수수료는 floor(y/12) × 12개월)
+    tree, _, sh = master_data
+    profile = engine.AgentProfile(2026, 6, True, 99, 100, 100)
+    calc = engine.compute_commission(profile, contracts, tree, sh, AS_OF)
+    sim = simulation.simulate(calc, profile, n=50, seed=1)
+    assert (sim.retention_13th == 100).all() and (sim.retention_25th == 100).all()
+    months = np.array([calc.contract_months])
+    eff = np.array([calc.effective_converted], dtype=float)
+    rate = default_rules().performance_rate.lookup_array
+    r = calc.results
+    years = 0
+    for y, m in ((r.column("converted2"), 12), (r.column("converted3"), 24)):
+        years += sum(money.apply_bp2(int(v), money.bp(rate(months + m, eff)[0]) * money.BP)
+                     + money.apply_bp2(int(v), money.bp(calc.delta_R) * money.BP)
+                     + int(v) // 12 * 12 for v in y)
+    assert (sim.three_year - sim.next_month == years).all()
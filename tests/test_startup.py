@@ -0,0 +1,29 @@
+import pytest
+
+import startup
+
+
+@pytest.fixture()
+def fresh(monkeypatch):
+    # 프로세스 전역 상태를 테스트마다 비운다
+    for name, v in (("_thread", None), ("_registry", None), ("_error", None)):
+        monkeypatch.setattr(startup, name, v)
+    return monkeypatch
+
+
+@pytest.mark.parametrize("prewarm", ["1", "0"])
+def test_registry_is_ready_after_wait(fresh, prewarm):
+    fresh.setenv("DBLIFE_PREWARM", prewarm)
+    reg = startup.registry()
+    assert reg is not None and reg.current().tree
+    assert startup.registry() is reg
+    assert {"imports_ready", "master_ready"} <= set(startup.timings())
+
+
+def test_failure_is_raised_once_then_retried(fresh, tmp_path):
+    fresh.setenv("DBLIFE_PREWARM", "1")
+    fresh.setattr(startup, "HEAVY_MODULES", startup.HEAVY_MODULES + ("no_such_module_x",))
+    with pytest.raises(ImportError):
+        startup.registry()
+    fresh.setattr(startup, "HEAVY_MODULES", startup.HEAVY_MODULES[:-1])
+    assert startup.registry() is not None
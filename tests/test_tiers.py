@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import tiers
+from tiers import BandedTierTable, TierTable, default_rules
+
+
+def test_boundaries_are_inclusive_lower_bounds():
+    rules = default_rules()
+    g = rules.guarantee_base
+    assert [g.lookup(x) for x in (999_999, 1_000_000, 1_499_999, 5_000_000, 10 ** 9)] == \
+        [0, 1_500_000, 1_500_000, 5_000_000, 5_000_000]
+    assert [rules.strategic_count.lookup(x) for x in (29_999, 30_000, 50_000)] == [0.0, 0.5, 1.0]
+    assert [rules.direct_recruit_bonus.lookup(n) for n in (0, 1, 3, 9)] == [0.0, 0.05, 0.15, 0.15]
+
+
+def test_performance_rate_bands_by_tenure():
+    pr = default_rules().performance_rate
+    # 위임 12차월까지 첫 행, 13~24 둘째 행 … 37차월 이후 마지막 행
+    assert [pr.lookup(m, 10_000_000) for m in (1, 12, 13, 24, 25, 36, 37, 120)] == \
+        [0.75, 0.75, 0.80, 0.80, 0.85, 0.85, 0.90, 0.90]
+    assert [pr.lookup(1, x) for x in (699_999, 700_000, 1_000_000, 9_999_999)] == [0.0, 0.35, 0.60, 0.72]
+    assert pr.tier(700_000) == 1 and pr.band(13) == 1
+
+
+def test_array_lookups_match_scalar():
+    rules = default_rules()
+    rng = np.random.default_rng(0)
+    months = rng.integers(1, 60, 500)
+    x = np.concatenate([rng.integers(0, 12_000_000, 490), rules.performance_rate.thresholds * 2])
+    pr = rules.performance_rate
+    assert pr.lookup_array(months, x).tolist() == [pr.lookup(m, v) for m, v in zip(months.tolist(), x.tolist())]
+    assert pr.tier_array(x).tolist() == [pr.tier(v) for v in x.tolist()]
+    g = rules.guarantee_base
+    assert g.lookup_array(x).tolist() == [g.lookup(v) for v in x.tolist()]
+
+
+def test_table_shape_is_validated():
+    with pytest.raises(ValueError, match="오름차순"):
+        TierTable([2, 1], [0, 1, 2])
+    with pytest.raises(ValueError, match="개수"):
+        TierTable([1, 2], [0, 1])
+    with pytest.raises(ValueError, match="차월"):
+        BandedTierTable([12], [1], [[0, 1]])
+
+
+def test_default_rules_reload_when_file_changes(tmp_path):
+    path = str(tmp_path / "rules.json")
+    shutil.copy(tiers.RULES_PATH, path)
+    first = default_rules(path)
+    assert default_rules(path) is first
+    with open(path, encoding="utf-8") as f:
+        spec = json.load(f)
+    spec["version"], spec["init2_max_rate"] = "test", 0.8
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(spec, f)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    again = default_rules(path)
+    assert again is not first and again.version == "test" and again.init2_max_rate == 0.8
@@ -0,0 +1,77 @@
+from datetime import date
+
+import pytest
+
+import batch
+import engine
+from tiers import default_rules
+
+AS_OF = date(2026, 10, 1)
+
+
+def _terms(std_activity=True, months=3, converted=12_000_000):
+    # 위임 months 차월, 유효환산 converted (최대 지급률 75% 는 1,000만P 이상)
+    profile = engine.AgentProfile(2026, 10 - months + 1, std_activity, 95, 85, 85)
+    return engine.agent_terms(profile, engine.contract_months_between(profile.year, profile.month, AS_OF),
+                              converted, 0.0, default_rules())
+
+
+def _reasons(terms, rule):
+    d = next(d for d in terms.trace if d.rule == rule)
+    return [engine.REASONS[rule][c] for c in d.failed]
+
+
+def test_init2_max_rate_is_not_a_reason_for_an_eligible_agent():
+    t = _terms()
+    assert t.eligible_init2 and t.delta_R == 0.0
+    assert _reasons(t, "init2") == []
+
+
+def test_init2_max_rate_explains_an_ineligible_agent():
+    t = _terms(std_activity=False)
+    assert not t.eligible_init2
+    assert _reasons(t, "init2") == ["표준활동 미달성", "성과수수료 최대 지급률 달성 상태"]
+    assert _reasons(_terms(std_activity=False, converted=500_000), "init2") == ["표준활동 미달성",
+                                                                               "유효환산 100만원 미만"]
+    assert _reasons(_terms(months=13), "init2") == ["위임 13차월 이상"]
+
+
+def test_settle_reasons_only_for_failed_conditions(snapshot, master_data):
+    tree, _, sh = master_data
+    store = snapshot.rate_store
+    p, t, y = store.names(0)
+    premium = int(12_000_000 / (store.get_rates(0)[0] / 100)) + 1
+    calc = engine.compute_commission(engine.AgentProfile(2026, 8, True, 95, 85, 85),
+                                     [engine.Contract(p, t, y, premium)], tree, sh, AS_OF)
+    # 대상이지만 기본 수수료가 보장금액 이상 → 보장 수수료 0, 이유 없음
+    assert calc.eligible_settle and calc.settle_bonus == 0
+    assert calc.reasons("settle") == []
+    calc = engine.compute_commission(engine.AgentProfile(2026, 8, False, 50, 85, 85), [], tree, sh, AS_OF)
+    assert calc.reasons("settle") == ["유효환산 구간 미달", "표준활동 미달성", "당월 유지율 기준 미달"]
+
+
+def test_batch_reasons_match_engine(master_data, mixed_portfolio):
+    tree, df, sh = master_data
+    agents, contracts = mixed_portfolio
+    _, summary = batch.settle_batch(contracts, agents, df, AS_OF)
+    for i, a in enumerate(agents.to_dict("records")):
+        profile = engine.AgentProfile(**{k: v for k, v in a.items() if k != "agent"})
+        mine = contracts[contracts["agent"] == a["agent"]]
+        r = engine.compute_commission(profile, [engine.Contract(c.product, c.type, c.pay_year, c.premium)
+                                                for c in mine.itertuples()], tree, sh, AS_OF)
+        row = summary.iloc[i]
+        assert ", ".join(r.reasons("settle")) == row["settle_reasons"], a["agent"]
+        assert ", ".join(r.reasons("init2")) == row["init2_reasons"], a["agent"]
+        assert r.decision("performance_rate").tier == row["performance_tier"]
+        assert r.decision("guarantee").tier == row["guarantee_tier"]
+        # 이유는 미대상일 때만
+        assert bool(row["init2_reasons"]) == (not row["eligible_init2"]), a["agent"]
+
+
+@pytest.mark.parametrize("rule", ["settle", "init2"])
+def test_reasons_are_exercised(master_data, mixed_portfolio, rule):
+    # 위 비교가 빈 문구끼리만 같은 것이 아닌지
+    agents, contracts = mixed_portfolio
+    _, summary = batch.settle_batch(contracts, agents, master_data[1], AS_OF)
+    texts = set(summary[f"{rule}_reasons"])
+    assert "" in texts and len(texts) > 2
@@ -0,0 +1,121 @@
+import json
+import os
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+# =========================
+# 구간 테이블 (data/commission_rules.json)
+# =========================
+RULES_PATH = "./data/commission_rules.json"
+
+
+class TierTable:
+    # x >= thresholds[i] 이면 values[i+1] (thresholds 오름차순, len(values) = len(thresholds) + 1)
+    __slots__ = ("thresholds", "values", "_thr", "_val")
+
+    def __init__(self, thresholds: Sequence[float], values: Sequence[float]):
+        if list(thresholds) != sorted(thresholds):
+            raise ValueError(f"구간 경계값이 오름차순이 아닙니다: {thresholds}")
+        if len(values) != len(thresholds) + 1:
+            raise ValueError(f"구간 값 개수는 경계값 개수 + 1 이어야 합니다: {thresholds} / {values}")
+        self.thresholds = list(thresholds)
+        self.values = list(values)
+        self._thr = np.asarray(self.thresholds, dtype=float)
+        self._val = np.asarray(self.values)
+
+    def lookup(self, x: float):
+        return self.values[bisect_right(self.thresholds, x)]
+
+    def tier(self, x: float) -> int:
+        # 걸린 구간 번호 (0 = 첫 경계 미만)
+        return bisect_right(self.thresholds, x)
+
+    def lookup_array(self, x) -> np.ndarray:
+        return self._val[np.searchsorted(self._thr, x, side="right")]
+
+    def tier_array(self, x) -> np.ndarray:
+        return np.searchsorted(self._thr, x, side="right")
+
+
+class BandedTierTable:
+    # 위임차월 구간(bands: 각 구간의 상한, 포함)별로 값 행을 달리하는 TierTable
+    __slots__ = ("bands", "thresholds", "values", "_bands", "_thr", "_val")
+
+    def __init__(self, bands: Sequence[int], thresholds: Sequence[float], values: Sequence[Sequence[float]]):
+        if list(bands) != sorted(bands):
+            raise ValueError(f"차월 구간이 오름차순이 아닙니다: {bands}")
+        if len(values) != len(bands) + 1:
+            raise ValueError(f"차월 구간 값 행 개수는 구간 개수 + 1 이어야 합니다: {bands}")
+        rows = [TierTable(thresholds, row) for row in values]
+        self.bands = list(bands)
+        self.thresholds = rows[0].thresholds
+        self.values = [r.values for r in rows]
+        self._bands = np.asarray(self.bands)
+        self._thr = rows[0]._thr
+        self._val = np.asarray(self.values)
+
+    def band(self, months: int) -> int:
+        return bisect_left(self.bands, months)
+
+    def lookup(self, months: int, x: float):
+        return self.values[bisect_left(self.bands, months)][bisect_right(self.thresholds, x)]
+
+    def tier(self, x: float) -> int:
+        # 걸린 환산 구간 번호 (차월 구간과 무관)
+        return bisect_right(self.thresholds, x)
+
+    def tier_array(self, x) -> np.ndarray:
+        return np.searchsorted(self._thr, x, side="right")
+
+    def lookup_array(self, months, x) -> np.ndarray:
+        band = np.searchsorted(self._bands, months, side="left")
+        tier = np.searchsorted(self._thr, x, side="right")
+        return self._val[band, tier]
+
+
+@dataclass(frozen=True)
+class Rules:
+    version: str
+    performance_rate: BandedTierTable
+    init2_max_rate: float
+    guarantee_base: TierTable
+    strategic_count: TierTable
+    per_unit_bonus: TierTable
+    direct_recruit_bonus: TierTable
+    direct_recruit_guarantee: TierTable
+
+
+def _tier(spec: dict) -> TierTable:
+    return TierTable(spec["thresholds"], spec["values"])
+
+
+def load_rules(path: str = RULES_PATH) -> Rules:
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    pr = spec["performance_rate"]
+    return Rules(
+        version=str(spec["version"]),
+        performance_rate=BandedTierTable(pr["tenure_bands"], pr["thresholds"], pr["values"]),
+        init2_max_rate=float(spec["init2_max_rate"]),
+        guarantee_base=_tier(spec["guarantee_base"]),
+        strategic_count=_tier(spec["strategic_count"]),
+        per_unit_bonus=_tier(spec["per_unit_bonus"]),
+        direct_recruit_bonus=_tier(spec["direct_recruit_bonus"]),
+        direct_recruit_guarantee=_tier(spec["direct_recruit_guarantee"]),
+    )
+
+
+_loaded: dict = {}
+
+
+def default_rules(path: str = RULES_PATH) -> Rules:
+    # 규칙 파일이 바뀌면(mtime) 다시 읽는다
+    mtime = os.stat(path).st_mtime_ns
+    hit = _loaded.get(path)
+    if hit is None or hit[0] != mtime:
+        hit = (mtime, load_rules(path))
+        _loaded[path] = hit
+    return hit[1]